@@ -45,6 +45,10 @@ app.use(favicon(path.join(__dirname, 'assets', 'favicon.ico')));
 
 app.use('/timesync', timesyncServer.requestHandler);
 
+// Whole generated schedules are saved in one request, registered before the default
+// parser so that it skips these already parsed bodies
+app.put('/scheduler/divisions/:divisionId/schedule', express.json({ limit: '10mb' }));
+
 // Default JSON body parser with standard limit for most endpoints
 app.use(express.json({ limit: '100kb' }));
 
@@ -1,4 +1,5 @@
 import express from 'express';
+import { SchedulerRequest } from '@lems/types/api/scheduler';
 import db from '../../../../lib/database';
 import { AdminDivisionRequest, AdminEventRequest } from '../../../../types/express';
 import { attachDivision } from '../../middleware/attach-division';
@@ -14,6 +15,8 @@ import divisionAwardsRouter from './awards';
 
 const router = express.Router({ mergeParams: true });
 
+const SCHEDULER_DOMAIN = process.env.SCHEDULER_URL;
+
 router.get(
   '/',
   asHandler<AdminEventRequest>(async (req, res) => {
@@ -44,6 +47,41 @@ router.post(
   })
 );
 
+router.post(
+  '/schedule/generate',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminEventRequest>(async (req, res) => {
+    try {
+      const divisions: SchedulerRequest[] = req.body?.divisions;
+
+      if (!Array.isArray(divisions) || divisions.length === 0) {
+        res.status(400).json({ error: 'Division settings are required' });
+        return;
+      }
+
+      const eventDivisions = await db.divisions.byEventId(req.eventId).getAll();
+      const eventDivisionIds = new Set(eventDivisions.map(division => division.id));
+      if (divisions.some(settings => !eventDivisionIds.has(settings.division_id))) {
+        res.status(400).json({ error: 'DIVISION_NOT_IN_EVENT' });
+        return;
+      }
+
+      const response = await fetch(`${SCHEDULER_DOMAIN}/scheduler/event`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ divisions })
+      });
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error generating event schedule');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
 router.use('/:divisionId', attachDivision());
 
 router.use('/:divisionId/rooms', divisionRoomsRouter);
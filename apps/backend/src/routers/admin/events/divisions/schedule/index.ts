@@ -1,5 +1,9 @@
 import express from 'express';
-import { SchedulerRequest } from '@lems/types/api/scheduler';
+import {
+  RepairScheduleRequest,
+  SchedulerRequest,
+  ValidationSweepRequest
+} from '@lems/types/api/scheduler';
 import db from '../../../../../lib/database';
 import { AdminDivisionRequest } from '../../../../../types/express';
 import { requirePermission } from '../../../middleware/require-permission';
@@ -18,6 +22,11 @@ if (!SCHEDULER_DOMAIN) throw new Error('SCHEDULER_URL is not configured');
 
 router.use('/agenda', agendaRouter);
 
+// The scheduler answers 404 for jobs of other divisions
+const jobUrl = (jobId: string, divisionId: string) =>
+  `${SCHEDULER_DOMAIN}/scheduler/jobs/${encodeURIComponent(jobId)}` +
+  `?division_id=${encodeURIComponent(divisionId)}`;
+
 router.post(
   '/validate',
   requirePermission('MANAGE_EVENT_DETAILS'),
@@ -51,6 +60,91 @@ router.post(
   })
 );
 
+router.post(
+  '/validate/sweep',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const sweep: ValidationSweepRequest = req.body;
+
+      if (!sweep?.base) {
+        res.status(400).json({ error: 'Base settings are required' });
+        return;
+      }
+
+      const response = await fetch(`${SCHEDULER_DOMAIN}/scheduler/validate/sweep`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ...sweep, base: { ...sweep.base, division_id: req.divisionId } })
+      });
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error sweeping schedule settings');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
+router.post(
+  '/preview',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const settings: SchedulerRequest = req.body;
+
+      if (!settings) {
+        res.status(400).json({ error: 'Settings are required' });
+        return;
+      }
+
+      const response = await fetch(`${SCHEDULER_DOMAIN}/scheduler/preview`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ...settings, division_id: req.divisionId })
+      });
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error previewing schedule');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
+router.post(
+  '/repair',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const repair: RepairScheduleRequest = { ...req.body, division_id: req.divisionId };
+
+      if (!repair.change) {
+        res.status(400).json({ error: 'Change is required' });
+        return;
+      }
+
+      const query = req.query.dryRun === 'true' ? '?dry_run=true' : '';
+      const response = await fetch(`${SCHEDULER_DOMAIN}/scheduler/repair${query}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(repair)
+      });
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error repairing schedule');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
 router.post(
   '/generate',
   requirePermission('MANAGE_EVENT_DETAILS'),
@@ -84,6 +178,99 @@ router.post(
   })
 );
 
+router.post(
+  '/generate/jobs',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const settings: SchedulerRequest = req.body;
+
+      if (!settings) {
+        res.status(400).json({ error: 'Settings are required' });
+        return;
+      }
+
+      const response = await fetch(`${SCHEDULER_DOMAIN}/scheduler/jobs`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ...settings, division_id: req.divisionId })
+      });
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error starting schedule job');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
+router.get(
+  '/generate/jobs/:jobId',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const { jobId } = req.params;
+      if (!jobId || typeof jobId !== 'string') {
+        res.status(400).json({ error: 'JOB_ID_REQUIRED' });
+        return;
+      }
+
+      const response = await fetch(jobUrl(jobId, req.divisionId));
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error fetching schedule job');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
+router.delete(
+  '/generate/jobs/:jobId',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const { jobId } = req.params;
+      if (!jobId || typeof jobId !== 'string') {
+        res.status(400).json({ error: 'JOB_ID_REQUIRED' });
+        return;
+      }
+
+      const response = await fetch(jobUrl(jobId, req.divisionId), { method: 'DELETE' });
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error cancelling schedule job');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
+router.get(
+  '/report',
+  requirePermission('MANAGE_EVENT_DETAILS'),
+  asHandler<AdminDivisionRequest>(async (req, res) => {
+    try {
+      const response = await fetch(
+        `${SCHEDULER_DOMAIN}/scheduler/report/${encodeURIComponent(req.divisionId)}`
+      );
+
+      const data = await response.json();
+      res.status(response.status).json(data);
+    } catch (error) {
+      console.log('❌ Error reporting on schedule');
+      console.debug(error);
+      res.status(500).json({ error: 'INTERNAL_SERVER_ERROR' });
+    }
+  })
+);
+
 router.delete(
   '/',
   requirePermission('MANAGE_EVENT_DETAILS'),
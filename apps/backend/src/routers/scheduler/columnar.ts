@@ -0,0 +1,100 @@
+import { promisify } from 'util';
+import zlib from 'zlib';
+import express, { Request, Response } from 'express';
+
+/**
+ * Compact encoding of the schedule tables exchanged with the scheduler.
+ * A table is sent as one list per column, and columns of repeated strings are sent as a
+ * dictionary of their distinct values with a list of codes (null for empty values):
+ *
+ *   { length: 2, columns: { number: [1, 2], team_id: { dictionary: ['a'], codes: [0, null] } } }
+ */
+export const COLUMNAR_CONTENT_TYPE = 'application/vnd.lems.columnar+json';
+
+type ColumnarValue = string | number | null;
+
+type ColumnarColumn = ColumnarValue[] | { dictionary: ColumnarValue[]; codes: (number | null)[] };
+
+export interface ColumnarTable {
+  length: number;
+  columns: Record<string, ColumnarColumn>;
+}
+
+// Responses smaller than this are not worth compressing
+const MIN_COMPRESSED_BYTES = 1024;
+
+const gzip = promisify(zlib.gzip);
+
+/**
+ * Parses columnar request bodies. They are sent gzipped, which the parser inflates.
+ * Registered apart from the global JSON parser, which does not accept the content type,
+ * so that whole schedules fit within its limit.
+ */
+export const parseColumnar = express.json({ type: COLUMNAR_CONTENT_TYPE, limit: '10mb' });
+
+export const isColumnarTable = (table: unknown): table is ColumnarTable =>
+  typeof table === 'object' &&
+  table !== null &&
+  typeof (table as ColumnarTable).length === 'number' &&
+  typeof (table as ColumnarTable).columns === 'object';
+
+export const decodeTable = (table: ColumnarTable): Record<string, ColumnarValue>[] => {
+  const columns = Object.entries(table.columns).map(([name, column]) => {
+    if (Array.isArray(column)) return [name, column] as const;
+    const values = column.codes.map(code => (code === null ? null : column.dictionary[code]));
+    return [name, values] as const;
+  });
+
+  return Array.from({ length: table.length }, (_, index) =>
+    Object.fromEntries(columns.map(([name, values]) => [name, values[index] ?? null]))
+  );
+};
+
+export const encodeTable = <T extends Record<string, ColumnarValue>>(
+  rows: T[],
+  columnNames: (keyof T & string)[],
+  dictionaryColumns: (keyof T & string)[] = []
+): ColumnarTable => {
+  const columns: Record<string, ColumnarColumn> = {};
+  for (const name of columnNames) {
+    const values = rows.map(row => row[name] ?? null);
+    if (!dictionaryColumns.includes(name)) {
+      columns[name] = values;
+      continue;
+    }
+
+    const codesByValue = new Map<ColumnarValue, number>();
+    const codes = values.map(value => {
+      if (value === null) return null;
+      if (!codesByValue.has(value)) codesByValue.set(value, codesByValue.size);
+      return codesByValue.get(value) as number;
+    });
+    columns[name] = { dictionary: [...codesByValue.keys()], codes };
+  }
+  return { length: rows.length, columns };
+};
+
+export const acceptsColumnar = (req: Request) =>
+  req.accepts(['application/json', COLUMNAR_CONTENT_TYPE]) === COLUMNAR_CONTENT_TYPE;
+
+/**
+ * Sends a JSON body, gzipped when the client accepts it and the body is large enough.
+ */
+export const sendJson = async (
+  req: Request,
+  res: Response,
+  body: unknown,
+  contentType = 'application/json'
+) => {
+  const json = Buffer.from(JSON.stringify(body));
+  res.vary('Accept-Encoding');
+  res.type(contentType);
+
+  if (json.length < MIN_COMPRESSED_BYTES || !req.acceptsEncodings('gzip')) {
+    res.send(json);
+    return;
+  }
+
+  res.set('Content-Encoding', 'gzip');
+  res.send(await gzip(json));
+};
@@ -4,24 +4,165 @@ import {
   InsertableRobotGameMatch,
   InsertableRobotGameMatchParticipant,
   Rubric,
-  JudgingCategory
+  JudgingCategory,
+  DivisionScheduleSettings
 } from '@lems/database';
 import { JUDGING_CATEGORIES } from '@lems/types/judging';
 import db from '../../../lib/database';
 import { attachDivision } from '../middleware/attach-division';
 import { SchedulerRequest } from '../../../types/express';
-import { asHandler } from '../../../types/express-handlers';
+import { asHandler, asMiddleware } from '../../../types/express-handlers';
+import {
+  COLUMNAR_CONTENT_TYPE,
+  acceptsColumnar,
+  decodeTable,
+  encodeTable,
+  isColumnarTable,
+  parseColumnar,
+  sendJson
+} from '../columnar';
 import { makeSchedulerLocationResponse, makeSchedulerTeamResponse } from './utils';
 
 const router = express.Router({ mergeParams: true });
 
 router.use(attachDivision());
 
+interface MatchRequest {
+  number: number;
+  stage: string;
+  round: number;
+  scheduled_time: string;
+  tables: Record<string, { team_id: string | null; team_number?: number }>;
+}
+
+const SCHEDULE_SETTINGS_FIELDS = [
+  'match_length',
+  'practice_cycle_time',
+  'ranking_cycle_time',
+  'judging_session_length',
+  'judging_session_cycle_time'
+];
+
+/**
+ * Validation error of optional schedule settings, or null if they are valid.
+ */
+const getScheduleSettingsError = (scheduleSettings: Record<string, unknown> | null | undefined) => {
+  if (scheduleSettings === undefined || scheduleSettings === null) return null;
+
+  for (const field of SCHEDULE_SETTINGS_FIELDS) {
+    if (!(field in scheduleSettings) || typeof scheduleSettings[field] !== 'number') {
+      return `Invalid schedule_settings: ${field} must be a number`;
+    }
+  }
+  return null;
+};
+
+const makeRubrics = (divisionId: string, teamIds: string[]): Rubric[] => {
+  const categories: JudgingCategory[] = ['innovation-project', 'robot-design', 'core-values'];
+  return teamIds.flatMap(teamId =>
+    categories.map(category => ({
+      divisionId,
+      teamId,
+      category,
+      status: 'empty' as const
+    }))
+  );
+};
+
+/**
+ * Rewrites columnar sessions and matches in the request body to the rows of the JSON
+ * requests. Matches are sent as one row per participant, grouped back by match number.
+ */
+const decodeColumnarSchedule = asMiddleware<SchedulerRequest>((req, res, next) => {
+  if (!req.is(COLUMNAR_CONTENT_TYPE)) return next();
+
+  const { sessions, matches } = req.body ?? {};
+  if (isColumnarTable(sessions)) {
+    req.body.sessions = decodeTable(sessions).map(session => ({
+      ...session,
+      division_id: req.divisionId
+    }));
+  }
+  if (isColumnarTable(matches)) {
+    const matchesByNumber = new Map<number, MatchRequest>();
+    for (const participant of decodeTable(matches)) {
+      const number = participant.number as number;
+      let match = matchesByNumber.get(number);
+      if (!match) {
+        match = {
+          number,
+          stage: participant.stage as string,
+          round: participant.round as number,
+          scheduled_time: participant.scheduled_time as string,
+          tables: {}
+        };
+        matchesByNumber.set(number, match);
+      }
+      match.tables[participant.table_id as string] = {
+        team_id: participant.team_id as string | null
+      };
+    }
+    req.body.matches = [...matchesByNumber.values()];
+  }
+  next();
+});
+
+const getSessionTeamIds = (sessions: Array<{ team_id?: string | null }>) => [
+  ...new Set(
+    sessions.map(s => s.team_id).filter((id): id is string => id !== null && id !== undefined)
+  )
+];
+
+const makeMatchesWithParticipants = (divisionId: string, matches: MatchRequest[]) =>
+  matches.map(match => ({
+    match: {
+      number: match.number,
+      round: match.round,
+      stage: match.stage.toUpperCase() as 'PRACTICE' | 'RANKING' | 'TEST',
+      scheduled_time: new Date(match.scheduled_time),
+      division_id: divisionId
+    } as InsertableRobotGameMatch,
+    participants: Object.entries(match.tables).map(([tableId, tableData]) => ({
+      team_id: tableData.team_id || null,
+      table_id: tableId
+    })) as InsertableRobotGameMatchParticipant[]
+  }));
+
+const makeTestMatch = (divisionId: string) => ({
+  match: {
+    number: 0,
+    round: 0,
+    stage: 'TEST' as 'PRACTICE' | 'RANKING' | 'TEST',
+    scheduled_time: new Date(),
+    division_id: divisionId
+  } as InsertableRobotGameMatch,
+  participants: [] as InsertableRobotGameMatchParticipant[]
+});
+
+const makeScoresheets = (
+  divisionId: string,
+  matchesWithParticipants: ReturnType<typeof makeMatchesWithParticipants>
+) =>
+  matchesWithParticipants.flatMap(({ match, participants }) =>
+    participants
+      .filter(participant => participant.team_id)
+      .map(participant => ({
+        divisionId,
+        teamId: participant.team_id as string,
+        stage: match.stage as 'PRACTICE' | 'RANKING',
+        round: match.round,
+        status: 'empty' as const,
+        escalated: false
+      }))
+  );
+
+router.use(parseColumnar, decodeColumnarSchedule);
+
 router.get(
   '/teams',
   asHandler<SchedulerRequest>(async (req, res) => {
     const teams = await db.teams.byDivisionId(req.divisionId).getAll();
-    res.status(200).json(teams.map(team => makeSchedulerTeamResponse(team)));
+    await sendJson(req, res, teams.map(team => makeSchedulerTeamResponse(team)));
   })
 );
 
@@ -61,7 +202,7 @@ router.get(
   '/tables',
   asHandler<SchedulerRequest>(async (req, res) => {
     const tables = await db.tables.byDivisionId(req.divisionId).getAll();
-    res.status(200).json(tables.map(table => makeSchedulerLocationResponse(table)));
+    await sendJson(req, res, tables.map(table => makeSchedulerLocationResponse(table)));
   })
 );
 
@@ -69,7 +210,7 @@ router.get(
   '/rooms',
   asHandler<SchedulerRequest>(async (req, res) => {
     const rooms = await db.rooms.byDivisionId(req.divisionId).getAll();
-    res.status(200).json(rooms.map(room => makeSchedulerLocationResponse(room)));
+    await sendJson(req, res, rooms.map(room => makeSchedulerLocationResponse(room)));
   })
 );
 
@@ -109,34 +250,12 @@ router.post(
     await db.finalDeliberations.create(division.id);
 
     // Create rubrics for each team in the division
-    const teamIds = [
-      ...new Set(sessions.map(s => s.team_id).filter((id): id is string => id !== null))
-    ];
-    const categories: JudgingCategory[] = ['innovation-project', 'robot-design', 'core-values'];
-
-    const rubrics: Rubric[] = teamIds.flatMap(teamId =>
-      categories.map(category => ({
-        divisionId: req.divisionId,
-        teamId,
-        category,
-        status: 'empty' as const
-      }))
-    );
-
-    await db.rubrics.createMany(rubrics);
+    await db.rubrics.createMany(makeRubrics(req.divisionId, getSessionTeamIds(sessions)));
 
     res.status(200).json({ ok: true });
   })
 );
 
-interface MatchRequest {
-  number: number;
-  stage: string;
-  round: number;
-  scheduled_time: string;
-  tables: Record<string, { team_id: string | null; team_number?: number }>;
-}
-
 router.post(
   '/matches',
   asHandler<SchedulerRequest>(async (req, res) => {
@@ -160,53 +279,14 @@ router.post(
     }
 
     try {
-      const matchesWithParticipants = matches.map(match => ({
-        match: {
-          number: match.number,
-          round: match.round,
-          stage: match.stage.toUpperCase() as 'PRACTICE' | 'RANKING' | 'TEST',
-          scheduled_time: new Date(match.scheduled_time),
-          division_id: req.divisionId
-        } as InsertableRobotGameMatch,
-        participants: Object.entries(match.tables).map(([tableId, tableData]) => ({
-          team_id: tableData.team_id || null,
-          table_id: tableId
-        })) as InsertableRobotGameMatchParticipant[]
-      }));
-
-      const testMatch = {
-        match: {
-          number: 0,
-          round: 0,
-          stage: 'TEST' as 'PRACTICE' | 'RANKING' | 'TEST',
-          scheduled_time: new Date(),
-          division_id: req.divisionId
-        } as InsertableRobotGameMatch,
-        participants: [] as InsertableRobotGameMatchParticipant[]
-      };
-
-      const allMatches = [testMatch, ...matchesWithParticipants];
+      const matchesWithParticipants = makeMatchesWithParticipants(req.divisionId, matches);
 
-      await db.robotGameMatches.createMany(allMatches);
-
-      const scoresheets = [];
-
-      for (const { match, participants } of matchesWithParticipants) {
-        for (const participant of participants) {
-          if (participant.team_id) {
-            scoresheets.push({
-              divisionId: req.divisionId,
-              teamId: participant.team_id,
-              stage: match.stage as 'PRACTICE' | 'RANKING',
-              round: match.round,
-              status: 'empty' as const,
-              escalated: false
-            });
-          }
-        }
-      }
+      await db.robotGameMatches.createMany([
+        makeTestMatch(req.divisionId),
+        ...matchesWithParticipants
+      ]);
 
-      await db.scoresheets.createMany(scoresheets);
+      await db.scoresheets.createMany(makeScoresheets(req.divisionId, matchesWithParticipants));
 
       res.status(200).json({ ok: true });
     } catch (error) {
@@ -222,23 +302,10 @@ router.put(
     try {
       const { schedule_settings } = req.body;
 
-      if (schedule_settings !== undefined && schedule_settings !== null) {
-        const requiredFields = [
-          'match_length',
-          'practice_cycle_time',
-          'ranking_cycle_time',
-          'judging_session_length',
-          'judging_session_cycle_time'
-        ];
-
-        for (const field of requiredFields) {
-          if (!(field in schedule_settings) || typeof schedule_settings[field] !== 'number') {
-            res.status(400).json({
-              error: `Invalid schedule_settings: ${field} must be a number`
-            });
-            return;
-          }
-        }
+      const settingsError = getScheduleSettingsError(schedule_settings);
+      if (settingsError) {
+        res.status(400).json({ error: settingsError });
+        return;
       }
 
       const updated = await db.divisions
@@ -258,6 +325,376 @@ router.put(
   })
 );
 
+interface SessionRequest {
+  number: number;
+  room_id: string;
+  team_id: string | null;
+  scheduled_time: string;
+}
+
+/**
+ * Saves a whole generated schedule in one request. Sessions, matches, deliberations and
+ * the schedule settings are written in one transaction, so a failure leaves no partial
+ * schedule behind. Rubrics and scoresheets live in MongoDB and are written last, inside
+ * the transaction, so their failure rolls back the rest.
+ */
+router.put(
+  '/schedule',
+  asHandler<SchedulerRequest>(async (req, res) => {
+    const {
+      sessions,
+      matches,
+      schedule_settings
+    }: {
+      sessions: SessionRequest[];
+      matches: MatchRequest[];
+      schedule_settings?: Record<string, unknown> | null;
+    } = req.body;
+
+    if (!Array.isArray(sessions) || !Array.isArray(matches)) {
+      res.status(400).json({ error: 'Sessions and matches are required' });
+      return;
+    }
+
+    const settingsError = getScheduleSettingsError(schedule_settings);
+    if (settingsError) {
+      res.status(400).json({ error: settingsError });
+      return;
+    }
+
+    const matchesWithParticipants = makeMatchesWithParticipants(req.divisionId, matches);
+    const rubrics = makeRubrics(req.divisionId, getSessionTeamIds(sessions));
+    const scoresheets = makeScoresheets(req.divisionId, matchesWithParticipants);
+
+    try {
+      const saved = await db.transaction(async trx => {
+        // Claimed first, so concurrent saves of the division wait here
+        const claimed = await trx.divisions
+          .byId(req.divisionId)
+          .claimSchedule((schedule_settings ?? null) as DivisionScheduleSettings | null);
+        if (!claimed) return false;
+
+        if (sessions.length > 0) {
+          await trx.judgingSessions.createMany(
+            sessions.map(session => ({
+              division_id: req.divisionId,
+              number: session.number,
+              room_id: session.room_id,
+              team_id: session.team_id,
+              scheduled_time: new Date(session.scheduled_time)
+            }))
+          );
+        }
+
+        for (const category of JUDGING_CATEGORIES) {
+          await trx.judgingDeliberations.create({ division_id: req.divisionId, category });
+        }
+        await trx.finalDeliberations.create(req.divisionId);
+
+        await trx.robotGameMatches.createMany([
+          makeTestMatch(req.divisionId),
+          ...matchesWithParticipants
+        ]);
+
+        try {
+          await db.rubrics.createMany(rubrics);
+          await db.scoresheets.createMany(scoresheets);
+        } catch (error) {
+          // The division had no schedule, so all of its documents are from this save
+          await Promise.all([
+            db.rubrics.byDivision(req.divisionId).deleteAll(),
+            db.scoresheets.byDivision(req.divisionId).deleteAll()
+          ]);
+          throw error;
+        }
+
+        return true;
+      });
+
+      if (!saved) {
+        res
+          .status(400)
+          .json({ error: 'Division already has a schedule. Delete the existing schedule first.' });
+        return;
+      }
+
+      res.status(200).json({ ok: true });
+    } catch (error) {
+      console.error('Error saving division schedule:', error);
+      res.status(500).json({ error: 'Failed to save division schedule' });
+    }
+  })
+);
+
+router.get(
+  '/schedule',
+  asHandler<SchedulerRequest>(async (req, res) => {
+    const division = await db.divisions.byId(req.divisionId).get();
+    if (!division) {
+      res.status(404).json({ error: 'Division not found' });
+      return;
+    }
+    if (!division.has_schedule) {
+      res.status(404).json({ error: 'Division does not have a schedule' });
+      return;
+    }
+
+    const [sessions, matches] = await Promise.all([
+      db.judgingSessions.byDivision(req.divisionId).getAll(),
+      db.robotGameMatches.byDivision(req.divisionId).getAll()
+    ]);
+
+    const scheduledMatches = matches.filter(match => match.stage !== 'TEST');
+
+    res.vary('Accept');
+    if (acceptsColumnar(req)) {
+      // Matches are sent as one row per participant, every scheduled match has its tables
+      const participants = scheduledMatches.flatMap(match =>
+        match.participants.map(participant => ({
+          number: match.number,
+          stage: match.stage.toLowerCase(),
+          round: match.round,
+          scheduled_time: match.scheduled_time.toISOString(),
+          table_id: participant.table_id,
+          team_id: participant.team_id
+        }))
+      );
+      const sessionRows = sessions.map(session => ({
+        number: session.number,
+        room_id: session.room_id,
+        team_id: session.team_id,
+        scheduled_time: session.scheduled_time.toISOString()
+      }));
+
+      await sendJson(
+        req,
+        res,
+        {
+          sessions: encodeTable(
+            sessionRows,
+            ['number', 'room_id', 'team_id', 'scheduled_time'],
+            ['room_id', 'team_id', 'scheduled_time']
+          ),
+          matches: encodeTable(
+            participants,
+            ['number', 'stage', 'round', 'scheduled_time', 'table_id', 'team_id'],
+            ['stage', 'scheduled_time', 'table_id', 'team_id']
+          ),
+          schedule_settings: division.schedule_settings
+        },
+        COLUMNAR_CONTENT_TYPE
+      );
+      return;
+    }
+
+    await sendJson(req, res, {
+      sessions: sessions.map(session => ({
+        number: session.number,
+        room_id: session.room_id,
+        team_id: session.team_id,
+        scheduled_time: session.scheduled_time
+      })),
+      matches: scheduledMatches.map(match => ({
+        number: match.number,
+        stage: match.stage.toLowerCase(),
+        round: match.round,
+        scheduled_time: match.scheduled_time,
+        tables: Object.fromEntries(
+          match.participants.map(participant => [participant.table_id, participant.team_id])
+        )
+      })),
+      schedule_settings: division.schedule_settings
+    });
+  })
+);
+
+interface SessionSlotChange {
+  number: number;
+  room_id: string;
+  previous_team_id: string | null;
+  team_id: string | null;
+  scheduled_time?: string;
+}
+
+interface MatchSlotChange {
+  number: number;
+  stage: string;
+  round: number;
+  table_id: string;
+  previous_team_id: string | null;
+  team_id: string | null;
+}
+
+/**
+ * Teams that are only in the new or only in the previous slots of a change set.
+ * Untouched slots keep their team, so this is the change to the whole group.
+ */
+const diffTeams = (
+  changes: Array<{ previous_team_id: string | null; team_id: string | null }>
+) => {
+  const isTeamId = (id: string | null): id is string => id !== null;
+  const previous = new Set(changes.map(change => change.previous_team_id).filter(isTeamId));
+  const next = new Set(changes.map(change => change.team_id).filter(isTeamId));
+  return {
+    added: [...next].filter(id => !previous.has(id)),
+    removed: [...previous].filter(id => !next.has(id))
+  };
+};
+
+/**
+ * A slot of a repair no longer holds the team the repair was computed from.
+ */
+class ScheduleConflictError extends Error {}
+
+/**
+ * Applies a schedule repair: only the changed slots are written. Every slot is only
+ * changed if it still holds its previous team, so a repair computed from an outdated
+ * schedule is rejected with a 409 instead of overwriting concurrent changes. The slots
+ * are written in one transaction. Rubrics and scoresheets of teams that entered a
+ * session or round are created inside it and deleted again if it fails. Those of teams
+ * that left are deleted once it is committed, as deleted documents could not be
+ * restored on a rollback.
+ */
+router.patch(
+  '/schedule',
+  asHandler<SchedulerRequest>(async (req, res) => {
+    const {
+      sessions = [],
+      matches = []
+    }: { sessions?: SessionSlotChange[]; matches?: MatchSlotChange[] } = req.body;
+
+    if (!Array.isArray(sessions) || !Array.isArray(matches)) {
+      res.status(400).json({ error: 'Sessions and matches must be arrays' });
+      return;
+    }
+
+    const division = await db.divisions.byId(req.divisionId).get();
+    if (!division) {
+      res.status(404).json({ error: 'Division not found' });
+      return;
+    }
+    if (!division.has_schedule) {
+      res.status(400).json({ error: 'Division does not have a schedule' });
+      return;
+    }
+
+    // A moved session has a change for each of its rooms, all with the new time
+    const sessionTimes = new Map<number, Date>();
+    for (const session of sessions) {
+      if (session.scheduled_time) {
+        sessionTimes.set(session.number, new Date(session.scheduled_time));
+      }
+    }
+
+    // Rubrics follow the judging sessions of a team, scoresheets the rounds it plays in
+    const rubricTeams = diffTeams(sessions);
+    const rounds = new Map<string, MatchSlotChange[]>();
+    for (const match of matches) {
+      const key = `${match.stage}-${match.round}`;
+      rounds.set(key, [...(rounds.get(key) ?? []), match]);
+    }
+    const roundTeams = [...rounds.values()].map(roundChanges => ({
+      stage: roundChanges[0].stage.toUpperCase() as 'PRACTICE' | 'RANKING',
+      round: roundChanges[0].round,
+      ...diffTeams(roundChanges)
+    }));
+
+    const deleteRubrics = (teamIds: string[]) =>
+      Promise.all(
+        teamIds.map(teamId => db.rubrics.byDivision(req.divisionId).byTeamId(teamId).deleteAll())
+      );
+    const deleteScoresheets = (teamsOf: (round: (typeof roundTeams)[number]) => string[]) =>
+      Promise.all(
+        roundTeams.flatMap(round =>
+          teamsOf(round).map(teamId =>
+            db.scoresheets
+              .byDivision(req.divisionId)
+              .byTeamId(teamId)
+              .byStage(round.stage)
+              .byRound(round.round)
+              .delete()
+          )
+        )
+      );
+
+    try {
+      await db.transaction(async trx => {
+        for (const [number, scheduledTime] of sessionTimes) {
+          const rooms = await trx.judgingSessions
+            .byDivision(req.divisionId)
+            .reschedule(number, scheduledTime);
+          if (rooms === 0) throw new ScheduleConflictError(`Session ${number} no longer exists`);
+        }
+
+        for (const session of sessions) {
+          const updated = await trx.judgingSessions
+            .byDivision(req.divisionId)
+            .updateSlot(session.number, session.room_id, session.previous_team_id, session.team_id);
+          if (!updated) {
+            throw new ScheduleConflictError(
+              `Session ${session.number} in room ${session.room_id} has changed since the repair`
+            );
+          }
+        }
+
+        for (const match of matches) {
+          const updated = await trx.robotGameMatches
+            .byDivision(req.divisionId)
+            .updateParticipant(match.number, match.table_id, match.previous_team_id, match.team_id);
+          if (!updated) {
+            throw new ScheduleConflictError(
+              `Match ${match.number} on table ${match.table_id} has changed since the repair`
+            );
+          }
+        }
+
+        try {
+          await db.rubrics.createMany(makeRubrics(req.divisionId, rubricTeams.added));
+          await db.scoresheets.createMany(
+            roundTeams.flatMap(({ stage, round, added }) =>
+              added.map(teamId => ({
+                divisionId: req.divisionId,
+                teamId,
+                stage,
+                round,
+                status: 'empty' as const,
+                escalated: false
+              }))
+            )
+          );
+        } catch (error) {
+          // The added teams had no documents for their new slots, so these are all new
+          await Promise.all([
+            deleteRubrics(rubricTeams.added),
+            deleteScoresheets(round => round.added)
+          ]);
+          throw error;
+        }
+      });
+    } catch (error) {
+      if (error instanceof ScheduleConflictError) {
+        res.status(409).json({ error: error.message });
+        return;
+      }
+      console.error('Error updating division schedule:', error);
+      res.status(500).json({ error: 'Failed to update division schedule' });
+      return;
+    }
+
+    try {
+      await Promise.all([
+        deleteRubrics(rubricTeams.removed),
+        deleteScoresheets(round => round.removed)
+      ]);
+    } catch (error) {
+      // The schedule is repaired, the documents are only left unused
+      console.error('Error deleting documents of teams removed from the schedule:', error);
+    }
+
+    res.status(200).json({ ok: true });
+  })
+);
+
 router.delete(
   '/schedule',
   asHandler<SchedulerRequest>(async (req, res) => {
@@ -0,0 +1,168 @@
+"""Regression benchmark for ValidatorService._cross_reference_match_slots.
+
+Builds synthetic validator data where every match is available to several
+overlapping sessions, checks the result against the original quadratic
+implementation on small events, and verifies that the time per match stays flat
+as events grow to thousands of matches.
+
+Usage: python benchmarks/cross_reference_benchmark.py
+"""
+
+import gc
+import copy
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.validator_service import ValidatorService  # noqa: E402
+
+SIZES = [500, 1000, 2000, 4000, 8000]
+# Allowed growth of the time per match between the smallest and largest event
+MAX_PER_MATCH_GROWTH = 3.0
+
+
+def make_data(match_count: int, seed: int = 0) -> list[dict]:
+    """Sessions with sliding windows of available matches, each match shared by
+    two to three sessions, with uneven slot counts."""
+
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, 8, 0)
+    matches = [
+        {
+            "event_type": "match",
+            "stage": "ranking",
+            "round": 1,
+            "number": number,
+            "slots": rng.randint(1, 4),
+            "start_time": start + timedelta(minutes=5 * number),
+            "end_time": start + timedelta(minutes=5 * (number + 1)),
+        }
+        for number in range(1, match_count + 1)
+    ]
+
+    data = []
+    window, step = 24, 10
+    for session_number, first in enumerate(range(0, match_count, step), start=1):
+        available = matches[first : first + rng.randint(step, window)]
+        data.append(
+            {
+                "session": {
+                    "event_type": "judging",
+                    "number": session_number,
+                    "slots": 6,
+                    "start_time": start,
+                    "end_time": start,
+                },
+                "overlapping_rounds": [
+                    {
+                        "stage": "ranking",
+                        "number": 1,
+                        "start_time": start,
+                        "end_time": start,
+                        "available_matches": available,
+                    }
+                ],
+            }
+        )
+    return data
+
+
+def reference_cross_reference_match_slots(data: list[dict]) -> list[dict]:
+    """The original O(n^2) implementation, kept to check that results match."""
+
+    match_numbers = []
+    for entry in data:
+        for overlapping_round in entry["overlapping_rounds"]:
+            for match in overlapping_round["available_matches"]:
+                match_numbers.append(match["number"])
+
+    duplicate_matches = {
+        match_number
+        for match_number in match_numbers
+        if match_numbers.count(match_number) > 1
+    }
+
+    for match_number in duplicate_matches:
+        sessions = []
+        for entry in data:
+            for overlapping_round in entry["overlapping_rounds"]:
+                for match in overlapping_round["available_matches"]:
+                    if match["number"] == match_number:
+                        sessions.append(
+                            {
+                                "session": entry["session"]["number"],
+                                "slots": sum(
+                                    match["slots"]
+                                    for match in overlapping_round["available_matches"]
+                                ),
+                            }
+                        )
+
+        min_slots = min(sessions, key=lambda x: x["slots"])["slots"]
+        first_min_session = next(
+            s["session"] for s in sessions if s["slots"] == min_slots
+        )
+
+        for entry in data:
+            for overlapping_round in entry["overlapping_rounds"]:
+                overlapping_round["available_matches"] = [
+                    match
+                    for match in overlapping_round["available_matches"]
+                    if match["number"] != match_number
+                    or entry["session"]["number"] == first_min_session
+                ]
+
+    return data
+
+
+def check_matches_reference():
+    for seed in range(20):
+        data = make_data(300, seed)
+        expected = reference_cross_reference_match_slots(copy.deepcopy(data))
+        actual = ValidatorService._cross_reference_match_slots(copy.deepcopy(data))
+        if actual != expected:
+            raise AssertionError(f"Result differs from the reference (seed {seed})")
+    print("Results match the reference implementation")
+
+
+def time_per_match(match_count: int, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        data = make_data(match_count)
+        # Like timeit, keep garbage collection pauses out of the measurement
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            ValidatorService._cross_reference_match_slots(data)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best / match_count
+
+
+def main() -> int:
+    check_matches_reference()
+
+    results = []
+    for match_count in SIZES:
+        per_match = time_per_match(match_count)
+        results.append(per_match)
+        print(
+            f"{match_count:>6} matches: {per_match * match_count * 1000:8.2f} ms "
+            f"({per_match * 1e6:.2f} us/match)"
+        )
+
+    growth = results[-1] / results[0]
+    print(f"Time per match grew {growth:.2f}x from {SIZES[0]} to {SIZES[-1]} matches")
+    if growth > MAX_PER_MATCH_GROWTH:
+        print("FAIL: cross referencing no longer scales linearly")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
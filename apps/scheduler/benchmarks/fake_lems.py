@@ -0,0 +1,202 @@
+"""In-memory stand-in for LemsRepository, backed by synthetic divisions.
+
+`make_snapshot` and `make_request` build a reproducible division and a matching
+SchedulerRequest from a handful of size parameters, so the scheduler and validator
+can run without a LEMS backend. `FakeLemsRepository` exposes the same async methods
+the routers use and keeps everything that would have been persisted in memory.
+"""
+
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import MIN_MINUTES_BETWEEN_EVENTS  # noqa: E402
+from models.lems import DivisionSnapshot, Location, Team  # noqa: E402
+from models.errors import ValidatorError  # noqa: E402
+from models.requests import Break, SchedulerRequest  # noqa: E402
+from services.validator_service import ValidatorService  # noqa: E402
+
+REGIONS = ["IL", "US", "DE", "PL"]
+EVENT_DAY = datetime(2026, 3, 1, 8, 0, tzinfo=timezone.utc)
+PADDING = timedelta(minutes=MIN_MINUTES_BETWEEN_EVENTS)
+# Minimum length of a match round, in judging sessions including their padding
+MIN_ROUND_LENGTHS = range(2, 9)
+
+
+@dataclass(frozen=True)
+class DivisionConfig:
+    """Size and timing parameters of a synthetic division."""
+
+    teams: int
+    tables: int
+    rooms: int
+    ranking_rounds: int
+    practice_rounds: int = 1
+    stagger_matches: bool = True
+    match_breaks: int = 1
+    judging_breaks: int = 1
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.teams}t-{self.tables}tb-{self.rooms}r-"
+            f"{self.practice_rounds}p{self.ranking_rounds}r"
+            f"{'-stagger' if self.stagger_matches else ''}"
+        )
+
+
+def make_snapshot(config: DivisionConfig) -> DivisionSnapshot:
+    """Teams with unique numbers spread over a few regions, plus rooms and tables."""
+    rng = random.Random(config.seed)
+    numbers = rng.sample(range(1, 100000), config.teams)
+
+    teams = []
+    for index, number in enumerate(numbers):
+        region = REGIONS[index % len(REGIONS)]
+        teams.append(Team(f"team-{index}", number, region, f"{region}-{number}"))
+
+    rooms = [Location(f"room-{i}", f"Room {i + 1}") for i in range(config.rooms)]
+    tables = [Location(f"table-{i}", f"Table {i + 1}") for i in range(config.tables)]
+    return DivisionSnapshot(teams=teams, rooms=rooms, tables=tables)
+
+
+def _spread_breaks(
+    event_type: str, count: int, total: int, duration: timedelta
+) -> list[Break]:
+    """`count` breaks evenly spaced over `total` sessions or matches."""
+    return [
+        Break(
+            event_type=event_type,
+            after=total * (i + 1) // (count + 1),
+            duration_seconds=int(duration.total_seconds()),
+        )
+        for i in range(count)
+        if total * (i + 1) // (count + 1) > 0
+    ]
+
+
+def _make_request(config: DivisionConfig, min_round_length: int) -> SchedulerRequest:
+    slots = -(-config.tables // 2) if config.stagger_matches else config.tables
+    matches_per_round = -(-config.teams // slots)
+    total_matches = matches_per_round * (config.practice_rounds + config.ranking_rounds)
+    judging_sessions = -(-config.teams // config.rooms)
+
+    judging_length = timedelta(minutes=30)
+    judging_cycle = timedelta(minutes=40)
+    break_length = timedelta(minutes=30)
+
+    # Rounds with only a few matches are stretched, otherwise a judging session can
+    # cover a whole round and leave its teams without a match to play
+    match_cycle = timedelta(minutes=8 if config.stagger_matches else 10)
+    round_length = min_round_length * (judging_length + 2 * PADDING)
+    match_cycle = max(match_cycle, round_length / matches_per_round)
+    match_cycle = timedelta(minutes=-(-match_cycle.total_seconds() // 60))
+
+    # Stretch judging over the length of the matches, so teams can fit both
+    match_span = match_cycle * total_matches
+    judging_cycle = max(judging_cycle, match_span / max(judging_sessions, 1))
+    judging_cycle = timedelta(seconds=int(judging_cycle.total_seconds()) // 60 * 60)
+
+    return SchedulerRequest(
+        division_id=f"division-{config.name}",
+        matches_start=EVENT_DAY,
+        practice_rounds=config.practice_rounds,
+        ranking_rounds=config.ranking_rounds,
+        match_length_seconds=150,
+        practice_match_cycle_time_seconds=int(match_cycle.total_seconds()),
+        ranking_match_cycle_time_seconds=int(match_cycle.total_seconds()),
+        stagger_matches=config.stagger_matches,
+        judging_start=EVENT_DAY,
+        judging_session_length_seconds=int(judging_length.total_seconds()),
+        judging_cycle_time_seconds=int(judging_cycle.total_seconds()),
+        breaks=_spread_breaks("match", config.match_breaks, total_matches, break_length)
+        + _spread_breaks(
+            "judging", config.judging_breaks, judging_sessions, break_length
+        ),
+    )
+
+
+def make_request(config: DivisionConfig) -> SchedulerRequest:
+    """A request whose judging and matches span roughly the same time, so the
+    schedule passes validation. Divisions with few matches per round get longer
+    rounds until every judging session has matches left for its teams."""
+    snapshot = make_snapshot(config)
+    for min_round_length in MIN_ROUND_LENGTHS:
+        request = _make_request(config, min_round_length)
+        try:
+            ValidatorService(snapshot, request).validate()
+            return request
+        except ValidatorError:
+            continue
+
+    raise ValueError(f"Could not find a valid schedule layout for {config.name}")
+
+
+@dataclass
+class FakeLemsRepository:
+    """Drop-in for LemsRepository that serves a synthetic division snapshot and
+    records the persisted schedule instead of sending it to the backend."""
+
+    division_id: str
+    snapshot: DivisionSnapshot
+    session_schedule: pd.DataFrame | None = None
+    match_schedule: pd.DataFrame | None = None
+    schedule_settings: dict | None = None
+    calls: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_config(cls, config: DivisionConfig) -> "FakeLemsRepository":
+        request = make_request(config)
+        return cls(request.division_id, make_snapshot(config))
+
+    async def get_snapshot(self, max_age: float = 0) -> DivisionSnapshot:
+        self.calls.append("get_snapshot")
+        return self.snapshot
+
+    async def get_teams(self) -> list[Team]:
+        self.calls.append("get_teams")
+        return list(self.snapshot.teams)
+
+    async def get_rooms(self) -> list[Location]:
+        self.calls.append("get_rooms")
+        return list(self.snapshot.rooms)
+
+    async def get_tables(self) -> list[Location]:
+        self.calls.append("get_tables")
+        return list(self.snapshot.tables)
+
+    async def insert_sessions(self, session_schedule: pd.DataFrame):
+        self.calls.append("insert_sessions")
+        self.session_schedule = session_schedule
+
+    async def insert_matches(self, match_schedule: pd.DataFrame):
+        self.calls.append("insert_matches")
+        self.match_schedule = match_schedule
+
+    async def mark_schedule_complete(self, schedule_settings: dict = None):
+        self.calls.append("mark_schedule_complete")
+        self.schedule_settings = schedule_settings
+
+    async def save_schedule(
+        self,
+        match_schedule: pd.DataFrame,
+        session_schedule: pd.DataFrame,
+        schedule_settings: dict,
+    ):
+        self.calls.append("save_schedule")
+        self.session_schedule = session_schedule
+        self.match_schedule = match_schedule
+        self.schedule_settings = schedule_settings
+
+    async def delete_schedule(self):
+        self.calls.append("delete_schedule")
+        self.session_schedule = None
+        self.match_schedule = None
+        self.schedule_settings = None
@@ -0,0 +1,253 @@
+"""Scaling benchmark for the schedule generation phases.
+
+Runs SchedulerService on synthetic divisions served by the in-memory LEMS
+stand-in, from small events to 300 teams, and reports the time spent in each
+phase and the peak memory of the whole generation. Results can be saved as JSON
+and compared against a previous run to catch scaling regressions between
+releases.
+
+Usage:
+    python benchmarks/scheduler_benchmark.py
+    python benchmarks/scheduler_benchmark.py --random 20 --seed 3
+    python benchmarks/scheduler_benchmark.py --output results.json
+    python benchmarks/scheduler_benchmark.py --baseline results.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import asdict
+
+from fake_lems import DivisionConfig, FakeLemsRepository, make_request
+
+from models.errors import SchedulerError
+from services.scheduler_service import SchedulerService
+
+PHASES = [
+    "_make_sessions",
+    "_make_matches",
+    "_use_constraints",
+    "_populate_match_schedule",
+    "_ensure_constraints",
+    "_analyze_schedule",
+]
+
+CASES = [
+    DivisionConfig(teams=20, tables=4, rooms=4, ranking_rounds=1),
+    DivisionConfig(teams=40, tables=8, rooms=6, ranking_rounds=3),
+    DivisionConfig(teams=60, tables=8, rooms=6, ranking_rounds=3, match_breaks=2),
+    DivisionConfig(teams=80, tables=10, rooms=8, ranking_rounds=3),
+    DivisionConfig(teams=100, tables=12, rooms=8, ranking_rounds=4),
+    DivisionConfig(
+        teams=100, tables=8, rooms=10, ranking_rounds=3, stagger_matches=False
+    ),
+    DivisionConfig(
+        teams=150, tables=12, rooms=10, ranking_rounds=4, judging_breaks=2
+    ),
+    DivisionConfig(teams=200, tables=16, rooms=12, ranking_rounds=5),
+    DivisionConfig(teams=250, tables=16, rooms=12, ranking_rounds=5, match_breaks=3),
+    DivisionConfig(
+        teams=300, tables=16, rooms=12, ranking_rounds=5, judging_breaks=3
+    ),
+]
+
+# Phases faster than this are too noisy to compare against a baseline
+MIN_COMPARED_SECONDS = 0.005
+
+
+def random_cases(count: int, seed: int) -> list[DivisionConfig]:
+    """Sample divisions within the supported ranges, skipping layouts that cannot
+    be scheduled at all."""
+    rng = random.Random(seed)
+    cases = []
+    while len(cases) < count:
+        config = DivisionConfig(
+            teams=rng.randint(20, 300),
+            tables=rng.randint(4, 16),
+            rooms=rng.randint(4, 12),
+            ranking_rounds=rng.randint(1, 5),
+            practice_rounds=rng.randint(0, 1),
+            stagger_matches=rng.random() < 0.7,
+            match_breaks=rng.randint(0, 3),
+            judging_breaks=rng.randint(0, 3),
+            seed=rng.randrange(1 << 16),
+        )
+        try:
+            make_request(config)
+        except ValueError:
+            continue
+        cases.append(config)
+    return cases
+
+
+def time_phases(service: SchedulerService) -> dict[str, float]:
+    """Wrap the phase methods of a single service instance with timers."""
+    durations: dict[str, float] = defaultdict(float)
+
+    def timed(name: str):
+        method = getattr(service, name)
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                durations[name] += time.perf_counter() - start
+
+        return wrapper
+
+    for name in PHASES:
+        setattr(service, name, timed(name))
+    return durations
+
+
+def run_once(config: DivisionConfig) -> dict[str, float]:
+    repository = FakeLemsRepository.from_config(config)
+    snapshot = asyncio.run(repository.get_snapshot())
+    request = make_request(config)
+
+    gc.collect()
+    start = time.perf_counter()
+    service = SchedulerService(snapshot, request, seed=config.seed)
+    timings = {"validate": time.perf_counter() - start}
+
+    durations = time_phases(service)
+    start = time.perf_counter()
+    service.create_schedule()
+    total = time.perf_counter() - start
+
+    timings.update({name: durations[name] for name in PHASES})
+    timings["total"] = timings["validate"] + total
+    return timings
+
+
+def peak_memory(config: DivisionConfig) -> int:
+    """Peak traced allocation in bytes while validating and generating a schedule.
+    Measured in a separate run, since tracing slows the phases down."""
+    snapshot = asyncio.run(FakeLemsRepository.from_config(config).get_snapshot())
+    request = make_request(config)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        SchedulerService(snapshot, request, seed=config.seed).create_schedule()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark(config: DivisionConfig, repeat: int) -> dict:
+    try:
+        runs = [run_once(config) for _ in range(repeat)]
+    except SchedulerError as error:
+        # Passing validation does not guarantee the greedy population succeeds
+        return {"name": config.name, "config": asdict(config), "error": str(error)}
+
+    return {
+        "name": config.name,
+        "config": asdict(config),
+        "seconds": {
+            phase: statistics.median(run[phase] for run in runs) for phase in runs[0]
+        },
+        "peak_memory_bytes": peak_memory(config),
+    }
+
+
+def print_results(results: list[dict]):
+    columns = ["validate", *PHASES, "total"]
+    header = f"{'division':<32}" + "".join(
+        f"{column.strip('_')[:12]:>13}" for column in columns
+    )
+    print(header + f"{'peak MiB':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['name']:<32} failed: {result['error']}")
+            continue
+        row = f"{result['name']:<32}" + "".join(
+            f"{result['seconds'][column] * 1000:>11.1f}ms" for column in columns
+        )
+        print(row + f"{result['peak_memory_bytes'] / 2**20:>10.1f}")
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Phases and peak memory that grew by more than `tolerance` times."""
+    previous = {result["name"]: result for result in baseline}
+    regressions = []
+
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        if "error" in result:
+            if "error" not in before:
+                regressions.append(f"{result['name']} failed: {result['error']}")
+            continue
+        if "error" in before:
+            continue
+
+        for phase, seconds in result["seconds"].items():
+            old = before["seconds"].get(phase)
+            if old is None or max(old, seconds) < MIN_COMPARED_SECONDS:
+                continue
+            if seconds > old * tolerance:
+                regressions.append(
+                    f"{result['name']} {phase}: {old * 1000:.1f}ms -> "
+                    f"{seconds * 1000:.1f}ms"
+                )
+
+        old_memory = before.get("peak_memory_bytes")
+        if old_memory and result["peak_memory_bytes"] > old_memory * tolerance:
+            regressions.append(
+                f"{result['name']} peak memory: {old_memory / 2**20:.1f}MiB -> "
+                f"{result['peak_memory_bytes'] / 2**20:.1f}MiB"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--random", type=int, default=0, help="benchmark random divisions instead"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for --random")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per division")
+    parser.add_argument("--output", help="write the results to a JSON file")
+    parser.add_argument("--baseline", help="compare with a previous JSON result")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="allowed growth against the baseline before failing",
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    cases = random_cases(args.random, args.seed) if args.random else CASES
+    results = [benchmark(config, args.repeat) for config in cases]
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Cold start benchmark for the scheduler service.
+
+Measures, each in a fresh interpreter so nothing is already imported:
+- importing the app, what every server process pays before it takes requests
+- the first schedule generated by a worker process, with and without the warm-up
+  the worker pool runs in its initializer
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+from fake_lems import DivisionConfig, make_request, make_snapshot
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+IMPORT_APP = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+# The division is passed in as JSON, so the child only imports what the worker
+# pool would
+FIRST_SCHEDULE = """
+import json, logging, sys, time
+logging.disable(logging.CRITICAL)
+from models.lems import DivisionSnapshot, Location, Team
+from models.requests import SchedulerRequest
+
+division = json.loads(sys.stdin.read())
+snapshot = DivisionSnapshot(
+    teams=[Team(**team) for team in division["snapshot"]["teams"]],
+    rooms=[Location(**room) for room in division["snapshot"]["rooms"]],
+    tables=[Location(**table) for table in division["snapshot"]["tables"]],
+)
+request = SchedulerRequest.model_validate(division["request"])
+
+start = time.perf_counter()
+if {warm!r}:
+    from services.warm_up import warm_up
+
+    warm_up()
+warm_up_time = time.perf_counter() - start
+
+start = time.perf_counter()
+from services.scheduler_service import SchedulerService
+
+SchedulerService(snapshot, request, seed=0).create_schedule()
+print(json.dumps([warm_up_time, time.perf_counter() - start]))
+"""
+
+
+def run(code: str, stdin: str = "") -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SRC,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [float(run(IMPORT_APP)) for _ in range(args.runs)]
+    print(f"{'import main':<34} {statistics.median(imports) * 1000:8.1f} ms")
+
+    config = DivisionConfig(teams=40, tables=8, rooms=6, ranking_rounds=3)
+    snapshot = asdict(make_snapshot(config))
+
+    print(f"\n{'first schedule':<22} {'warm-up':>11} {'schedule':>11}")
+    for assignment in ("greedy", "optimal"):
+        request = make_request(config).model_copy(
+            update={"match_assignment": assignment}
+        )
+        division = json.dumps(
+            {"snapshot": snapshot, "request": request.model_dump(mode="json")}
+        )
+        for warm in (False, True):
+            code = FIRST_SCHEDULE.format(warm=warm)
+            results = [json.loads(run(code, division)) for _ in range(args.runs)]
+            warm_up_time = statistics.median(result[0] for result in results)
+            schedule_time = statistics.median(result[1] for result in results)
+            label = f"{assignment}, {'warm' if warm else 'cold'}"
+            print(
+                f"{label:<22} {warm_up_time * 1000:8.1f} ms "
+                f"{schedule_time * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
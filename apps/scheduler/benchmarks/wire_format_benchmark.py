@@ -0,0 +1,261 @@
+"""Wire format benchmark for the requests between the scheduler and the backend.
+
+Runs the real LemsRepository against an in-process stand-in of the backend scheduler
+routes, which speaks both formats, and compares JSON rows with gzipped columnar
+payloads on:
+- saving a generated schedule, PUT /schedule
+- fetching it back for repairs, GET /schedule
+- fetching the division snapshot, GET /teams, /rooms and /tables
+
+Sizes are the bytes on the wire. Latencies include encoding and decoding on both
+ends and the time the bytes take over a link of --mbps, simulated by the stand-in. The stand-in
+checks that both formats store and return the same schedule.
+
+Usage:
+    python benchmarks/wire_format_benchmark.py
+    python benchmarks/wire_format_benchmark.py --mbps 20 --repeat 10
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import statistics
+import time
+
+import httpx
+from fake_lems import DivisionConfig, make_request, make_snapshot
+
+os.environ.setdefault("SCHEDULER_JWT_SECRET", "wire-format-benchmark-signing-secret")
+
+from repository.columnar import COLUMNAR_CONTENT_TYPE, encode_table  # noqa: E402
+from repository.lems_repository import LemsRepository  # noqa: E402
+from services.scheduler_service import SchedulerService  # noqa: E402
+
+CASES = [
+    DivisionConfig(teams=40, tables=8, rooms=6, ranking_rounds=3),
+    DivisionConfig(teams=100, tables=12, rooms=8, ranking_rounds=4),
+    DivisionConfig(teams=200, tables=16, rooms=12, ranking_rounds=5),
+    DivisionConfig(teams=300, tables=20, rooms=16, ranking_rounds=5),
+]
+
+# Label, wire format and whether responses may be gzipped. Plain JSON is how the
+# scheduler talked to the backend before either was supported
+FORMATS = [
+    ("json", "json", False),
+    ("json+gzip", "json", True),
+    ("columnar", "columnar", True),
+]
+
+
+class StandInBackend:
+    """Serves one division like the backend scheduler routes, in either format."""
+
+    def __init__(self, snapshot, mbps: float):
+        self.snapshot = snapshot
+        self.mbps = mbps
+        self.schedule: dict | None = None
+        self.wire_bytes: dict[str, int] = {}
+
+    async def _transfer(self, request: httpx.Request, endpoint: str, body: bytes):
+        key = f"{request.method} {endpoint}"
+        self.wire_bytes[key] = self.wire_bytes.get(key, 0) + len(body)
+        if self.mbps:
+            await asyncio.sleep(len(body) * 8 / (self.mbps * 1_000_000))
+
+    async def _respond(
+        self, request: httpx.Request, endpoint: str, data, content_type: str
+    ) -> httpx.Response:
+        body = json.dumps(data).encode()
+        headers = {"Content-Type": content_type}
+        if "gzip" in request.headers.get("Accept-Encoding", "") and len(body) >= 1024:
+            # The default level of the backend's zlib
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        await self._transfer(request, endpoint, body)
+        return httpx.Response(200, content=body, headers=headers)
+
+    def _save(self, data: dict, is_columnar: bool):
+        if is_columnar:
+            self.schedule = LemsRepository._decode_schedule(data)
+        else:
+            self.schedule = {
+                "sessions": [
+                    {
+                        key: value
+                        for key, value in session.items()
+                        if key != "division_id"
+                    }
+                    for session in data["sessions"]
+                ],
+                "matches": [
+                    {
+                        **match,
+                        "tables": {
+                            table_id: table["team_id"]
+                            for table_id, table in match["tables"].items()
+                        },
+                    }
+                    for match in data["matches"]
+                ],
+            }
+        self.schedule["schedule_settings"] = data["schedule_settings"]
+
+    def _encode_schedule(self) -> dict:
+        sessions = self.schedule["sessions"]
+        participants = [
+            {**match, "table_id": table_id, "team_id": team_id}
+            for match in self.schedule["matches"]
+            for table_id, team_id in match["tables"].items()
+        ]
+        return {
+            "sessions": encode_table(
+                {
+                    name: [session[name] for session in sessions]
+                    for name in ("number", "room_id", "team_id", "scheduled_time")
+                },
+                ["room_id", "team_id", "scheduled_time"],
+            ),
+            "matches": encode_table(
+                {
+                    name: [participant[name] for participant in participants]
+                    for name in (
+                        "number",
+                        "stage",
+                        "round",
+                        "scheduled_time",
+                        "table_id",
+                        "team_id",
+                    )
+                },
+                ["stage", "scheduled_time", "table_id", "team_id"],
+            ),
+            "schedule_settings": self.schedule["schedule_settings"],
+        }
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = "/" + request.url.path.rsplit("/", 1)[-1]
+        body = await request.aread()
+
+        if request.method == "PUT" and endpoint == "/schedule":
+            await self._transfer(request, endpoint, body)
+            if request.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            is_columnar = request.headers["Content-Type"] == COLUMNAR_CONTENT_TYPE
+            self._save(json.loads(body), is_columnar)
+            return httpx.Response(200, json={"ok": True})
+
+        if endpoint == "/schedule":
+            if COLUMNAR_CONTENT_TYPE in request.headers.get("Accept", ""):
+                return await self._respond(
+                    request, endpoint, self._encode_schedule(), COLUMNAR_CONTENT_TYPE
+                )
+            return await self._respond(
+                request, endpoint, self.schedule, "application/json"
+            )
+
+        if endpoint == "/teams":
+            data = [
+                {"id": t.id, "number": t.number, "region": t.region, "slug": t.slug}
+                for t in self.snapshot.teams
+            ]
+        else:
+            locations = getattr(self.snapshot, endpoint[1:])
+            data = [{"id": loc.id, "name": loc.name} for loc in locations]
+        return await self._respond(request, endpoint, data, "application/json")
+
+
+def make_repository(
+    backend: StandInBackend, division_id: str, wire_format: str, accept_gzip: bool
+) -> LemsRepository:
+    repo = LemsRepository(division_id, wire_format=wire_format)
+    repo.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(backend.handle),
+        headers=None if accept_gzip else {"Accept-Encoding": "identity"},
+    )
+    return repo
+
+
+async def measure(config: DivisionConfig, mbps: float, repeat: int) -> dict:
+    snapshot = make_snapshot(config)
+    request = make_request(config)
+    match_schedule, session_schedule = SchedulerService(
+        snapshot, request, seed=0
+    ).create_schedule()
+
+    results = {}
+    stored = {}
+    for label, wire_format, accept_gzip in FORMATS:
+        timings = {"snapshot": [], "save": [], "fetch": []}
+        for _ in range(repeat):
+            backend = StandInBackend(snapshot, mbps)
+            repo = make_repository(
+                backend, request.division_id, wire_format, accept_gzip
+            )
+
+            start = time.perf_counter()
+            await repo.get_snapshot()
+            timings["snapshot"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await repo.save_schedule(
+                match_schedule, session_schedule, request.schedule_settings()
+            )
+            timings["save"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            schedule = await repo.get_schedule()
+            timings["fetch"].append(time.perf_counter() - start)
+            await repo.client.aclose()
+
+        stored[label] = (backend.schedule, schedule)
+        results[label] = {
+            "bytes": {
+                "snapshot": sum(
+                    backend.wire_bytes[f"GET {endpoint}"]
+                    for endpoint in ("/teams", "/rooms", "/tables")
+                ),
+                "save": backend.wire_bytes["PUT /schedule"],
+                "fetch": backend.wire_bytes["GET /schedule"],
+            },
+            "ms": {
+                phase: statistics.median(values) * 1000
+                for phase, values in timings.items()
+            },
+        }
+
+    if any(schedules != stored["json"] for schedules in stored.values()):
+        raise AssertionError(f"{config.name}: formats stored different schedules")
+    return results
+
+
+def print_results(config: DivisionConfig, results: dict):
+    print(f"\n{config.name}")
+    print(
+        f"{'':<10}" + "".join(f"{phase:>22}" for phase in ("snapshot", "save", "fetch"))
+    )
+    for label, result in results.items():
+        print(
+            f"{label:<10}"
+            + "".join(
+                f"{result['bytes'][phase]:>11,} B {result['ms'][phase]:>6.1f} ms"
+                for phase in ("snapshot", "save", "fetch")
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mbps", type=float, default=100, help="0 for no link")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    for config in CASES:
+        print_results(config, asyncio.run(measure(config, args.mbps, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
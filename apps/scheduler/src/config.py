@@ -1,5 +1,75 @@
+import os
+import tempfile
+from typing import get_args
+
+from models.scheduler import MatchAssignment
+
+
+def _get_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    """Read a setting that must be one of `choices`, so a typo fails at startup
+    instead of silently falling back to another mode."""
+    value = os.getenv(name, default)
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, not {value!r}")
+    return value
+
+
 MIN_MINUTES_BETWEEN_EVENTS = 15
 
 TABLE_DIVERSITY_WEIGHT = 0.7
 WAIT_TIME_POOL_SIZE = 3
 RANDOM_SEED = None
+
+# How teams are placed on the tables of a match: "greedy" picks per table from the
+# longest waiting teams, "optimal" solves each match as a min-cost assignment
+MATCH_ASSIGNMENT: MatchAssignment = _get_choice(
+    "SCHEDULER_MATCH_ASSIGNMENT", "greedy", get_args(MatchAssignment)
+)
+
+# Events of a team closer than this, from the end of one to the start of the next,
+# are reported as back to back
+BACK_TO_BACK_GAP_SECONDS = MIN_MINUTES_BETWEEN_EVENTS * 60
+
+# Width of the bins of the gap histogram in schedule reports
+GAP_HISTOGRAM_BIN_SECONDS = 15 * 60
+
+# How long a division snapshot may be reused without revalidating it with the backend
+SNAPSHOT_CACHE_TTL_SECONDS = 30
+
+# Successful validations kept for the generation requests that follow them
+VALIDATION_CACHE_SIZE = 128
+VALIDATION_CACHE_TTL_SECONDS = 10 * 60
+
+# Largest number of configurations a single validation sweep may evaluate
+MAX_SWEEP_CONFIGURATIONS = 2000
+
+# Outbound requests to the LEMS backend
+HTTP_TIMEOUT_SECONDS = 60
+HTTP_MAX_CONNECTIONS = 20
+
+# How schedules are sent to and fetched from the backend: "json" rows, or "columnar"
+# gzipped dictionary encoded columns, see repository/columnar.py
+WIRE_FORMAT = _get_choice("SCHEDULER_WIRE_FORMAT", "json", ("json", "columnar"))
+
+# Number of processes generating schedules, defaults to the number of CPUs
+WORKER_POOL_SIZE = int(os.getenv("SCHEDULER_WORKER_POOL_SIZE", "0")) or None
+
+# Number of seeded schedule attempts run in parallel, the best one is kept
+SCHEDULE_ATTEMPTS = int(os.getenv("SCHEDULER_ATTEMPTS", "1"))
+MAX_SCHEDULE_ATTEMPTS = 32
+
+# How long finished background schedule jobs can still be queried
+JOB_RETENTION_SECONDS = 60 * 60
+
+IS_PRODUCTION = os.getenv("PYTHON_ENV") == "production"
+
+# Start the worker pool at startup and run a tiny schedule in every worker, so the
+# first requests don't pay for process startup and imports. On in production
+WARM_UP_WORKERS = os.getenv(
+    "SCHEDULER_WARM_UP", "true" if IS_PRODUCTION else "false"
+).lower() in ("1", "true")
+
+# Where cProfile dumps of profiled requests are written, outside production only
+PROFILE_DIR = os.getenv(
+    "SCHEDULER_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "lems-scheduler")
+)
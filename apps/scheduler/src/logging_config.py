@@ -0,0 +1,23 @@
+import logging
+
+
+def configure_logging():
+    """Configure the scheduler logger. Safe to call more than once, e.g. from worker
+    processes that did not inherit the configuration of the main process."""
+
+    logger = logging.getLogger("lems.scheduler")
+    if logger.handlers:
+        return
+
+    logger.setLevel(logging.DEBUG)
+
+    console_handler = logging.StreamHandler()
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+    logging.getLogger("pymongo").setLevel(logging.WARNING)
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+    logging.getLogger("uvicorn.error").setLevel(logging.WARNING)
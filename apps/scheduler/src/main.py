@@ -1,33 +1,68 @@
+import asyncio
 import logging
 import os
+import time
 
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
-from routers import scheduler
+from fastapi import FastAPI, Request
 from dotenv import load_dotenv
 
-logger = logging.getLogger("lems.scheduler")
-logger.setLevel(logging.DEBUG)
-
-console_handler = logging.StreamHandler()
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-logging.getLogger("pymongo").setLevel(logging.WARNING)
-logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-logging.getLogger("uvicorn.error").setLevel(logging.WARNING)
-
-is_production = os.getenv("PYTHON_ENV") == "production"
-if not is_production:
-    project_root = Path(__file__).parent.parent
-    env_path = project_root / ".env.local"
-    logger.info(f"Loading .env file: {env_path}")
+# config reads the environment when it is imported, so .env.local has to be loaded
+# before it, and before every module that imports it
+env_path = Path(__file__).parent.parent / ".env.local"
+if os.getenv("PYTHON_ENV") != "production":
     load_dotenv(dotenv_path=env_path)
 
+from config import IS_PRODUCTION, WARM_UP_WORKERS  # noqa: E402
+from logging_config import configure_logging  # noqa: E402
+from metrics import REQUEST_DURATION  # noqa: E402
+from routers import scheduler, monitoring  # noqa: E402
+from repository.http_client import close_http_client  # noqa: E402
+from services.worker_pool import shutdown_executor, warm_up_executor  # noqa: E402
+from services.job_service import job_service  # noqa: E402
+
+configure_logging()
+logger = logging.getLogger("lems.scheduler")
+
+if not IS_PRODUCTION:
+    logger.info(f"Loaded .env file: {env_path}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background, /health reports when the workers are ready
+    warm_up = asyncio.create_task(warm_up_executor()) if WARM_UP_WORKERS else None
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    job_service.shutdown()
+    await close_http_client()
+    shutdown_executor()
+
 
 logger.debug("Starting the app")
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(scheduler.router)
+app.include_router(monitoring.router)
+
+
+@app.middleware("http")
+async def observe_request_duration(request: Request, call_next):
+    start = time.perf_counter()
+    # Unhandled errors are answered with a 500 by the server error middleware
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by the route template, so ids in the path do not create new series
+        route = request.scope.get("route")
+        REQUEST_DURATION.labels(
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status,
+        ).observe(time.perf_counter() - start)
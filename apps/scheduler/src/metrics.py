@@ -0,0 +1,66 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from timing import Span
+
+# Generation takes from milliseconds on small divisions to minutes on large events
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+REQUEST_DURATION = Histogram(
+    "scheduler_request_duration_seconds",
+    "Time to handle a request to the scheduler, per route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+PHASE_DURATION = Histogram(
+    "scheduler_phase_duration_seconds",
+    "Time spent in each schedule validation and generation phase",
+    ["phase"],
+    buckets=LATENCY_BUCKETS,
+)
+
+BACKEND_REQUEST_DURATION = Histogram(
+    "scheduler_backend_request_duration_seconds",
+    "Latency of requests to the LEMS backend, per repository call",
+    ["method", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+
+BACKEND_REQUEST_ERRORS = Counter(
+    "scheduler_backend_request_errors_total",
+    "Failed requests to the LEMS backend, per repository call",
+    ["method", "endpoint"],
+)
+
+ERRORS = Counter(
+    "scheduler_errors_total",
+    "Scheduler and validator errors returned to callers",
+    ["error"],
+)
+
+MINIMUM_GAP_FALLBACKS = Counter(
+    "scheduler_minimum_gap_fallbacks_total",
+    "Match slots filled with a team that does not meet the minimum gap, "
+    "because no team did",
+)
+
+VALIDATION_CACHE_LOOKUPS = Counter(
+    "scheduler_validation_cache_lookups_total",
+    "Lookups of cached validation results, by hit or miss",
+    ["result"],
+)
+
+JOBS_IN_FLIGHT = Gauge(
+    "scheduler_jobs_in_flight",
+    "Background schedule jobs that are currently running",
+)
+
+
+def observe_phases(spans: list[Span]):
+    """Record the phase durations timed in a worker process."""
+    for span in spans:
+        PHASE_DURATION.labels(phase=span.name).observe(span.duration_ms / 1000)
+
+
+def count_error(error: Exception):
+    ERRORS.labels(error=type(error).__name__).inc()
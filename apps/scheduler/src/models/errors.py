@@ -6,7 +6,19 @@ class SchedulerError(Exception):
         super().__init__(message, *args)
 
 
+class SchedulerCancelledError(SchedulerError):
+    pass
+
+
+class ScheduleConflictError(SchedulerError):
+    """The persisted schedule changed after a repair was computed from it."""
+
+
 class ValidatorError(Exception):
     def __init__(self, message: str, data: list[ValidatorData], *args):
         super().__init__(message, *args)
         self.data = data
+
+    def __reduce__(self):
+        # Keep the validator data when the error is raised in a worker process
+        return (self.__class__, (self.args[0], self.data, *self.args[1:]))
@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 
 
 @dataclass
@@ -13,3 +15,40 @@ class Team:
 class Location:
     id: str
     name: str
+
+
+@dataclass
+class DivisionSnapshot:
+    """Teams, judging rooms and robot game tables of a division, fetched together."""
+
+    teams: list[Team]
+    rooms: list[Location]
+    tables: list[Location]
+
+
+@dataclass
+class ScheduledSession:
+    number: int
+    room_id: str
+    team_id: Optional[str]
+    scheduled_time: datetime
+
+
+@dataclass
+class ScheduledMatch:
+    number: int
+    stage: str
+    round: int
+    scheduled_time: datetime
+    # Team id per table id, None for an empty slot
+    tables: dict[str, Optional[str]]
+
+
+@dataclass
+class DivisionSchedule:
+    """The persisted schedule of a division, with the lengths it was created with."""
+
+    sessions: list[ScheduledSession]
+    matches: list[ScheduledMatch]
+    session_length_seconds: int
+    match_length_seconds: int
@@ -1,8 +1,19 @@
-from typing import Literal, Optional
+from typing import Annotated, Literal, Optional, Union
 from datetime import datetime
-from pydantic import BaseModel
+from itertools import product
+from pydantic import BaseModel, Field, NonNegativeInt
 
 from models.validator import ValidatorData
+from models.scheduler import (
+    JobStatus,
+    MatchAssignment,
+    MatchSlotChange,
+    ScheduleAnalysis,
+    SchedulePhase,
+    ScheduleReport,
+    SessionSlotChange,
+)
+from config import MAX_SCHEDULE_ATTEMPTS
 
 
 class Break(BaseModel):
@@ -30,13 +41,198 @@ class SchedulerRequest(BaseModel):
     breaks: list[Break]
     timezone: str = "UTC"
 
+    # Number of seeded attempts to generate, the best schedule is kept
+    attempts: Optional[int] = Field(default=None, ge=1, le=MAX_SCHEDULE_ATTEMPTS)
+    # How teams are placed on match tables, defaults to MATCH_ASSIGNMENT
+    match_assignment: Optional[MatchAssignment] = None
+
+    def schedule_settings(self) -> dict:
+        """The settings stored on the division once its schedule is complete."""
+        return {
+            "match_length": self.match_length_seconds,
+            "practice_cycle_time": self.practice_match_cycle_time_seconds,
+            "ranking_cycle_time": self.ranking_match_cycle_time_seconds,
+            "judging_session_length": self.judging_session_length_seconds,
+            "judging_session_cycle_time": self.judging_cycle_time_seconds,
+        }
+
+
+SweepParameter = Literal[
+    "practice_rounds",
+    "ranking_rounds",
+    "practice_match_cycle_time_seconds",
+    "ranking_match_cycle_time_seconds",
+    "judging_session_length_seconds",
+    "judging_cycle_time_seconds",
+]
+
+
+class ParameterRange(BaseModel):
+    start: NonNegativeInt
+    # Inclusive
+    stop: NonNegativeInt
+    step: int = Field(default=1, gt=0)
+
+    def values(self) -> list[int]:
+        return list(range(self.start, self.stop + 1, self.step))
+
+
+class ValidationSweepRequest(BaseModel):
+    base: SchedulerRequest
+    # Values to try per parameter, as a list or an inclusive range
+    parameters: dict[SweepParameter, list[NonNegativeInt] | ParameterRange] = {}
+    # Alternative break layouts to try instead of the breaks of the base request
+    breaks: Optional[list[list[Break]]] = Field(default=None, min_length=1)
+
+    def parameter_values(self) -> dict[str, list[int]]:
+        return {
+            name: values.values() if isinstance(values, ParameterRange) else values
+            for name, values in self.parameters.items()
+        }
+
+    def configuration_count(self) -> int:
+        count = len(self.breaks) if self.breaks else 1
+        for values in self.parameter_values().values():
+            count *= len(values)
+        return count
+
+    def configurations(self) -> list[tuple[dict[str, int], Optional[int]]]:
+        """Every combination of the parameter values and break layouts, as the
+        parameter values with the index of the break layout."""
+
+        values = self.parameter_values()
+        break_indexes = range(len(self.breaks)) if self.breaks else [None]
+        return [
+            (dict(zip(values, combination)), break_index)
+            for break_index in break_indexes
+            for combination in product(*values.values())
+        ]
+
+    def make_request(
+        self, parameters: dict[str, int], break_index: Optional[int]
+    ) -> SchedulerRequest:
+        update: dict = dict(parameters)
+        if break_index is not None:
+            update["breaks"] = self.breaks[break_index]
+        return self.base.model_copy(update=update)
+
+
+class SweepConfiguration(BaseModel):
+    parameters: dict[str, int]
+    breaks_index: Optional[int] = None
+    is_valid: bool
+    # Spare match slots in the tightest session and round, negative when infeasible,
+    # None when no session overlaps a round
+    slack: Optional[int]
+    tightest_session: Optional[int]
+
+
+class ValidationSweepResponse(BaseModel):
+    valid_count: int
+    configurations: list[SweepConfiguration]
+
+
+class EventSchedulerRequest(BaseModel):
+    divisions: list[SchedulerRequest] = Field(min_length=1)
+
 
 class CreateScheduleResponse(BaseModel):
     ok: bool = True
     error: Optional[str] = None
 
 
+class DivisionScheduleResult(BaseModel):
+    division_id: str
+    ok: bool
+    error: Optional[str] = None
+    analysis: Optional[ScheduleAnalysis] = None
+
+
+class EventScheduleResponse(BaseModel):
+    ok: bool
+    divisions: list[DivisionScheduleResult]
+
+
 class ValidateScheduleResponse(BaseModel):
     is_valid: bool
     data: Optional[list[ValidatorData]] = None
     error: Optional[str] = None
+
+
+class PreviewSession(BaseModel):
+    number: int
+    start_time: datetime
+    end_time: datetime
+    # Team id per room id, None for an empty slot
+    rooms: dict[str, Optional[str]]
+
+
+class PreviewMatch(BaseModel):
+    number: int
+    stage: Literal["practice", "ranking"]
+    round: int
+    start_time: datetime
+    end_time: datetime
+    # Team id per table id, None for an empty slot
+    tables: dict[str, Optional[str]]
+
+
+class PreviewScheduleResponse(BaseModel):
+    sessions: list[PreviewSession]
+    matches: list[PreviewMatch]
+    analysis: ScheduleAnalysis
+    seed: Optional[int] = None
+    report: Optional[ScheduleReport] = None
+
+
+class TeamRemoved(BaseModel):
+    type: Literal["team_removed"]
+    team_id: str
+
+
+class TeamAdded(BaseModel):
+    type: Literal["team_added"]
+    team_id: str
+
+
+class TableDisabled(BaseModel):
+    type: Literal["table_disabled"]
+    table_id: str
+
+
+class SessionMoved(BaseModel):
+    type: Literal["session_moved"]
+    number: int
+    start_time: datetime
+
+
+ScheduleChange = Annotated[
+    Union[TeamRemoved, TeamAdded, TableDisabled, SessionMoved],
+    Field(discriminator="type"),
+]
+
+
+class RepairScheduleRequest(BaseModel):
+    division_id: str
+    change: ScheduleChange
+    # Only slots starting at or after this time are changed, e.g. the current time
+    # during the event. Defaults to the whole schedule.
+    from_time: Optional[datetime] = None
+
+
+class RepairScheduleResponse(BaseModel):
+    sessions: list[SessionSlotChange]
+    matches: list[MatchSlotChange]
+    # Ids of the teams whose schedule changed
+    affected_teams: list[str]
+    minimum_gap_fallbacks: int
+    persisted: bool
+
+
+class ScheduleJobResponse(BaseModel):
+    job_id: str
+    division_id: str
+    status: JobStatus
+    phase: Optional[SchedulePhase]
+    progress: float
+    error: Optional[str] = None
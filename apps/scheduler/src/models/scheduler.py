@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Literal, Optional, TypedDict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SchedulePhase = Literal["validate", "sessions", "constraints", "populate", "persist"]
+JobStatus = Literal["pending", "running", "completed", "failed", "cancelled"]
+MatchAssignment = Literal["greedy", "optimal"]
+
+# Marks a session or match slot with no team assigned in the schedule grids.
+EMPTY_SLOT = -1
+
+
+class ScheduleAnalysis(TypedDict):
+    average_gap_seconds: float
+    minimum_gap_seconds: float
+    average_unique_tables: float
+    stage_unique_tables: dict[str, float]
+    minimum_gap_fallbacks: int
+
+
+class GapHistogramBin(TypedDict):
+    # Gaps from start_seconds, inclusive, to end_seconds
+    start_seconds: int
+    end_seconds: int
+    count: int
+
+
+class TeamReport(TypedDict):
+    team_id: str
+    # None for teams that left the division but are still scheduled
+    team_number: Optional[int]
+    event_count: int
+    # Time between the end of an event and the start of the next one, None for
+    # teams with less than two events
+    minimum_gap_seconds: Optional[float]
+    average_gap_seconds: Optional[float]
+    maximum_gap_seconds: Optional[float]
+    back_to_back_count: int
+    # Distinct tables the team plays on, per stage
+    unique_tables: dict[str, int]
+
+
+class ScheduleReport(TypedDict):
+    team_count: int
+    minimum_gap_seconds: float
+    average_gap_seconds: float
+    maximum_gap_seconds: float
+    back_to_back_count: int
+    gap_histogram: list[GapHistogramBin]
+    average_unique_tables: float
+    stage_unique_tables: dict[str, float]
+    teams: list[TeamReport]
+
+
+@dataclass
+class GeneratedSchedule:
+    match_schedule: "pd.DataFrame"
+    session_schedule: "pd.DataFrame"
+    analysis: ScheduleAnalysis
+    seed: Optional[int] = None
+    report: Optional[ScheduleReport] = None
+
+
+class SessionSlotChange(TypedDict):
+    number: int
+    room_id: str
+    previous_team_id: Optional[str]
+    team_id: Optional[str]
+    # Set when the session itself moved
+    scheduled_time: Optional[datetime]
+
+
+class MatchSlotChange(TypedDict):
+    number: int
+    stage: Literal["practice", "ranking"]
+    round: int
+    table_id: str
+    previous_team_id: Optional[str]
+    team_id: Optional[str]
+
+
+@dataclass
+class ScheduleRepair:
+    """The slots of a persisted schedule that a repair changed."""
+
+    sessions: list[SessionSlotChange]
+    matches: list[MatchSlotChange]
+    affected_teams: list[str]
+    minimum_gap_fallbacks: int = 0
@@ -1,5 +1,9 @@
-from typing import TypedDict, Literal
-from datetime import datetime
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional, TypedDict, Literal
+from datetime import datetime, timezone
+
+import numpy as np
 
 
 class ValidatorEvent(TypedDict):
@@ -31,3 +35,133 @@ class OverlappingRound(TypedDict):
 class ValidatorData(TypedDict):
     session: ValidatorSession
     overlapping_rounds: list[OverlappingRound]
+
+
+def to_datetime64(time: datetime) -> np.datetime64:
+    """Convert a datetime to a naive datetime64, aware times are converted to UTC."""
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(time, "us")
+
+
+def to_datetimes(times: np.ndarray, origin: datetime) -> list[datetime]:
+    """Convert datetime64 times back to datetimes in the time zone of `origin`."""
+    offsets = (times - to_datetime64(origin)).astype("timedelta64[us]").astype(object)
+    return [origin + offset for offset in offsets]
+
+
+def _to_epoch_seconds(times: np.ndarray) -> np.ndarray:
+    return (times - np.datetime64(0, "s")).astype("timedelta64[s]").astype(np.int64)
+
+
+@dataclass(frozen=True)
+class EventTable:
+    """Judging sessions or matches as one array per field, a row per event in number
+    order. Times are naive UTC datetime64, and are converted back to the time zone of
+    `origin` when records are built. Stage and round are only set for matches.
+
+    The table is what is kept and sent between processes; ValidatorEvent records are
+    only built for the rows that are read.
+    """
+
+    event_type: Literal["match", "judging"]
+    origin: datetime
+    number: np.ndarray
+    slots: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    stage: Optional[np.ndarray] = None
+    round: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.number)
+
+    def start_seconds(self) -> np.ndarray:
+        """Start times as epoch seconds."""
+        return _to_epoch_seconds(self.start)
+
+    def end_seconds(self) -> np.ndarray:
+        """End times as epoch seconds."""
+        return _to_epoch_seconds(self.end)
+
+    def start_times(self) -> list[datetime]:
+        return to_datetimes(self.start, self.origin)
+
+    def end_times(self) -> list[datetime]:
+        return to_datetimes(self.end, self.origin)
+
+    def records(self, rows: slice = slice(None)) -> list[ValidatorEvent]:
+        """Build the records of a range of rows."""
+
+        numbers = self.number[rows].tolist()
+        slots = self.slots[rows].tolist()
+        start_times = to_datetimes(self.start[rows], self.origin)
+        end_times = to_datetimes(self.end[rows], self.origin)
+
+        if self.stage is None or self.round is None:
+            return [
+                {
+                    "event_type": self.event_type,
+                    "number": number,
+                    "slots": slot_count,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+                for number, slot_count, start_time, end_time in zip(
+                    numbers, slots, start_times, end_times
+                )
+            ]
+
+        return [
+            {
+                "event_type": self.event_type,
+                "stage": stage,
+                "round": round,
+                "number": number,
+                "slots": slot_count,
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+            for stage, round, number, slot_count, start_time, end_time in zip(
+                self.stage[rows].tolist(),
+                self.round[rows].tolist(),
+                numbers,
+                slots,
+                start_times,
+                end_times,
+            )
+        ]
+
+
+class EventRecords(Sequence):
+    """Read-only view of the rows [first, last) of an event table as records. Records
+    are built on access, so taking a view copies nothing."""
+
+    def __init__(self, table: EventTable, first: int = 0, last: Optional[int] = None):
+        self.table = table
+        self._rows = range(len(table))[first:last]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            rows = self._rows[index]
+            if rows.step == 1:
+                return self.table.records(slice(rows.start, rows.stop))
+            return [self[i] for i in range(len(self))[index]]
+
+        row = self._rows[index]
+        return self.table.records(slice(row, row + 1))[0]
+
+    def __iter__(self):
+        return iter(self.table.records(slice(self._rows.start, self._rows.stop)))
+
+
+@dataclass
+class ValidationResult:
+    """The validator output the scheduler generates from."""
+
+    data: list[ValidatorData]
+    sessions: EventTable
+    matches: EventTable
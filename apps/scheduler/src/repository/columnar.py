@@ -0,0 +1,67 @@
+"""Compact columnar encoding of schedule payloads exchanged with the LEMS backend.
+
+A table is sent as one list per column instead of one object per row, so keys are
+not repeated. Columns of repeated strings, such as team, room and table ids or
+timestamps, are dictionary encoded: each distinct value is sent once, and rows refer
+to it by index.
+
+    {
+        "length": 3,
+        "columns": {
+            "number": [1, 1, 2],
+            "team_id": {"dictionary": ["a1b2...", "c3d4..."], "codes": [0, null, 1]}
+        }
+    }
+
+Payloads in this encoding are sent with COLUMNAR_CONTENT_TYPE, gzip compressed.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+COLUMNAR_CONTENT_TYPE = "application/vnd.lems.columnar+json"
+
+
+def _encode_dictionary(values: list) -> dict:
+    dictionary: dict = {}
+    codes = [
+        None if value is None else dictionary.setdefault(value, len(dictionary))
+        for value in values
+    ]
+    return {"dictionary": list(dictionary), "codes": codes}
+
+
+def encode_table(columns: dict[str, list], dictionary_columns: Iterable[str]) -> dict:
+    """Encode equal length columns as a table, dictionary encoding the given ones."""
+
+    dictionary_columns = set(dictionary_columns)
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+
+    return {
+        "length": lengths.pop() if lengths else 0,
+        "columns": {
+            name: (_encode_dictionary(values) if name in dictionary_columns else values)
+            for name, values in columns.items()
+        },
+    }
+
+
+def decode_table(table: dict) -> dict[str, list]:
+    """Decode a table to its columns, with dictionary encoded columns expanded."""
+
+    columns = {}
+    for name, column in table["columns"].items():
+        if isinstance(column, dict):
+            # The trailing None is looked up by the null codes of empty values
+            dictionary = np.array(column["dictionary"] + [None], dtype=object)
+            codes = np.array(
+                [-1 if code is None else code for code in column["codes"]],
+                dtype=np.int64,
+            )
+            columns[name] = dictionary[codes].tolist()
+        else:
+            columns[name] = column
+    return columns
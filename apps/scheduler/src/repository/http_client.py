@@ -0,0 +1,35 @@
+import logging
+import httpx
+
+from config import HTTP_TIMEOUT_SECONDS, HTTP_MAX_CONNECTIONS
+
+logger = logging.getLogger("lems.scheduler")
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client, so connections to LEMS are pooled and reused
+    across requests and divisions."""
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        logger.info("🚀 HTTP Client configured for scheduler API.")
+
+    return _client
+
+
+async def close_http_client():
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("HTTP client closed")
@@ -1,17 +1,45 @@
 import os
+import gzip
+import json
+import asyncio
 import logging
-import requests
+from datetime import datetime
+from typing import TYPE_CHECKING
+import httpx
 import jwt
-import pandas as pd
-from models.errors import SchedulerError
-from models.lems import Team as TeamModel, Location as LocationModel
+import numpy as np
+from config import WIRE_FORMAT
+from metrics import BACKEND_REQUEST_DURATION, BACKEND_REQUEST_ERRORS, PHASE_DURATION
+from models.errors import ScheduleConflictError, SchedulerError
+from models.lems import (
+    Team as TeamModel,
+    Location as LocationModel,
+    DivisionSnapshot,
+    DivisionSchedule,
+    ScheduledSession,
+    ScheduledMatch,
+)
+from models.scheduler import ScheduleRepair
+from repository.columnar import (
+    COLUMNAR_CONTENT_TYPE,
+    decode_table,
+    encode_table,
+)
+from repository.snapshot_cache import CachedResponse, snapshot_cache
+from repository.http_client import get_http_client
+from timing import timed
+
+# Only needed to persist generated schedules, which already loaded it
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger("lems.scheduler")
 
 
 class LemsRepository:
-    def __init__(self, division_id: str):
+    def __init__(self, division_id: str, wire_format: str = WIRE_FORMAT):
         self.division_id = division_id
+        self.is_columnar = wire_format == "columnar"
 
         self.base_url = os.getenv("LOCAL_BASE_URL", "http://localhost:3333")
         self.scheduler_jwt_secret = os.getenv("SCHEDULER_JWT_SECRET")
@@ -21,64 +49,123 @@ class LemsRepository:
 
         self.auth_token = jwt.encode({}, self.scheduler_jwt_secret, algorithm="HS256")
 
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {self.auth_token}",
-                "Content-Type": "application/json",
-            }
-        )
+        self.client = get_http_client()
+        self.headers = {
+            "Authorization": f"Bearer {self.auth_token}",
+            "Content-Type": "application/json",
+        }
 
         self.api_base = f"{self.base_url}/scheduler/divisions/{division_id}"
 
-        self._teams_by_slug = {}
-        self._load_teams_cache()
+        self._snapshot: DivisionSnapshot | None = None
+        self._teams_by_slug: dict[str, str] | None = None
+        self._team_numbers_by_slug: dict[str, int] = {}
 
-        logger.info(f"🔗 Connecting to LEMS API at {self.base_url}")
-        logger.info("🚀 HTTP Client configured for scheduler API.")
+        logger.debug(f"🔗 Connecting to LEMS API at {self.base_url}")
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+    async def _make_request(
+        self, method: str, endpoint: str, headers: dict | None = None, **kwargs
+    ) -> httpx.Response:
         """
         Make an authenticated HTTP request to the API.
 
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint path
-            **kwargs: Additional arguments for requests
+            headers: Headers to send in addition to the authentication headers
+            **kwargs: Additional arguments for httpx
 
         Returns:
             Response object
 
         Raises:
-            requests.RequestException: If request fails
+            httpx.HTTPError: If request fails
         """
         url = f"{self.api_base}{endpoint}"
+        span = f"lems-{method.lower()}-{endpoint.strip('/').replace('/', '-')}"
         try:
-            response = self.session.request(method, url, **kwargs)
-            response.raise_for_status()
+            with (
+                timed(span, f"{method} {endpoint}"),
+                BACKEND_REQUEST_DURATION.labels(method, endpoint).time(),
+            ):
+                response = await self.client.request(
+                    method, url, headers={**self.headers, **(headers or {})}, **kwargs
+                )
+            # 304 Not Modified is an expected answer to conditional requests
+            if response.is_error:
+                response.raise_for_status()
             return response
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
+            BACKEND_REQUEST_ERRORS.labels(method, endpoint).inc()
             logger.error(f"❌ API request failed: {method} {url} - {e}")
             raise
 
-    def _load_teams_cache(self):
+    async def _load_teams_cache(self):
         """Load all teams into a cache for efficient lookups by team slug."""
         logger.debug("Loading teams cache for efficient lookups")
         try:
-            teams = self.get_teams()
+            teams = (await self.get_snapshot()).teams
             self._teams_by_slug = {team.slug: team.id for team in teams}
+            self._team_numbers_by_slug = {team.slug: team.number for team in teams}
             logger.debug(f"Cached {len(self._teams_by_slug)} teams")
         except Exception as e:
             logger.error(f"Failed to load teams cache: {e}")
             self._teams_by_slug = {}
 
-    def get_teams(self) -> list[TeamModel]:
-        logger.debug(f"Fetching teams for division {self.division_id}")
+    async def _get_cacheable(self, endpoint: str) -> CachedResponse:
+        """GET an endpoint, revalidating a previously cached response by its ETag."""
+        cached = snapshot_cache.get_response(self.division_id, endpoint)
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+
+        response = await self._make_request("GET", endpoint, headers=headers)
+        if response.status_code == 304 and cached:
+            logger.debug(f"{endpoint} not modified, using cached response")
+            return cached
 
-        response = self._make_request("GET", "/teams")
-        teams_data = response.json()
+        return CachedResponse(etag=response.headers.get("ETag"), data=response.json())
 
-        teams = [
+    async def get_snapshot(self, max_age: float = 0) -> DivisionSnapshot:
+        """Get the teams, rooms and tables of the division.
+
+        The three endpoints are fetched concurrently, once per repository. A cached
+        response younger than max_age seconds is used without contacting the backend,
+        older ones are revalidated with a conditional request.
+        """
+        if self._snapshot is not None:
+            return self._snapshot
+
+        responses = snapshot_cache.get_fresh(self.division_id, max_age)
+        if responses is None:
+            logger.debug(f"Fetching snapshot for division {self.division_id}")
+            endpoints = ["/teams", "/rooms", "/tables"]
+            fetched = await asyncio.gather(
+                *(self._get_cacheable(endpoint) for endpoint in endpoints)
+            )
+            responses = dict(zip(endpoints, fetched))
+            snapshot_cache.store(self.division_id, responses)
+        else:
+            logger.debug(f"Using cached snapshot for division {self.division_id}")
+
+        self._snapshot = DivisionSnapshot(
+            teams=self._parse_teams(responses["/teams"].data),
+            rooms=self._parse_locations(responses["/rooms"].data),
+            tables=self._parse_locations(responses["/tables"].data),
+        )
+        self._teams_by_slug = {team.slug: team.id for team in self._snapshot.teams}
+        self._team_numbers_by_slug = {
+            team.slug: team.number for team in self._snapshot.teams
+        }
+
+        logger.debug(
+            f"Snapshot has {len(self._snapshot.teams)} teams, "
+            f"{len(self._snapshot.rooms)} judging rooms and "
+            f"{len(self._snapshot.tables)} robot game tables"
+        )
+        return self._snapshot
+
+    @staticmethod
+    def _parse_teams(teams_data: list[dict]) -> list[TeamModel]:
+        return [
             TeamModel(
                 team["id"],
                 team["number"],
@@ -87,130 +174,414 @@ class LemsRepository:
             )
             for team in teams_data
         ]
+
+    @staticmethod
+    def _parse_locations(locations_data: list[dict]) -> list[LocationModel]:
+        return [
+            LocationModel(location["id"], location["name"])
+            for location in locations_data
+        ]
+
+    async def get_teams(self) -> list[TeamModel]:
+        logger.debug(f"Fetching teams for division {self.division_id}")
+
+        response = await self._make_request("GET", "/teams")
+        teams = self._parse_teams(response.json())
+
         logger.debug(f"Retrieved {len(teams)} teams")
         return teams
 
-    def get_rooms(self) -> list[LocationModel]:
+    async def get_rooms(self) -> list[LocationModel]:
         logger.debug(f"Fetching judging rooms for division {self.division_id}")
 
-        response = self._make_request("GET", "/rooms")
-        rooms_data = response.json()
+        response = await self._make_request("GET", "/rooms")
+        rooms = self._parse_locations(response.json())
 
-        rooms = [LocationModel(room["id"], room["name"]) for room in rooms_data]
         logger.debug(f"Retrieved {len(rooms)} judging rooms")
         return rooms
 
-    def get_tables(self) -> list[LocationModel]:
+    async def get_tables(self) -> list[LocationModel]:
         logger.debug(f"Fetching robot game tables for division {self.division_id}")
 
-        response = self._make_request("GET", "/tables")
-        tables_data = response.json()
+        response = await self._make_request("GET", "/tables")
+        tables = self._parse_locations(response.json())
 
-        tables = [LocationModel(table["id"], table["name"]) for table in tables_data]
         logger.debug(f"Retrieved {len(tables)} robot game tables")
         return tables
 
     def get_lems_team_id(self, team_slug: str) -> str | None:
         """Get team ID by team slug using cached data."""
-        if team_slug is None:
+        if team_slug is None or self._teams_by_slug is None:
             return None
         return self._teams_by_slug.get(team_slug)
 
-    def insert_sessions(self, session_schedule: pd.DataFrame):
-        logger.debug("Submitting judging sessions to API")
+    @staticmethod
+    def _map_slugs(slugs: np.ndarray, mapping: dict) -> np.ndarray:
+        """Map a column of team slugs through a slug-keyed dict. Every distinct slug is
+        looked up once, empty slots map to None."""
+        import pandas as pd
 
-        sessions_to_insert = []
-        ignore_columns = ["start_time", "end_time"]
+        codes, uniques = pd.factorize(slugs)
+        lookup = np.array(
+            [mapping.get(slug) for slug in uniques] + [None], dtype=object
+        )
+        return lookup[codes]
+
+    @staticmethod
+    def _format_times(times: "pd.Series") -> np.ndarray:
+        """ISO 8601 strings for a datetime column. Aware times are sent in UTC."""
+        if times.dt.tz is None:
+            return np.datetime_as_string(times.to_numpy(), unit="s")
+        utc_times = times.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        return np.datetime_as_string(utc_times, unit="s", timezone="UTC")
+
+    @staticmethod
+    def _count_sessions(session_schedule: "pd.DataFrame") -> int:
+        """Number of session slots, one per room of every session."""
+        return len(session_schedule) * len(session_schedule.columns[2:])
+
+    def _get_session_columns(self, session_schedule: "pd.DataFrame") -> dict[str, list]:
+        room_ids = list(session_schedule.columns[2:])
+        session_count = len(session_schedule)
+        slugs = session_schedule[room_ids].to_numpy(dtype=object).ravel()
+
+        return {
+            "number": np.repeat(
+                session_schedule.index.to_numpy(), len(room_ids)
+            ).tolist(),
+            "scheduled_time": np.repeat(
+                self._format_times(session_schedule["start_time"]), len(room_ids)
+            ).tolist(),
+            "room_id": np.tile(
+                np.array(room_ids, dtype=object), session_count
+            ).tolist(),
+            "team_id": self._map_slugs(slugs, self._teams_by_slug).tolist(),
+        }
+
+    def _get_sessions_payload(self, session_schedule: "pd.DataFrame") -> list | dict:
+        columns = self._get_session_columns(session_schedule)
+        if self.is_columnar:
+            return encode_table(columns, ["scheduled_time", "room_id", "team_id"])
+
+        return [
+            {
+                "division_id": self.division_id,
+                "number": number,
+                "scheduled_time": scheduled_time,
+                "room_id": room_id,
+                "team_id": team_id,
+            }
+            for number, scheduled_time, room_id, team_id in zip(
+                columns["number"],
+                columns["scheduled_time"],
+                columns["room_id"],
+                columns["team_id"],
+            )
+        ]
 
-        for index, row in session_schedule.iterrows():
-            scheduled_time = row["start_time"]
+    def _get_participant_columns(
+        self, match_schedule: "pd.DataFrame"
+    ) -> dict[str, list]:
+        """Columns with a row per table of every match."""
+        table_ids = list(match_schedule.columns[4:])
+        slugs = match_schedule[table_ids].to_numpy(dtype=object).ravel()
+        table_count = len(table_ids)
+
+        return {
+            "number": np.repeat(match_schedule.index.to_numpy(), table_count).tolist(),
+            "stage": np.repeat(
+                match_schedule["stage"].to_numpy(dtype=object), table_count
+            ).tolist(),
+            "round": np.repeat(
+                match_schedule["round"].to_numpy(), table_count
+            ).tolist(),
+            "scheduled_time": np.repeat(
+                self._format_times(match_schedule["start_time"]), table_count
+            ).tolist(),
+            "table_id": np.tile(
+                np.array(table_ids, dtype=object), len(match_schedule)
+            ).tolist(),
+            "team_id": self._map_slugs(slugs, self._teams_by_slug).tolist(),
+        }
+
+    def _get_matches_payload(self, match_schedule: "pd.DataFrame") -> list | dict:
+        if self.is_columnar:
+            return encode_table(
+                self._get_participant_columns(match_schedule),
+                ["stage", "scheduled_time", "table_id", "team_id"],
+            )
 
-            for room_id, _team_slug in row[len(ignore_columns) :].items():
-                team_slug = str(_team_slug) if pd.notna(_team_slug) else None
-                team_id = self.get_lems_team_id(team_slug) if team_slug else None
+        table_ids = list(match_schedule.columns[4:])
+        slugs = match_schedule[table_ids].to_numpy(dtype=object)
+        team_ids = self._map_slugs(slugs.ravel(), self._teams_by_slug)
+        team_numbers = self._map_slugs(slugs.ravel(), self._team_numbers_by_slug)
+        team_ids = team_ids.reshape(slugs.shape).tolist()
+        team_numbers = team_numbers.reshape(slugs.shape).tolist()
 
-                session_data = {
-                    "division_id": self.division_id,
-                    "number": index,
-                    "scheduled_time": scheduled_time.isoformat(),
-                    "room_id": room_id,
-                    "team_id": team_id,
-                }
+        match_tables = [
+            {
+                table_id: {"team_id": team_id, "team_number": team_number}
+                for table_id, team_id, team_number in zip(
+                    table_ids, row_team_ids, row_team_numbers
+                )
+            }
+            for row_team_ids, row_team_numbers in zip(team_ids, team_numbers)
+        ]
+
+        return [
+            {
+                "number": number,
+                "stage": stage,
+                "round": round_number,
+                "scheduled_time": scheduled_time,
+                "tables": tables,
+            }
+            for number, stage, round_number, scheduled_time, tables in zip(
+                match_schedule.index.tolist(),
+                match_schedule["stage"].tolist(),
+                match_schedule["round"].tolist(),
+                self._format_times(match_schedule["start_time"]).tolist(),
+                match_tables,
+            )
+        ]
+
+    def _get_body(self, payload: dict) -> dict:
+        """Request arguments that send the payload in the configured wire format."""
+        content = json.dumps(payload).encode()
+        if not self.is_columnar:
+            return {"content": content}
+        return {
+            # zlib's default level, gzip.compress defaults to the slowest
+            "content": gzip.compress(content, compresslevel=6),
+            "headers": {
+                "Content-Type": COLUMNAR_CONTENT_TYPE,
+                "Content-Encoding": "gzip",
+            },
+        }
+
+    async def insert_sessions(self, session_schedule: "pd.DataFrame"):
+        logger.debug("Submitting judging sessions to API")
 
-                sessions_to_insert.append(session_data)
+        if self._teams_by_slug is None:
+            await self._load_teams_cache()
+
+        sessions_to_insert = self._get_sessions_payload(session_schedule)
 
         try:
-            response = self._make_request(
-                "POST", "/sessions", json={"sessions": sessions_to_insert}
+            response = await self._make_request(
+                "POST",
+                "/sessions",
+                **self._get_body({"sessions": sessions_to_insert}),
             )
-            if not response.ok:
+            if not response.is_success:
                 raise SchedulerError("Error in judging sessions request")
             logger.info(
-                f"Successfully submitted {len(sessions_to_insert)} judging sessions"
+                f"Successfully submitted {self._count_sessions(session_schedule)} "
+                "judging sessions"
             )
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to submit judging sessions: {e}")
             raise SchedulerError("Failed to submit judging sessions.")
 
-    def insert_matches(self, match_schedule: pd.DataFrame):
+    async def insert_matches(self, match_schedule: "pd.DataFrame"):
         logger.debug("Submitting robot game matches to API")
 
-        matches_to_insert = []
-        ignore_columns = ["start_time", "end_time", "stage", "round"]
-
-        for index, row in match_schedule.iterrows():
-            scheduled_time = row["start_time"]
-            stage = row["stage"]
-            round_number = row["round"]
-
-            match_data = {
-                "number": index,
-                "stage": stage,
-                "round": round_number,
-                "scheduled_time": scheduled_time.isoformat(),
-                "tables": {},
-            }
+        if self._teams_by_slug is None:
+            await self._load_teams_cache()
 
-            for table_id, _team_slug in row[len(ignore_columns) :].items():
-                team_slug = str(_team_slug) if pd.notna(_team_slug) else None
-                team_id = self.get_lems_team_id(team_slug) if team_slug else None
-                # Extract team number from slug (format: "region-number")
-                team_number = int(team_slug.split('-')[1]) if team_slug and '-' in team_slug else None
-
-                match_data["tables"][table_id] = {
-                    "team_id": team_id,
-                    "team_number": team_number,
-                }
-
-            matches_to_insert.append(match_data)
+        matches_to_insert = self._get_matches_payload(match_schedule)
 
         try:
-            response = self._make_request(
-                "POST", "/matches", json={"matches": matches_to_insert}
+            response = await self._make_request(
+                "POST",
+                "/matches",
+                **self._get_body({"matches": matches_to_insert}),
             )
-            if not response.ok:
+            if not response.is_success:
                 raise SchedulerError("Error in robot game matches request")
             logger.info(
-                f"Successfully submitted {len(matches_to_insert)} robot game matches"
+                f"Successfully submitted {len(match_schedule)} robot game matches"
             )
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to submit robot game matches: {e}")
             raise SchedulerError("Failed to submit robot game matches")
 
-    def delete_schedule(self):
+    async def save_schedule(
+        self,
+        match_schedule: "pd.DataFrame",
+        session_schedule: "pd.DataFrame",
+        schedule_settings: dict,
+    ):
+        """Persist a generated schedule and mark it complete in a single request.
+        The backend writes it in one transaction, so a failed save leaves no partial
+        schedule to delete."""
+        logger.debug("Submitting division schedule to API")
+
+        if self._teams_by_slug is None:
+            await self._load_teams_cache()
+
+        sessions = self._get_sessions_payload(session_schedule)
+        matches = self._get_matches_payload(match_schedule)
+        payload = {
+            "sessions": sessions,
+            "matches": matches,
+            "schedule_settings": schedule_settings,
+        }
+
+        try:
+            with PHASE_DURATION.labels("persist").time():
+                response = await self._make_request(
+                    "PUT", "/schedule", **self._get_body(payload)
+                )
+            if not response.is_success:
+                raise SchedulerError("Error in save schedule request")
+            logger.info(
+                f"Successfully saved {self._count_sessions(session_schedule)} judging "
+                f"sessions and {len(match_schedule)} robot game matches"
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to save division schedule: {e}")
+            raise SchedulerError("Failed to save division schedule")
+
+    async def get_schedule(self) -> DivisionSchedule:
+        """Get the persisted schedule of the division.
+
+        Raises:
+            httpx.HTTPStatusError: With status 404 if the division has no schedule
+            SchedulerError: If the schedule was stored without its settings
+        """
+        logger.debug(f"Fetching schedule for division {self.division_id}")
+
+        headers = (
+            {"Accept": f"{COLUMNAR_CONTENT_TYPE}, application/json;q=0.9"}
+            if self.is_columnar
+            else None
+        )
+        response = await self._make_request("GET", "/schedule", headers=headers)
+        data = response.json()
+        settings = data.get("schedule_settings")
+        if not settings:
+            raise SchedulerError("The division schedule has no schedule settings")
+
+        content_type = response.headers.get("Content-Type", "")
+        if content_type.startswith(COLUMNAR_CONTENT_TYPE):
+            data = self._decode_schedule(data)
+
+        schedule = DivisionSchedule(
+            sessions=[
+                ScheduledSession(
+                    session["number"],
+                    session["room_id"],
+                    session["team_id"],
+                    datetime.fromisoformat(session["scheduled_time"]),
+                )
+                for session in data["sessions"]
+            ],
+            matches=[
+                ScheduledMatch(
+                    match["number"],
+                    match["stage"],
+                    match["round"],
+                    datetime.fromisoformat(match["scheduled_time"]),
+                    match["tables"],
+                )
+                for match in data["matches"]
+            ],
+            session_length_seconds=settings["judging_session_length"],
+            match_length_seconds=settings["match_length"],
+        )
+
+        logger.debug(
+            f"Retrieved {len(schedule.sessions)} session slots and "
+            f"{len(schedule.matches)} matches"
+        )
+        return schedule
+
+    @staticmethod
+    def _decode_schedule(data: dict) -> dict:
+        """The rows of a columnar schedule, in the layout of the JSON response."""
+        sessions = decode_table(data["sessions"])
+        participants = decode_table(data["matches"])
+
+        matches: dict[int, dict] = {}
+        for number, stage, round_number, scheduled_time, table_id, team_id in zip(
+            participants["number"],
+            participants["stage"],
+            participants["round"],
+            participants["scheduled_time"],
+            participants["table_id"],
+            participants["team_id"],
+        ):
+            match = matches.get(number)
+            if match is None:
+                match = matches[number] = {
+                    "number": number,
+                    "stage": stage,
+                    "round": round_number,
+                    "scheduled_time": scheduled_time,
+                    "tables": {},
+                }
+            match["tables"][table_id] = team_id
+
+        return {
+            "sessions": [
+                dict(zip(sessions, session)) for session in zip(*sessions.values())
+            ],
+            "matches": list(matches.values()),
+        }
+
+    async def update_schedule(self, repair: ScheduleRepair):
+        """Write only the session and match slots changed by a repair."""
+        logger.info(
+            f"Updating {len(repair.sessions)} session slots and "
+            f"{len(repair.matches)} match slots"
+        )
+
+        payload = {
+            "sessions": [
+                {
+                    **session,
+                    "scheduled_time": (
+                        session["scheduled_time"].isoformat()
+                        if session["scheduled_time"] is not None
+                        else None
+                    ),
+                }
+                for session in repair.sessions
+            ],
+            "matches": repair.matches,
+        }
+
+        try:
+            response = await self._make_request("PATCH", "/schedule", json=payload)
+            if not response.is_success:
+                raise SchedulerError("Error in update schedule request")
+            logger.info("Successfully updated division schedule")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 409:
+                logger.error(f"Failed to update division schedule: {e}")
+                raise SchedulerError("Failed to update division schedule")
+            raise ScheduleConflictError(
+                "The schedule changed while the repair was computed, try again"
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to update division schedule: {e}")
+            raise SchedulerError("Failed to update division schedule")
+
+    async def delete_schedule(self):
         """Delete all sessions, matches, and their states for this division."""
         logger.warning("Deleting division schedule")
 
         try:
-            response = self._make_request("DELETE", "/schedule")
-            if not response.ok:
+            response = await self._make_request("DELETE", "/schedule")
+            if not response.is_success:
                 raise SchedulerError("Error in delete schedule request")
             logger.info("Successfully deleted division schedule")
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to delete division schedule: {e}")
             raise SchedulerError("Failed to delete division schedule")
 
-    def mark_schedule_complete(self, schedule_settings: dict = None):
+    async def mark_schedule_complete(self, schedule_settings: dict = None):
         """Mark the division as having a complete schedule."""
         logger.info("Marking schedule as complete")
 
@@ -219,15 +590,10 @@ class LemsRepository:
             payload["schedule_settings"] = schedule_settings
 
         try:
-            response = self._make_request("PUT", "/settings", json=payload)
-            if not response.ok:
+            response = await self._make_request("PUT", "/settings", json=payload)
+            if not response.is_success:
                 raise SchedulerError("Error in mark schedule complete request")
             logger.info("Successfully marked schedule as complete")
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to mark schedule as complete: {e}")
             raise SchedulerError("Failed to mark schedule as complete")
-
-    def close_connections(self):
-        if hasattr(self, "session"):
-            self.session.close()
-            logger.info("HTTP session closed")
@@ -0,0 +1,60 @@
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    data: Any
+
+
+@dataclass
+class CachedDivision:
+    fetched_at: float
+    responses: dict[str, CachedResponse] = field(default_factory=dict)
+
+
+class SnapshotCache:
+    """Process-wide cache of the raw division responses, keyed by division and endpoint.
+
+    Entries younger than the requested max age are served without contacting the
+    backend. Older entries keep their ETag so the repository can revalidate them
+    with a conditional request instead of downloading the payload again.
+    """
+
+    def __init__(self):
+        self._divisions: dict[str, CachedDivision] = {}
+        self._lock = threading.Lock()
+
+    def get_fresh(
+        self, division_id: str, max_age: float
+    ) -> dict[str, CachedResponse] | None:
+        """Return the cached responses if they were fetched less than max_age ago."""
+        with self._lock:
+            division = self._divisions.get(division_id)
+            if division is None or time.monotonic() - division.fetched_at >= max_age:
+                return None
+            return dict(division.responses)
+
+    def get_response(self, division_id: str, endpoint: str) -> CachedResponse | None:
+        """Return the cached response for an endpoint regardless of its age."""
+        with self._lock:
+            division = self._divisions.get(division_id)
+            if division is None:
+                return None
+            return division.responses.get(endpoint)
+
+    def store(self, division_id: str, responses: dict[str, CachedResponse]):
+        with self._lock:
+            self._divisions[division_id] = CachedDivision(
+                fetched_at=time.monotonic(), responses=dict(responses)
+            )
+
+    def invalidate(self, division_id: str):
+        with self._lock:
+            self._divisions.pop(division_id, None)
+
+
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from services.worker_pool import is_warm
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/health")
+async def get_health() -> Response:
+    """Readiness of the service. Unavailable until the worker pool is warmed up, so
+    new instances only get traffic once they can schedule without a cold start."""
+    if not is_warm():
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return JSONResponse({"status": "ok"})
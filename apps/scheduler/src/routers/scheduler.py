@@ -1,76 +1,499 @@
+import asyncio
 import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import httpx
 from fastapi import APIRouter, HTTPException, status, Response
 
 from models.errors import ValidatorError
-from models.errors import SchedulerError
+from models.errors import ScheduleConflictError, SchedulerError
 from models.requests import (
     SchedulerRequest,
     CreateScheduleResponse,
     ValidateScheduleResponse,
+    ScheduleJobResponse,
+    PreviewScheduleResponse,
+    PreviewSession,
+    PreviewMatch,
+    EventSchedulerRequest,
+    EventScheduleResponse,
+    DivisionScheduleResult,
+    RepairScheduleRequest,
+    RepairScheduleResponse,
+    ValidationSweepRequest,
+    ValidationSweepResponse,
+    SweepConfiguration,
 )
+from models.lems import DivisionSnapshot
+from models.scheduler import GeneratedSchedule, ScheduleReport
 from repository.lems_repository import LemsRepository
-from services.validator_service import ValidatorService
-from services.scheduler_service import SchedulerService
+from services import worker_pool
+from services.job_service import job_service, ScheduleJob
+from services.repair_service import ScheduleRepairService
+from services.report_service import report_division_schedule
+from config import (
+    IS_PRODUCTION,
+    MAX_SWEEP_CONFIGURATIONS,
+    SNAPSHOT_CACHE_TTL_SECONDS,
+)
+from metrics import PHASE_DURATION, count_error
+from timing import collect_timings, profiling, timed
 
 logger = logging.getLogger("lems.scheduler")
 router = APIRouter(prefix="/scheduler")
 
 
+@contextmanager
+def _timed_request(response: Response, profile: bool) -> Iterator[None]:
+    """Time the request and return its spans in a Server-Timing header, also on
+    errors. With `profile`, the worker calls of the request are profiled."""
+
+    if profile and IS_PRODUCTION:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling is not available in production",
+        )
+
+    with collect_timings() as timings, profiling(profile):
+        try:
+            with timed("total"):
+                yield
+        except HTTPException as error:
+            error.headers = {
+                **(error.headers or {}),
+                "Server-Timing": timings.server_timing(),
+            }
+            raise
+        finally:
+            response.headers["Server-Timing"] = timings.server_timing()
+            logger.info(
+                f"Request timings: {timings.totals()}",
+                extra={"timings": timings.totals()},
+            )
+
+
 @router.post("/validate")
 async def validate_schedule(
-    request: SchedulerRequest, response: Response
+    request: SchedulerRequest, response: Response, profile: bool = False
 ) -> ValidateScheduleResponse:
     logger.info(f"Validating schedule for division {request.division_id}")
     logger.debug(f"Request: {request}")
-    lems = LemsRepository(request.division_id)
 
-    validator = ValidatorService(lems, request)
+    with _timed_request(response, profile):
+        lems = LemsRepository(request.division_id)
+        with timed("snapshot"):
+            snapshot = await lems.get_snapshot(max_age=SNAPSHOT_CACHE_TTL_SECONDS)
 
-    try:
-        validator_data = validator.validate()
-    except ValidatorError as error:
-        logger.info(f"Validation failed: {error}")
-        response.status_code = status.HTTP_400_BAD_REQUEST
-        return ValidateScheduleResponse(
-            is_valid=False, error=str(error), data=error.data
-        )
+        try:
+            validation = await worker_pool.validate_schedule_cached(snapshot, request)
+        except ValidatorError as error:
+            count_error(error)
+            logger.info(f"Validation failed: {error}")
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ValidateScheduleResponse(
+                is_valid=False, error=str(error), data=error.data
+            )
 
     logger.info("Validation successful")
     response.status_code = status.HTTP_200_OK
-    return ValidateScheduleResponse(is_valid=True, data=validator_data)
+    return ValidateScheduleResponse(is_valid=True, data=validation.data)
+
+
+@router.post("/validate/sweep")
+async def sweep_validation(
+    request: ValidationSweepRequest, response: Response, profile: bool = False
+) -> ValidationSweepResponse:
+    """Validate every combination of the given parameter values and break layouts
+    on top of a base request, fetching the division once. Each configuration gets
+    the spare match slots of its tightest session and round."""
+    division_id = request.base.division_id
+    count = request.configuration_count()
+    logger.info(f"Sweeping {count} configurations for division {division_id}")
+
+    if count > MAX_SWEEP_CONFIGURATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A sweep can evaluate up to {MAX_SWEEP_CONFIGURATIONS} "
+            f"configurations, got {count}",
+        )
+
+    with _timed_request(response, profile):
+        lems = LemsRepository(division_id)
+        with timed("snapshot"):
+            snapshot = await lems.get_snapshot(max_age=SNAPSHOT_CACHE_TTL_SECONDS)
+
+        configurations = request.configurations()
+        slacks = await worker_pool.sweep_validation(
+            snapshot,
+            [
+                request.make_request(parameters, break_index)
+                for parameters, break_index in configurations
+            ],
+        )
+
+    results = [
+        SweepConfiguration(
+            parameters=parameters,
+            breaks_index=break_index,
+            is_valid=slack is None or slack[0] >= 0,
+            slack=slack[0] if slack else None,
+            tightest_session=slack[1] if slack else None,
+        )
+        for (parameters, break_index), slack in zip(configurations, slacks)
+    ]
+    return ValidationSweepResponse(
+        valid_count=sum(result.is_valid for result in results),
+        configurations=results,
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_schedule(
-    request: SchedulerRequest, response: Response
+    request: SchedulerRequest, response: Response, profile: bool = False
 ) -> CreateScheduleResponse:
     logger.info(f"Creating schedule for division {request.division_id}")
     logger.debug(f"Request: {request}")
 
-    lems = LemsRepository(request.division_id)
-    scheduler = SchedulerService(lems, request)
-
-    try:
-        match_schedule, session_schedule = scheduler.create_schedule()
-        lems.insert_sessions(session_schedule)
-        lems.insert_matches(match_schedule)
-
-        schedule_settings = {
-            "match_length": request.match_length_seconds,
-            "practice_cycle_time": request.practice_match_cycle_time_seconds,
-            "ranking_cycle_time": request.ranking_match_cycle_time_seconds,
-            "judging_session_length": request.judging_session_length_seconds,
-            "judging_session_cycle_time": request.judging_cycle_time_seconds,
-        }
-
-        lems.mark_schedule_complete(schedule_settings)
-    except SchedulerError as error:
-        lems.delete_schedule()
+    if job_service.get_active(request.division_id) is not None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error),
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A schedule is already being created for this division",
         )
 
+    with _timed_request(response, profile):
+        lems = LemsRepository(request.division_id)
+        with timed("snapshot"):
+            snapshot = await lems.get_snapshot()
+
+        try:
+            with timed("generate"):
+                schedule = await worker_pool.generate_schedule(snapshot, request)
+        except SchedulerError as error:
+            count_error(error)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(error),
+            )
+
+        try:
+            with timed("persist"):
+                await lems.save_schedule(
+                    schedule.match_schedule,
+                    schedule.session_schedule,
+                    request.schedule_settings(),
+                )
+        except SchedulerError as error:
+            count_error(error)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(error),
+            )
+
     logger.info("Schedule created successfully")
     response.status_code = status.HTTP_201_CREATED
     return CreateScheduleResponse(ok=True)
+
+
+async def _schedule_division(request: SchedulerRequest) -> DivisionScheduleResult:
+    """Fetch, generate and persist the schedule of one division of an event."""
+    division_id = request.division_id
+
+    if job_service.get_active(division_id) is not None:
+        return DivisionScheduleResult(
+            division_id=division_id,
+            ok=False,
+            error="A schedule is already being created for this division",
+        )
+
+    try:
+        lems = LemsRepository(division_id)
+        with timed("snapshot", division_id):
+            snapshot = await lems.get_snapshot()
+
+        with timed("generate", division_id):
+            schedule = await worker_pool.generate_schedule(snapshot, request)
+
+        with timed("persist", division_id):
+            await lems.save_schedule(
+                schedule.match_schedule,
+                schedule.session_schedule,
+                request.schedule_settings(),
+            )
+    except SchedulerError as error:
+        count_error(error)
+        logger.info(f"Scheduling division {division_id} failed: {error}")
+        return DivisionScheduleResult(
+            division_id=division_id, ok=False, error=str(error)
+        )
+    except httpx.HTTPError as error:
+        logger.error(f"Failed to fetch division {division_id}: {error}")
+        return DivisionScheduleResult(
+            division_id=division_id, ok=False, error="Failed to fetch division data"
+        )
+
+    logger.info(f"Division {division_id} scheduled successfully")
+    return DivisionScheduleResult(
+        division_id=division_id, ok=True, analysis=schedule.analysis
+    )
+
+
+@router.post("/event", status_code=status.HTTP_201_CREATED)
+async def create_event_schedule(
+    request: EventSchedulerRequest, response: Response, profile: bool = False
+) -> EventScheduleResponse:
+    """Schedule all divisions of an event in one call. The divisions are fetched,
+    generated and persisted concurrently, and each one succeeds or fails on its own.
+    Responds with 207 if any division failed."""
+    division_ids = [division.division_id for division in request.divisions]
+    logger.info(f"Creating schedules for divisions {division_ids}")
+
+    if len(set(division_ids)) != len(division_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each division can only be scheduled once per request",
+        )
+
+    with _timed_request(response, profile):
+        results = await asyncio.gather(
+            *(_schedule_division(division) for division in request.divisions)
+        )
+
+    ok = all(result.ok for result in results)
+    if not ok:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return EventScheduleResponse(ok=ok, divisions=results)
+
+
+def _make_preview_response(
+    schedule: GeneratedSchedule, snapshot: DivisionSnapshot
+) -> PreviewScheduleResponse:
+    team_ids = {team.slug: team.id for team in snapshot.teams}
+
+    sessions = schedule.session_schedule
+    room_ids = list(sessions.columns[2:])
+    session_teams = sessions[room_ids].to_numpy(dtype=object)
+
+    matches = schedule.match_schedule
+    table_ids = list(matches.columns[4:])
+    match_teams = matches[table_ids].to_numpy(dtype=object)
+
+    return PreviewScheduleResponse(
+        sessions=[
+            PreviewSession(
+                number=number,
+                start_time=start_time,
+                end_time=end_time,
+                rooms=dict(zip(room_ids, (team_ids.get(slug) for slug in teams))),
+            )
+            for number, start_time, end_time, teams in zip(
+                sessions.index.tolist(),
+                sessions["start_time"].tolist(),
+                sessions["end_time"].tolist(),
+                session_teams,
+            )
+        ],
+        matches=[
+            PreviewMatch(
+                number=number,
+                stage=stage,
+                round=round_number,
+                start_time=start_time,
+                end_time=end_time,
+                tables=dict(zip(table_ids, (team_ids.get(slug) for slug in teams))),
+            )
+            for number, stage, round_number, start_time, end_time, teams in zip(
+                matches.index.tolist(),
+                matches["stage"].tolist(),
+                matches["round"].tolist(),
+                matches["start_time"].tolist(),
+                matches["end_time"].tolist(),
+                match_teams,
+            )
+        ],
+        analysis=schedule.analysis,
+        seed=schedule.seed,
+        report=schedule.report,
+    )
+
+
+@router.post("/preview")
+async def preview_schedule(
+    request: SchedulerRequest, response: Response, profile: bool = False
+) -> PreviewScheduleResponse:
+    """Generate a schedule and return it without persisting anything."""
+    logger.info(f"Previewing schedule for division {request.division_id}")
+    logger.debug(f"Request: {request}")
+
+    with _timed_request(response, profile):
+        lems = LemsRepository(request.division_id)
+        with timed("snapshot"):
+            snapshot = await lems.get_snapshot(max_age=SNAPSHOT_CACHE_TTL_SECONDS)
+
+        try:
+            with timed("generate"):
+                schedule = await worker_pool.generate_schedule(
+                    snapshot, request, with_report=True
+                )
+        except SchedulerError as error:
+            count_error(error)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(error),
+            )
+
+        return _make_preview_response(schedule, snapshot)
+
+
+@router.post("/repair")
+async def repair_schedule(
+    request: RepairScheduleRequest, response: Response, dry_run: bool = False
+) -> RepairScheduleResponse:
+    """Apply a change to a persisted schedule by re-solving only the slots it
+    affects, and persist only the changed slots. With `dry_run`, the changed slots
+    are returned without persisting them."""
+    logger.info(
+        f"Repairing schedule for division {request.division_id}: "
+        f"{request.change.type}"
+    )
+    logger.debug(f"Request: {request}")
+
+    if job_service.get_active(request.division_id) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A schedule is being created for this division",
+        )
+
+    with _timed_request(response, profile=False):
+        lems = LemsRepository(request.division_id)
+        try:
+            with timed("snapshot"):
+                snapshot, schedule = await asyncio.gather(
+                    lems.get_snapshot(), lems.get_schedule()
+                )
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code != status.HTTP_404_NOT_FOUND:
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Division does not have a schedule",
+            )
+
+        try:
+            with timed("repair"), PHASE_DURATION.labels("repair").time():
+                service = ScheduleRepairService(snapshot, schedule, request.from_time)
+                repair = service.repair(request.change)
+        except SchedulerError as error:
+            count_error(error)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)
+            )
+
+        persisted = not dry_run and bool(repair.sessions or repair.matches)
+        if persisted:
+            try:
+                with timed("persist"):
+                    await lems.update_schedule(repair)
+            except ScheduleConflictError as error:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT, detail=str(error)
+                )
+            except SchedulerError as error:
+                count_error(error)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=str(error),
+                )
+
+    return RepairScheduleResponse(
+        sessions=repair.sessions,
+        matches=repair.matches,
+        affected_teams=repair.affected_teams,
+        minimum_gap_fallbacks=repair.minimum_gap_fallbacks,
+        persisted=persisted,
+    )
+
+
+@router.get("/report/{division_id}")
+async def report_schedule(division_id: str, response: Response) -> ScheduleReport:
+    """Report on the quality of the persisted schedule of a division: the gaps each
+    team gets between its events, back to back events and table diversity. Previews
+    include the same report, so a generated schedule can be compared with it."""
+    logger.info(f"Reporting on schedule for division {division_id}")
+
+    with _timed_request(response, profile=False):
+        lems = LemsRepository(division_id)
+        try:
+            with timed("snapshot"):
+                snapshot, schedule = await asyncio.gather(
+                    lems.get_snapshot(max_age=SNAPSHOT_CACHE_TTL_SECONDS),
+                    lems.get_schedule(),
+                )
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code != status.HTTP_404_NOT_FOUND:
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Division does not have a schedule",
+            )
+
+        with timed("report"):
+            return report_division_schedule(snapshot, schedule)
+
+
+def _make_job_response(job: ScheduleJob) -> ScheduleJobResponse:
+    return ScheduleJobResponse(
+        job_id=job.id,
+        division_id=job.division_id,
+        status=job.status,
+        phase=job.phase,
+        progress=job.progress,
+        error=job.error,
+    )
+
+
+def _get_job(job_id: str, division_id: Optional[str]) -> ScheduleJob:
+    """Get a job, as not found when it belongs to another division than the given
+    one."""
+
+    job = job_service.get(job_id)
+    if job is None or (division_id is not None and job.division_id != division_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_schedule_job(request: SchedulerRequest) -> ScheduleJobResponse:
+    logger.info(f"Starting schedule job for division {request.division_id}")
+    logger.debug(f"Request: {request}")
+
+    if job_service.get_active(request.division_id) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A schedule is already being created for this division",
+        )
+
+    job = job_service.start(request)
+    return _make_job_response(job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_schedule_job(
+    job_id: str, division_id: Optional[str] = None
+) -> ScheduleJobResponse:
+    return _make_job_response(_get_job(job_id, division_id))
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_schedule_job(
+    job_id: str, division_id: Optional[str] = None
+) -> ScheduleJobResponse:
+    job = _get_job(job_id, division_id)
+    logger.info(f"Cancelling schedule job {job.id}")
+    if not job_service.cancel(job):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The schedule is being saved and can no longer be cancelled",
+        )
+    return _make_job_response(job)
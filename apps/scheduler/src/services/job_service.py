@@ -0,0 +1,178 @@
+import time
+import uuid
+import asyncio
+import logging
+import multiprocessing
+from dataclasses import dataclass, field
+from multiprocessing.managers import SyncManager
+from typing import Optional, get_args
+
+from config import JOB_RETENTION_SECONDS
+from metrics import JOBS_IN_FLIGHT, count_error
+from models.errors import SchedulerError, SchedulerCancelledError
+from models.lems import DivisionSnapshot
+from models.requests import SchedulerRequest
+from models.scheduler import JobStatus, SchedulePhase
+from repository.lems_repository import LemsRepository
+from services import worker_pool
+
+logger = logging.getLogger("lems.scheduler")
+
+PHASES: tuple[SchedulePhase, ...] = get_args(SchedulePhase)
+
+
+class JobProgressReporter:
+    """Passed to the scheduler in the worker process as its `on_phase` callback.
+    Publishes the current phase to the main process and stops the generation at the
+    next phase boundary once the job is cancelled."""
+
+    def __init__(self, state, cancelled):
+        self.state = state
+        self.cancelled = cancelled
+
+    def __call__(self, phase: SchedulePhase):
+        if self.cancelled.is_set():
+            raise SchedulerCancelledError("Schedule generation was cancelled")
+        self.state["phase"] = phase
+
+
+@dataclass
+class ScheduleJob:
+    id: str
+    division_id: str
+    reporter: JobProgressReporter
+    status: JobStatus = "pending"
+    error: Optional[str] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def phase(self) -> Optional[SchedulePhase]:
+        return self.reporter.state.get("phase")
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the generation phases that have been completed."""
+        if self.status == "completed":
+            return 1.0
+        if self.phase is None:
+            return 0.0
+        return PHASES.index(self.phase) / len(PHASES)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("pending", "running")
+
+
+class JobService:
+    """Runs schedule generation and persistence in the background, so callers get a
+    job id immediately and poll for its status instead of holding a connection open.
+    Jobs are kept in memory and forgotten JOB_RETENTION_SECONDS after they finish."""
+
+    def __init__(self):
+        self._jobs: dict[str, ScheduleJob] = {}
+        self._manager: SyncManager | None = None
+
+    def _get_manager(self) -> SyncManager:
+        # Shared state has to live in a manager process to be visible to the workers
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None
+            and now - job.finished_at > JOB_RETENTION_SECONDS
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[ScheduleJob]:
+        return self._jobs.get(job_id)
+
+    def get_active(self, division_id: str) -> Optional[ScheduleJob]:
+        return next(
+            (
+                job
+                for job in self._jobs.values()
+                if job.division_id == division_id and job.is_active
+            ),
+            None,
+        )
+
+    def start(self, request: SchedulerRequest) -> ScheduleJob:
+        """Start a background job that generates and persists a division schedule."""
+        self._prune()
+
+        manager = self._get_manager()
+        reporter = JobProgressReporter(manager.dict(), manager.Event())
+        job = ScheduleJob(
+            id=str(uuid.uuid4()), division_id=request.division_id, reporter=reporter
+        )
+        self._jobs[job.id] = job
+
+        job.task = asyncio.create_task(self._run(job, request))
+        logger.info(f"Started schedule job {job.id} for division {job.division_id}")
+        return job
+
+    def cancel(self, job: ScheduleJob) -> bool:
+        """Stop the job at the next phase boundary. Once the schedule is being
+        persisted the job runs to its real outcome, as the backend saves it in one
+        transaction that may commit regardless, and False is returned."""
+        if not job.is_active:
+            return True
+        if job.phase == "persist":
+            return False
+
+        job.reporter.cancelled.set()
+        return True
+
+    async def _run(self, job: ScheduleJob, request: SchedulerRequest):
+        job.status = "running"
+        JOBS_IN_FLIGHT.inc()
+        try:
+            lems = LemsRepository(request.division_id)
+            snapshot: DivisionSnapshot = await lems.get_snapshot()
+
+            schedule = await worker_pool.generate_schedule(
+                snapshot, request, on_phase=job.reporter
+            )
+
+            job.reporter("persist")
+            await lems.save_schedule(
+                schedule.match_schedule,
+                schedule.session_schedule,
+                request.schedule_settings(),
+            )
+            job.status = "completed"
+            logger.info(f"Schedule job {job.id} completed")
+        except (SchedulerCancelledError, asyncio.CancelledError):
+            job.status = "cancelled"
+            logger.info(f"Schedule job {job.id} cancelled")
+        except SchedulerError as error:
+            count_error(error)
+            job.status = "failed"
+            job.error = str(error)
+            logger.info(f"Schedule job {job.id} failed: {error}")
+        except Exception as error:
+            job.status = "failed"
+            job.error = "Internal error while creating the schedule"
+            logger.exception(f"Schedule job {job.id} failed: {error}")
+        finally:
+            JOBS_IN_FLIGHT.dec()
+            job.finished_at = time.monotonic()
+
+    def shutdown(self):
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+job_service = JobService()
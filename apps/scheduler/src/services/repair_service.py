@@ -0,0 +1,647 @@
+import logging
+import math
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+import numpy as np
+
+from models.errors import SchedulerError
+from models.lems import DivisionSchedule, DivisionSnapshot
+from models.requests import (
+    ScheduleChange,
+    SessionMoved,
+    TableDisabled,
+    TeamAdded,
+    TeamRemoved,
+)
+from models.scheduler import (
+    EMPTY_SLOT,
+    MatchSlotChange,
+    ScheduleRepair,
+    SessionSlotChange,
+)
+from services.team_timeline import TeamTimeline
+from config import MIN_MINUTES_BETWEEN_EVENTS
+
+logger = logging.getLogger("lems.scheduler")
+
+Slot = tuple[int, int]
+
+
+class ScheduleRepairService:
+    """Repairs a persisted division schedule after a change, without regenerating it.
+
+    The schedule is loaded into the same grids SchedulerService builds: the team index
+    per (session, room) and per (match, table), with EMPTY_SLOT for empty slots and
+    epoch seconds for times. Only the slots touched by the change are cleared, and the
+    teams that lost a match are placed again in the same round under the generation
+    constraints: one match per round, the per-table play limit, staggering, and
+    MIN_MINUTES_BETWEEN_EVENTS between the starts of a team's events. Another team is
+    only moved when the affected team fits in no free slot, so a repair disturbs as
+    few teams as possible.
+    """
+
+    def __init__(
+        self,
+        snapshot: DivisionSnapshot,
+        schedule: DivisionSchedule,
+        from_time: Optional[datetime] = None,
+    ):
+        self.from_time = int(from_time.timestamp()) if from_time else None
+        self.session_length = schedule.session_length_seconds
+        self.team_names = {team.id: team.slug for team in snapshot.teams}
+        self.timeline = TeamTimeline()
+        self.minimum_gap_fallbacks = 0
+        self.disabled_tables: set[int] = set()
+        self.moved_session_rows: set[int] = set()
+        # Slot writes in order, as (kind, row, column, previous team), for rollbacks
+        self._journal: list[tuple[Literal["session", "match"], int, int, int]] = []
+
+        # Teams that left the division may still be in the schedule
+        scheduled_team_ids = [session.team_id for session in schedule.sessions] + [
+            team_id for match in schedule.matches for team_id in match.tables.values()
+        ]
+        self.team_ids = list(
+            dict.fromkeys(
+                [team.id for team in snapshot.teams]
+                + [team_id for team_id in scheduled_team_ids if team_id is not None]
+            )
+        )
+        self.team_indexes = {team_id: i for i, team_id in enumerate(self.team_ids)}
+
+        # Staggering splits the tables in snapshot order, as during generation
+        self.room_ids = list(
+            dict.fromkeys(
+                [room.id for room in snapshot.rooms]
+                + [session.room_id for session in schedule.sessions]
+            )
+        )
+        self.table_ids = list(
+            dict.fromkeys(
+                [table.id for table in snapshot.tables]
+                + [table_id for match in schedule.matches for table_id in match.tables]
+            )
+        )
+
+        self._load_sessions(schedule)
+        self._load_matches(schedule)
+        self.original_session_grid = self.session_grid.copy()
+        self.original_match_grid = self.match_grid.copy()
+
+        self.staggered = self._is_staggered()
+        ranking_rounds = len(np.unique(self.match_round[self.match_stage == "ranking"]))
+        self.table_limit = (
+            math.ceil(len(self.table_ids) / ranking_rounds)
+            if ranking_rounds
+            else len(self.table_ids)
+        )
+
+    def _load_sessions(self, schedule: DivisionSchedule):
+        numbers = sorted({session.number for session in schedule.sessions})
+        self.session_rows = {number: row for row, number in enumerate(numbers)}
+        self.session_numbers = np.array(numbers, dtype=np.int32)
+        self.session_start = np.zeros(len(numbers), dtype=np.int64)
+        self.session_grid = np.full(
+            (len(numbers), len(self.room_ids)), EMPTY_SLOT, dtype=np.int32
+        )
+        # Rooms of the snapshot may have no stored slot in a session
+        self.session_stored = np.zeros(self.session_grid.shape, dtype=bool)
+        room_columns = {room_id: i for i, room_id in enumerate(self.room_ids)}
+
+        for session in schedule.sessions:
+            row = self.session_rows[session.number]
+            column = room_columns[session.room_id]
+            self.session_start[row] = int(session.scheduled_time.timestamp())
+            self.session_stored[row, column] = True
+            if session.team_id is not None:
+                self.session_grid[row, column] = self.team_indexes[session.team_id]
+        self.session_end = self.session_start + self.session_length
+
+        for row, room in zip(*np.nonzero(self.session_grid != EMPTY_SLOT)):
+            self.timeline.add(
+                int(self.session_grid[row, room]),
+                int(self.session_start[row]),
+                int(self.session_end[row]),
+            )
+
+    def _load_matches(self, schedule: DivisionSchedule):
+        matches = sorted(schedule.matches, key=lambda match: match.number)
+        self.match_numbers = np.array([m.number for m in matches], dtype=np.int32)
+        self.match_stage = np.array([m.stage for m in matches])
+        self.match_round = np.array([m.round for m in matches], dtype=np.int32)
+        self.match_start = np.array(
+            [int(m.scheduled_time.timestamp()) for m in matches], dtype=np.int64
+        )
+        self.match_end = self.match_start + schedule.match_length_seconds
+        self.match_grid = np.full(
+            (len(matches), len(self.table_ids)), EMPTY_SLOT, dtype=np.int32
+        )
+        self.round_play_counts: dict[tuple[str, int], np.ndarray] = {}
+        self.table_play_counts: dict[str, np.ndarray] = {}
+        table_columns = {table_id: i for i, table_id in enumerate(self.table_ids)}
+
+        for row, match in enumerate(matches):
+            for table_id, team_id in match.tables.items():
+                if team_id is not None:
+                    self._write_match_slot(
+                        row, table_columns[table_id], self.team_indexes[team_id]
+                    )
+
+    def _is_staggered(self) -> bool:
+        """Schedules do not store whether matches are staggered, so it is inferred
+        from the occupied slots: odd matches only use the first half of the tables
+        and even matches only the second half."""
+
+        half = len(self.table_ids) // 2
+        rows, tables = np.nonzero(self.match_grid != EMPTY_SLOT)
+        if half == 0 or len(rows) == 0:
+            return False
+
+        odd_matches = self.match_numbers[rows] % 2 == 1
+        return bool(np.all((tables < half) == odd_matches))
+
+    def _get_available_tables(self, row: int) -> np.ndarray:
+        """Get the table indices a match can use, respecting staggering and
+        disabled tables."""
+
+        tables = np.arange(len(self.table_ids))
+        if self.staggered:
+            half = len(tables) // 2
+            tables = (
+                tables[:half] if self.match_numbers[row] % 2 == 1 else tables[half:]
+            )
+        return np.array(
+            [table for table in tables if table not in self.disabled_tables],
+            dtype=np.int64,
+        )
+
+    def _is_open(self, start_time: int) -> bool:
+        """Check if a slot starting at this time can still be changed."""
+        return self.from_time is None or start_time >= self.from_time
+
+    def _get_round_play_counts(self, stage: str, round_num: int) -> np.ndarray:
+        key = (stage, round_num)
+        if key not in self.round_play_counts:
+            self.round_play_counts[key] = np.zeros(len(self.team_ids), dtype=np.int32)
+        return self.round_play_counts[key]
+
+    def _get_table_play_counts(self, stage: str) -> np.ndarray:
+        if stage not in self.table_play_counts:
+            self.table_play_counts[stage] = np.zeros(
+                (len(self.team_ids), len(self.table_ids)), dtype=np.int32
+            )
+        return self.table_play_counts[stage]
+
+    def _write_match_slot(self, row: int, table: int, team: int):
+        """Write a team, or EMPTY_SLOT, into a match slot and keep the team
+        timelines and play counts in sync."""
+
+        stage, round_num = str(self.match_stage[row]), int(self.match_round[row])
+        start_time, end_time = int(self.match_start[row]), int(self.match_end[row])
+
+        previous_team = int(self.match_grid[row, table])
+        if previous_team != EMPTY_SLOT:
+            self.timeline.remove(previous_team, start_time, end_time)
+            self._get_round_play_counts(stage, round_num)[previous_team] -= 1
+            self._get_table_play_counts(stage)[previous_team, table] -= 1
+
+        self.match_grid[row, table] = team
+        if team != EMPTY_SLOT:
+            self.timeline.add(team, start_time, end_time)
+            self._get_round_play_counts(stage, round_num)[team] += 1
+            self._get_table_play_counts(stage)[team, table] += 1
+
+    def _write_session_slot(self, row: int, room: int, team: int):
+        start_time, end_time = int(self.session_start[row]), int(self.session_end[row])
+
+        previous_team = int(self.session_grid[row, room])
+        if previous_team != EMPTY_SLOT:
+            self.timeline.remove(previous_team, start_time, end_time)
+
+        self.session_grid[row, room] = team
+        if team != EMPTY_SLOT:
+            self.timeline.add(team, start_time, end_time)
+
+    def _set_match_slot(self, row: int, table: int, team: int):
+        self._journal.append(("match", row, table, int(self.match_grid[row, table])))
+        self._write_match_slot(row, table, team)
+
+    def _set_session_slot(self, row: int, room: int, team: int):
+        self._journal.append(("session", row, room, int(self.session_grid[row, room])))
+        self._write_session_slot(row, room, team)
+
+    def _rollback(self, checkpoint: int):
+        """Undo the slot writes made since `checkpoint`, a length of the journal."""
+        while len(self._journal) > checkpoint:
+            kind, row, column, team = self._journal.pop()
+            if kind == "match":
+                self._write_match_slot(row, column, team)
+            else:
+                self._write_session_slot(row, column, team)
+
+    def _fits(self, team: int, start_time: int, end_time: int, strict=True) -> bool:
+        """Check if an event fits between a team's other events. Events never
+        overlap, and with `strict` their starts are at least the minimum gap apart."""
+
+        min_gap_seconds = MIN_MINUTES_BETWEEN_EVENTS * 60
+        for other_start, other_end in self.timeline.events(team):
+            if other_start < end_time and start_time < other_end:
+                return False
+            if strict and abs(start_time - other_start) < min_gap_seconds:
+                return False
+        return True
+
+    def _slack(self, team: int, start_time: int) -> float:
+        """Seconds between an event start and the nearest start of the team's other
+        events."""
+        return min(
+            (abs(start_time - other) for other, _ in self.timeline.events(team)),
+            default=math.inf,
+        )
+
+    def _get_round_rows(self, stage: str, round_num: int) -> np.ndarray:
+        """Rows of the matches of a round that can still be changed, by start time."""
+        rows = np.flatnonzero(
+            (self.match_stage == stage) & (self.match_round == round_num)
+        )
+        rows = [int(row) for row in rows if self._is_open(int(self.match_start[row]))]
+        return sorted(rows, key=lambda row: self.match_start[row])
+
+    def _get_free_slots(self, stage: str, round_num: int) -> list[Slot]:
+        return [
+            (row, int(table))
+            for row in self._get_round_rows(stage, round_num)
+            for table in self._get_available_tables(row)
+            if self.match_grid[row, table] == EMPTY_SLOT
+        ]
+
+    def _best_slot(
+        self,
+        team: int,
+        slots: list[Slot],
+        preferred_row: Optional[int] = None,
+        strict=True,
+    ) -> Optional[Slot]:
+        """Pick the slot a team fits best in: the preferred match first, then a table
+        the team has not played on in the stage, then the largest gap to its other
+        events."""
+
+        best_slot, best_key = None, None
+        for row, table in slots:
+            table_counts = self._get_table_play_counts(str(self.match_stage[row]))
+            if table_counts[team, table] > self.table_limit:
+                continue
+
+            start_time = int(self.match_start[row])
+            if not self._fits(team, start_time, int(self.match_end[row]), strict):
+                continue
+
+            key = (
+                row == preferred_row,
+                table_counts[team, table] == 0,
+                self._slack(team, start_time),
+            )
+            if best_key is None or key > best_key:
+                best_slot, best_key = (row, table), key
+
+        return best_slot
+
+    def _displace(
+        self,
+        team: int,
+        stage: str,
+        round_num: int,
+        free_slots: list[Slot],
+        preferred_row: Optional[int],
+    ) -> bool:
+        """Place a team in an occupied slot of the round whose team can move to a free
+        slot instead. Moves a single other team."""
+
+        rows = self._get_round_rows(stage, round_num)
+        if preferred_row in rows:
+            rows.remove(preferred_row)
+            rows.insert(0, preferred_row)
+
+        for row in rows:
+            for table in self._get_available_tables(row):
+                table = int(table)
+                other_team = int(self.match_grid[row, table])
+                if other_team in (EMPTY_SLOT, team):
+                    continue
+                if self._best_slot(team, [(row, table)]) is None:
+                    continue
+
+                checkpoint = len(self._journal)
+                self._set_match_slot(row, table, EMPTY_SLOT)
+                other_slot = self._best_slot(other_team, free_slots)
+                if other_slot is not None:
+                    self._set_match_slot(*other_slot, other_team)
+                    self._set_match_slot(row, table, team)
+                    return True
+                self._rollback(checkpoint)
+
+        return False
+
+    def _place_match(
+        self,
+        team: int,
+        stage: str,
+        round_num: int,
+        preferred_row: Optional[int] = None,
+        fallback=True,
+    ):
+        """Place a team in one match of a round. Tries a free slot, then moving one
+        other team, and with `fallback` a free slot that does not meet the minimum
+        gap, like generation does when no team meets it."""
+
+        free_slots = self._get_free_slots(stage, round_num)
+
+        slot = self._best_slot(team, free_slots, preferred_row)
+        if slot is not None:
+            self._set_match_slot(*slot, team)
+            return
+
+        if self._displace(team, stage, round_num, free_slots, preferred_row):
+            return
+
+        if fallback:
+            slot = self._best_slot(team, free_slots, preferred_row, strict=False)
+            if slot is not None:
+                logger.warning(
+                    f"No slot meets the minimum gap for team {self._team_name(team)} "
+                    f"in {stage} round {round_num}. Assigning the best slot anyway."
+                )
+                self.minimum_gap_fallbacks += 1
+                self._set_match_slot(*slot, team)
+                return
+
+        raise SchedulerError(
+            f"No free slot for team {self._team_name(team)} in {stage} round "
+            f"{round_num}"
+        )
+
+    def _team_name(self, team: int) -> str:
+        team_id = self.team_ids[team]
+        return self.team_names.get(team_id, team_id)
+
+    def _get_team_index(self, team_id: str) -> int:
+        if team_id not in self.team_indexes:
+            raise SchedulerError(f"Team {team_id} is not in this division")
+        return self.team_indexes[team_id]
+
+    def _remove_team(self, team_id: str):
+        """Clear the open slots of a team. Nobody is moved into them."""
+
+        team = self._get_team_index(team_id)
+        session_slots = np.argwhere(self.session_grid == team)
+        match_slots = np.argwhere(self.match_grid == team)
+        if len(session_slots) == 0 and len(match_slots) == 0:
+            raise SchedulerError(f"Team {self._team_name(team)} is not in the schedule")
+
+        for row, room in session_slots:
+            if self._is_open(int(self.session_start[row])):
+                self._set_session_slot(int(row), int(room), EMPTY_SLOT)
+        for row, table in match_slots:
+            if self._is_open(int(self.match_start[row])):
+                self._set_match_slot(int(row), int(table), EMPTY_SLOT)
+
+    def _add_team(self, team_id: str):
+        """Give a new team a free judging session and a match in every open round.
+        Each free session is tried in turn, first with free match slots only, then
+        also moving other teams, before falling back to slots that miss the gap."""
+
+        team = self._get_team_index(team_id)
+        if (self.session_grid == team).any() or (self.match_grid == team).any():
+            raise SchedulerError(
+                f"Team {self._team_name(team)} is already in the schedule"
+            )
+
+        free_sessions = sorted(
+            (
+                (int(row), int(room))
+                for row, room in np.argwhere(self.session_grid == EMPTY_SLOT)
+                if self._is_open(int(self.session_start[row]))
+            ),
+            key=lambda slot: self.session_start[slot[0]],
+        )
+        if not free_sessions:
+            raise SchedulerError(
+                f"No free judging session for team {self._team_name(team)}"
+            )
+
+        rounds = sorted(
+            {
+                (str(self.match_stage[row]), int(self.match_round[row]))
+                for row in range(len(self.match_numbers))
+                if self._is_open(int(self.match_start[row]))
+            },
+            key=lambda key: min(self.match_start[self._get_round_rows(*key)]),
+        )
+
+        for displace in (False, True):
+            for session_slot in free_sessions:
+                checkpoint = len(self._journal)
+                self._set_session_slot(*session_slot, team)
+                try:
+                    for stage, round_num in rounds:
+                        if displace:
+                            self._place_match(team, stage, round_num, fallback=False)
+                            continue
+                        slot = self._best_slot(
+                            team, self._get_free_slots(stage, round_num)
+                        )
+                        if slot is None:
+                            raise SchedulerError("No free slot")
+                        self._set_match_slot(*slot, team)
+                    return
+                except SchedulerError:
+                    self._rollback(checkpoint)
+
+        self._set_session_slot(*free_sessions[0], team)
+        for stage, round_num in rounds:
+            self._place_match(team, stage, round_num)
+
+    def _disable_table(self, table_id: str):
+        """Take a table out of the open matches and place its teams again, in the
+        same match whenever another table is free.
+
+        Rounds are not extended: the teams of the table can only move to free slots
+        of the existing matches of their round, so a round that fills every table
+        cannot lose one."""
+
+        if table_id not in self.table_ids:
+            raise SchedulerError(f"Table {table_id} is not in the schedule")
+        table = self.table_ids.index(table_id)
+        self.disabled_tables.add(table)
+
+        rows = [
+            int(row)
+            for row in np.flatnonzero(self.match_grid[:, table] != EMPTY_SLOT)
+            if self._is_open(int(self.match_start[row]))
+        ]
+
+        displaced = Counter(
+            (str(self.match_stage[row]), int(self.match_round[row])) for row in rows
+        )
+        for (stage, round_num), count in displaced.items():
+            free = len(self._get_free_slots(stage, round_num))
+            if free < count:
+                raise SchedulerError(
+                    f"Table {table_id} has {count} teams in {stage} round "
+                    f"{round_num}, but the other tables only have {free} free slots "
+                    f"in the round. Add matches to the round to disable the table."
+                )
+
+        for row in sorted(rows, key=lambda row: self.match_start[row]):
+            team = int(self.match_grid[row, table])
+            self._set_match_slot(row, table, EMPTY_SLOT)
+            self._place_match(
+                team,
+                str(self.match_stage[row]),
+                int(self.match_round[row]),
+                preferred_row=row,
+            )
+
+    def _move_session(self, number: int, start_time: datetime):
+        """Move a judging session to a new time, and place the matches of its teams
+        that no longer meet the minimum gap again."""
+
+        if number not in self.session_rows:
+            raise SchedulerError(f"Session {number} is not in the schedule")
+        row = self.session_rows[number]
+
+        old_start, old_end = int(self.session_start[row]), int(self.session_end[row])
+        new_start = int(start_time.timestamp())
+        new_end = new_start + self.session_length
+        if not (self._is_open(old_start) and self._is_open(new_start)):
+            raise SchedulerError(
+                f"Session {number} can only be moved from and to open times"
+            )
+
+        occupied = self.session_grid[row] != EMPTY_SLOT
+        for other_row in np.flatnonzero(
+            (self.session_start < new_end) & (new_start < self.session_end)
+        ):
+            if (
+                other_row != row
+                and (occupied & (self.session_grid[other_row] != EMPTY_SLOT)).any()
+            ):
+                raise SchedulerError(
+                    f"Session {number} would overlap session "
+                    f"{self.session_numbers[other_row]} in the same room"
+                )
+
+        teams = [int(team) for team in self.session_grid[row][occupied]]
+        for team in teams:
+            self.timeline.remove(team, old_start, old_end)
+            self.timeline.add(team, new_start, new_end)
+        self.session_start[row], self.session_end[row] = new_start, new_end
+        self.moved_session_rows.add(row)
+
+        for team in teams:
+            for match_row, table in np.argwhere(self.match_grid == team):
+                match_row, table = int(match_row), int(table)
+                match_start = int(self.match_start[match_row])
+
+                self.timeline.remove(team, match_start, int(self.match_end[match_row]))
+                conflicts = not self._fits(
+                    team, match_start, int(self.match_end[match_row])
+                )
+                self.timeline.add(team, match_start, int(self.match_end[match_row]))
+                if not conflicts:
+                    continue
+
+                if not self._is_open(match_start):
+                    raise SchedulerError(
+                        f"Session {number} conflicts with match "
+                        f"{self.match_numbers[match_row]} of team "
+                        f"{self._team_name(team)}, which can no longer change"
+                    )
+                self._set_match_slot(match_row, table, EMPTY_SLOT)
+                self._place_match(
+                    team,
+                    str(self.match_stage[match_row]),
+                    int(self.match_round[match_row]),
+                )
+
+    def _get_repair(self) -> ScheduleRepair:
+        """Collect the slots that differ from the persisted schedule."""
+
+        def team_id(team: int) -> Optional[str]:
+            return None if team == EMPTY_SLOT else self.team_ids[team]
+
+        affected_teams: set[int] = set()
+
+        sessions: list[SessionSlotChange] = []
+        session_changed = self.session_grid != self.original_session_grid
+        # A moved session changes the time of every stored room, empty or not
+        for row in sorted(self.moved_session_rows):
+            session_changed[row] |= self.session_stored[row]
+        for row, room in np.argwhere(session_changed):
+            previous, team = (
+                self.original_session_grid[row, room],
+                self.session_grid[row, room],
+            )
+            affected_teams.update((int(previous), int(team)))
+            moved = row in self.moved_session_rows
+            sessions.append(
+                {
+                    "number": int(self.session_numbers[row]),
+                    "room_id": self.room_ids[room],
+                    "previous_team_id": team_id(previous),
+                    "team_id": team_id(team),
+                    "scheduled_time": (
+                        datetime.fromtimestamp(
+                            int(self.session_start[row]), timezone.utc
+                        )
+                        if moved
+                        else None
+                    ),
+                }
+            )
+
+        matches: list[MatchSlotChange] = []
+        for row, table in np.argwhere(self.match_grid != self.original_match_grid):
+            previous, team = (
+                self.original_match_grid[row, table],
+                self.match_grid[row, table],
+            )
+            affected_teams.update((int(previous), int(team)))
+            matches.append(
+                {
+                    "number": int(self.match_numbers[row]),
+                    "stage": str(self.match_stage[row]),
+                    "round": int(self.match_round[row]),
+                    "table_id": self.table_ids[table],
+                    "previous_team_id": team_id(previous),
+                    "team_id": team_id(team),
+                }
+            )
+
+        affected_teams.discard(EMPTY_SLOT)
+        return ScheduleRepair(
+            sessions=sessions,
+            matches=matches,
+            affected_teams=[self.team_ids[team] for team in sorted(affected_teams)],
+            minimum_gap_fallbacks=self.minimum_gap_fallbacks,
+        )
+
+    def repair(self, change: ScheduleChange) -> ScheduleRepair:
+        """Apply a change to the schedule and return the slots to update."""
+
+        if isinstance(change, TeamRemoved):
+            self._remove_team(change.team_id)
+        elif isinstance(change, TeamAdded):
+            self._add_team(change.team_id)
+        elif isinstance(change, TableDisabled):
+            self._disable_table(change.table_id)
+        elif isinstance(change, SessionMoved):
+            self._move_session(change.number, change.start_time)
+
+        repair = self._get_repair()
+        logger.info(
+            f"Repair changed {len(repair.sessions)} session slots and "
+            f"{len(repair.matches)} match slots of {len(repair.affected_teams)} teams"
+        )
+        return repair
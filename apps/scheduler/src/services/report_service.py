@@ -0,0 +1,253 @@
+from typing import Optional
+
+import numpy as np
+
+from config import BACK_TO_BACK_GAP_SECONDS, GAP_HISTOGRAM_BIN_SECONDS
+from models.lems import DivisionSchedule, DivisionSnapshot
+from models.scheduler import (
+    EMPTY_SLOT,
+    GapHistogramBin,
+    ScheduleAnalysis,
+    ScheduleReport,
+    TeamReport,
+)
+
+
+def _melt(grid: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The team, row and column of every filled slot of a grid."""
+    rows, columns = np.nonzero(grid != EMPTY_SLOT)
+    return grid[rows, columns].astype(np.int64), rows, columns
+
+
+def _nan_to_none(values: np.ndarray) -> list[Optional[float]]:
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+class ScheduleReportService:
+    """Quality statistics of a schedule, computed from the grids SchedulerService
+    builds.
+
+    Both grids are melted into one table of team events, sorted by team and start
+    time, so the gaps of all teams come from a single diff and the per-team
+    statistics from grouped reductions over it.
+    """
+
+    def __init__(
+        self,
+        team_count: int,
+        session_grid: np.ndarray,
+        session_start: np.ndarray,
+        session_end: np.ndarray,
+        match_grid: np.ndarray,
+        match_start: np.ndarray,
+        match_end: np.ndarray,
+        match_stage: np.ndarray,
+    ):
+        self.team_count = team_count
+
+        session_teams, session_rows, _ = _melt(session_grid)
+        match_teams, match_rows, match_tables = _melt(match_grid)
+
+        teams = np.concatenate([session_teams, match_teams])
+        starts = np.concatenate([session_start[session_rows], match_start[match_rows]])
+        ends = np.concatenate([session_end[session_rows], match_end[match_rows]])
+        order = np.lexsort((starts, teams))
+        teams, starts, ends = teams[order], starts[order], ends[order]
+
+        self.event_counts = np.bincount(teams, minlength=team_count)
+        same_team = teams[1:] == teams[:-1]
+        self.gaps = (starts[1:] - ends[:-1])[same_team]
+        self.gap_teams = teams[1:][same_team]
+
+        # Which tables every team plays on, per stage
+        self.stages = list(dict.fromkeys(match_stage.tolist()))
+        stage_codes = np.array(
+            [self.stages.index(stage) for stage in match_stage.tolist()], dtype=np.intp
+        )
+        self.table_usage = np.zeros(
+            (len(self.stages), team_count, match_grid.shape[1]), dtype=bool
+        )
+        self.table_usage[stage_codes[match_rows], match_teams, match_tables] = True
+
+    def _team_gaps(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Minimum, average and maximum gap per team, NaN for teams without gaps."""
+
+        minimum, average, maximum = np.full((3, self.team_count), np.nan)
+        if len(self.gaps) == 0:
+            return minimum, average, maximum
+
+        # Gaps are sorted by team, so each team's gaps are one contiguous group
+        group_starts = np.flatnonzero(
+            np.concatenate([[True], self.gap_teams[1:] != self.gap_teams[:-1]])
+        )
+        group_teams = self.gap_teams[group_starts]
+        group_sizes = np.diff(np.append(group_starts, len(self.gaps)))
+
+        minimum[group_teams] = np.minimum.reduceat(self.gaps, group_starts)
+        maximum[group_teams] = np.maximum.reduceat(self.gaps, group_starts)
+        average[group_teams] = np.add.reduceat(self.gaps, group_starts) / group_sizes
+        return minimum, average, maximum
+
+    def _stage_unique_tables(self) -> dict[str, np.ndarray]:
+        """Distinct tables per team, for every stage with a scheduled team."""
+        counts = self.table_usage.sum(axis=2)
+        return {
+            stage: stage_counts
+            for stage, stage_counts in zip(self.stages, counts)
+            if stage_counts.any()
+        }
+
+    def _gap_histogram(self) -> list[GapHistogramBin]:
+        if len(self.gaps) == 0:
+            return []
+
+        width = GAP_HISTOGRAM_BIN_SECONDS
+        first_bin = int(self.gaps.min()) // width
+        counts = np.bincount(self.gaps // width - first_bin)
+        return [
+            {
+                "start_seconds": (first_bin + i) * width,
+                "end_seconds": (first_bin + i + 1) * width,
+                "count": int(count),
+            }
+            for i, count in enumerate(counts)
+        ]
+
+    def analysis(self, minimum_gap_fallbacks: int = 0) -> ScheduleAnalysis:
+        """The summary SchedulerService logs and ranks attempts by. The average gap is
+        the average of the team averages, and the per-stage table averages are over
+        the teams that play in the stage."""
+
+        minimum, average, _ = self._team_gaps()
+        has_gaps = ~np.isnan(minimum)
+        all_tables = self.table_usage.any(axis=0).sum(axis=1)
+
+        return {
+            "average_gap_seconds": (
+                float(average[has_gaps].mean()) if has_gaps.any() else 0.0
+            ),
+            "minimum_gap_seconds": (
+                float(minimum[has_gaps].min()) if has_gaps.any() else 0.0
+            ),
+            "average_unique_tables": (
+                float(all_tables.mean()) if self.team_count else 0.0
+            ),
+            "stage_unique_tables": {
+                stage: float(tables[tables > 0].mean())
+                for stage, tables in self._stage_unique_tables().items()
+            },
+            "minimum_gap_fallbacks": minimum_gap_fallbacks,
+        }
+
+    def report(
+        self, team_ids: list[str], team_numbers: list[Optional[int]]
+    ) -> ScheduleReport:
+        """The full report, with the teams labelled by the ids and numbers of their
+        indexes."""
+
+        minimum, average, maximum = (
+            _nan_to_none(values) for values in self._team_gaps()
+        )
+        event_counts = self.event_counts.tolist()
+        back_to_back = np.bincount(
+            self.gap_teams[self.gaps < BACK_TO_BACK_GAP_SECONDS],
+            minlength=self.team_count,
+        )
+        back_to_back_counts = back_to_back.tolist()
+        stage_tables = {
+            stage: tables.tolist()
+            for stage, tables in self._stage_unique_tables().items()
+        }
+        analysis = self.analysis()
+
+        teams: list[TeamReport] = [
+            {
+                "team_id": team_ids[team],
+                "team_number": team_numbers[team],
+                "event_count": event_counts[team],
+                "minimum_gap_seconds": minimum[team],
+                "average_gap_seconds": average[team],
+                "maximum_gap_seconds": maximum[team],
+                "back_to_back_count": back_to_back_counts[team],
+                "unique_tables": {
+                    stage: tables[team]
+                    for stage, tables in stage_tables.items()
+                    if tables[team]
+                },
+            }
+            for team in range(self.team_count)
+        ]
+
+        return {
+            "team_count": self.team_count,
+            "minimum_gap_seconds": analysis["minimum_gap_seconds"],
+            "average_gap_seconds": analysis["average_gap_seconds"],
+            "maximum_gap_seconds": float(self.gaps.max()) if len(self.gaps) else 0.0,
+            "back_to_back_count": int(back_to_back.sum()),
+            "gap_histogram": self._gap_histogram(),
+            "average_unique_tables": analysis["average_unique_tables"],
+            "stage_unique_tables": analysis["stage_unique_tables"],
+            "teams": teams,
+        }
+
+
+def report_division_schedule(
+    snapshot: DivisionSnapshot, schedule: DivisionSchedule
+) -> ScheduleReport:
+    """Report on a persisted schedule. Teams that left the division but are still
+    scheduled are reported after the teams of the snapshot."""
+
+    scheduled_team_ids = [session.team_id for session in schedule.sessions] + [
+        team_id for match in schedule.matches for team_id in match.tables.values()
+    ]
+    team_ids = list(
+        dict.fromkeys(
+            [team.id for team in snapshot.teams]
+            + [team_id for team_id in scheduled_team_ids if team_id is not None]
+        )
+    )
+    team_indexes = {team_id: i for i, team_id in enumerate(team_ids)}
+    team_numbers = {team.id: team.number for team in snapshot.teams}
+
+    # Only the times of a session matter, so every session slot is its own row
+    session_grid = np.array(
+        [
+            [team_indexes.get(session.team_id, EMPTY_SLOT)]
+            for session in schedule.sessions
+        ],
+        dtype=np.int32,
+    ).reshape(-1, 1)
+    session_start = np.array(
+        [int(session.scheduled_time.timestamp()) for session in schedule.sessions],
+        dtype=np.int64,
+    )
+
+    table_ids = list(
+        dict.fromkeys(
+            table_id for match in schedule.matches for table_id in match.tables
+        )
+    )
+    table_columns = {table_id: i for i, table_id in enumerate(table_ids)}
+    match_grid = np.full(
+        (len(schedule.matches), len(table_ids)), EMPTY_SLOT, dtype=np.int32
+    )
+    for row, match in enumerate(schedule.matches):
+        for table_id, team_id in match.tables.items():
+            if team_id is not None:
+                match_grid[row, table_columns[table_id]] = team_indexes[team_id]
+    match_start = np.array(
+        [int(match.scheduled_time.timestamp()) for match in schedule.matches],
+        dtype=np.int64,
+    )
+
+    service = ScheduleReportService(
+        len(team_ids),
+        session_grid,
+        session_start,
+        session_start + schedule.session_length_seconds,
+        match_grid,
+        match_start,
+        match_start + schedule.match_length_seconds,
+        np.array([match.stage for match in schedule.matches], dtype=object),
+    )
+    return service.report(team_ids, [team_numbers.get(team_id) for team_id in team_ids])
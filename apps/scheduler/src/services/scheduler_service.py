@@ -1,13 +1,21 @@
 import logging
 import math
 import random
-from datetime import timedelta
-from typing import Literal, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Callable, Literal, Optional
 import numpy as np
 
-from repository.lems_repository import LemsRepository
+from models.lems import DivisionSnapshot
+from models.scheduler import (
+    EMPTY_SLOT,
+    MatchAssignment,
+    ScheduleAnalysis,
+    SchedulePhase,
+    ScheduleReport,
+)
+from models.validator import ValidationResult
 from services.validator_service import ValidatorService
+from services.report_service import ScheduleReportService
+from services.team_timeline import TeamTimeline
 from models.errors import ValidatorError, SchedulerError
 from models.requests import SchedulerRequest
 from config import (
@@ -15,24 +23,61 @@ from config import (
     TABLE_DIVERSITY_WEIGHT,
     WAIT_TIME_POOL_SIZE,
     RANDOM_SEED,
+    MATCH_ASSIGNMENT,
 )
+from timing import timed
+
+# pandas and scipy take most of the startup time, and are only needed once a
+# schedule is generated, so they are imported on first use
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger("lems.scheduler")
 
+# Assignment cost of a team on a table it cannot play on. Larger than any sum of
+# scores in a match, so the solver only uses such a pair if nothing else is left.
+UNASSIGNABLE_COST = 1e6
+
 
 class SchedulerService:
+    """Generates a division schedule.
+
+    Internally the schedule is kept as dense integer grids: `session_grid` holds the
+    team index per (session, room) and `match_grid` the team index per (match, table),
+    with EMPTY_SLOT for unassigned slots. Event times are epoch seconds. The grids are
+    turned into slug DataFrames only when the schedule is returned.
+    """
+
     def __init__(
         self,
-        lems_repository: LemsRepository,
+        snapshot: DivisionSnapshot,
         request: SchedulerRequest,
         seed: Optional[int] = None,
+        on_phase: Optional[Callable[[SchedulePhase], None]] = None,
+        validation: Optional[ValidationResult] = None,
     ):
-        self.lems_repository = lems_repository
+        self.snapshot = snapshot
+        self.on_phase = on_phase
         self.staggered = request.stagger_matches
-        self.teams = lems_repository.get_teams()
-        self.rooms = lems_repository.get_rooms()
-        self.tables = lems_repository.get_tables()
-        self.team_table_history: dict[str, dict[str, set[str]]] = {}
+        self.match_assignment: MatchAssignment = (
+            request.match_assignment or MATCH_ASSIGNMENT
+        )
+        self.teams = snapshot.teams
+        self.rooms = snapshot.rooms
+        self.tables = snapshot.tables
+        self.team_table_history: dict[str, dict[int, set[int]]] = {}
+        self.timeline = TeamTimeline()
+
+        self.team_slugs = [team.slug for team in self.teams]
+        self.room_ids = [str(room.id) for room in self.rooms]
+        self.table_ids = [str(table.id) for table in self.tables]
+        # Number of matches each team plays per (stage, round), and per table per stage.
+        self.round_play_counts: dict[tuple[str, int], np.ndarray] = {}
+        self.table_play_counts: dict[str, np.ndarray] = {}
+        # Match slots filled with a team that does not meet the minimum gap
+        self.minimum_gap_fallbacks = 0
+        # Set once the schedule is created and analyzed
+        self._report_service: Optional[ScheduleReportService] = None
 
         if seed is not None:
             random.seed(seed)
@@ -41,13 +86,24 @@ class SchedulerService:
             random.seed(RANDOM_SEED)
             np.random.seed(RANDOM_SEED)
 
-        self._validate_schedule(request)
+        self._report_phase("validate")
+        if validation is not None:
+            # Validated earlier for the same request and snapshot
+            self._use_validation(validation)
+        else:
+            with timed("validate"):
+                self._validate_schedule(request)
+
+    def _report_phase(self, phase: SchedulePhase):
+        """Notify the caller that a generation phase is starting."""
+        if self.on_phase is not None:
+            self.on_phase(phase)
 
     def _validate_schedule(self, request: SchedulerRequest):
         """Validate the schedule using the ValidatorService."""
 
         try:
-            validator = ValidatorService(self.lems_repository, request)
+            validator = ValidatorService(self.snapshot, request)
             validator_data = validator.validate()
         except ValidatorError as error:
             logger.info(f"Initial validation failed: {error}")
@@ -57,57 +113,50 @@ class SchedulerService:
             logger.info("Validation failed: No data returned")
             raise SchedulerError("Initial validation failed: No data returned")
 
-        self.validator_data = validator_data
-        self.sessions = validator.sessions
-        self.matches = [match for round in validator.matches for match in round]
+        self._use_validation(
+            ValidationResult(
+                validator_data, validator.session_table, validator.match_table
+            )
+        )
+
+    def _use_validation(self, validation: ValidationResult):
+        self.validator_data = validation.data
+        self.sessions = validation.sessions
+        self.matches = validation.matches
 
     def _make_sessions(self):
-        """Create a DataFrame for the session schedule. Teams are assigned randomly."""
-
-        columns = ["start_time", "end_time"] + [str(room.id) for room in self.rooms]
-        teams = {team.slug for team in self.teams}
-
-        rows = []
-        for session in self.sessions:
-            row_data = {
-                "start_time": session["start_time"],
-                "end_time": session["end_time"],
-            }
-            for room in self.rooms:
-                team = np.random.choice(list(teams)) if len(teams) > 0 else pd.NA
-                row_data[str(room.id)] = team
-                if pd.notna(team):
-                    teams.remove(team)
-            rows.append(row_data)
+        """Create the session grid. Teams are assigned randomly.
+        Session N is stored in row N - 1.
+        """
 
-        sessions = pd.DataFrame(
-            rows,
-            columns=columns,
-            index=pd.RangeIndex(start=1, stop=len(rows) + 1),
+        self.session_start = self.sessions.start_seconds()
+        self.session_end = self.sessions.end_seconds()
+        self.session_grid = np.full(
+            (len(self.sessions), len(self.room_ids)), EMPTY_SLOT, dtype=np.int32
         )
-        sessions.index.name = "number"
 
-        return sessions
+        teams = np.random.permutation(len(self.team_slugs))[: self.session_grid.size]
+        self.session_grid.flat[: len(teams)] = teams
 
-    def _make_matches(self):
-        """Create a DataFrame for the match schedule. Teams are not assigned yet."""
+        for row, room in zip(*np.nonzero(self.session_grid != EMPTY_SLOT)):
+            self.timeline.add(
+                int(self.session_grid[row, room]),
+                int(self.session_start[row]),
+                int(self.session_end[row]),
+            )
 
-        table_columns = [str(table.id) for table in self.tables]
-        columns = ["start_time", "end_time", "stage", "round"] + table_columns
+    def _make_matches(self):
+        """Create the match grid. Teams are not assigned yet.
+        Match N is stored in row N - 1.
+        """
 
-        matches = pd.DataFrame(
-            columns=columns,
-            index=pd.RangeIndex(start=1, stop=len(self.matches) + 1),
+        self.match_start = self.matches.start_seconds()
+        self.match_end = self.matches.end_seconds()
+        self.match_stage = self.matches.stage
+        self.match_round = self.matches.round.astype(np.int32)
+        self.match_grid = np.full(
+            (len(self.matches), len(self.table_ids)), EMPTY_SLOT, dtype=np.int32
         )
-        matches.index.name = "number"
-
-        for match in self.matches:
-            matches.at[match["number"], "start_time"] = match["start_time"]
-            matches.at[match["number"], "end_time"] = match["end_time"]
-            matches.at[match["number"], "stage"] = match["stage"]
-            matches.at[match["number"], "round"] = match["round"]
-
-        return matches
 
     def _use_constraints(self):
         """Use the constraints from the validator to assign teams to matches.
@@ -123,9 +172,9 @@ class SchedulerService:
                 continue
 
             session = entry["session"]
-            session_schedule = self.session_schedule.loc[session["number"]]
+            session_row = self.session_grid[session["number"] - 1]
             session_teams = set(
-                team for team in session_schedule.values[2:] if pd.notna(team)
+                int(team) for team in session_row[session_row != EMPTY_SLOT]
             )
 
             for round in overlapping_rounds:
@@ -137,9 +186,7 @@ class SchedulerService:
 
                 for match in available_matches:
                     slots = match["slots"]
-                    match_start = pd.to_datetime(
-                        self.match_schedule.loc[match["number"], "start_time"]
-                    )
+                    match_start = int(self.match_start[match["number"] - 1])
 
                     gap_eligible_teams = [
                         team
@@ -149,7 +196,7 @@ class SchedulerService:
 
                     for _ in range(slots):
                         if len(gap_eligible_teams) > 0:
-                            team = np.random.choice(list(gap_eligible_teams))
+                            team = int(np.random.choice(gap_eligible_teams))
                             gap_eligible_teams.remove(team)
                             round_teams.discard(team)
                             self._assign_team(team, match["number"])
@@ -158,7 +205,8 @@ class SchedulerService:
                                 f"Match {match['number']}: No teams meet minimum gap. "
                                 f"Assigning from remaining teams anyway."
                             )
-                            team = np.random.choice(list(round_teams))
+                            self.minimum_gap_fallbacks += 1
+                            team = int(np.random.choice(list(round_teams)))
                             round_teams.remove(team)
                             self._assign_team(team, match["number"])
                         else:
@@ -172,104 +220,130 @@ class SchedulerService:
         to any available table.
         """
 
-        match_row = self.match_schedule.loc[match_number]
-        table_columns = [str(table.id) for table in self.tables]
+        match_row = self.match_grid[match_number - 1]
+
+        for table in self._get_available_tables(match_number):
+            if match_row[table] == EMPTY_SLOT:
+                self._set_match_slot(match_number, int(table), team)
+                break
+
+    def _set_match_slot(self, match_number: int, table: int, team: int) -> None:
+        """Write a team into a match slot, replacing any team already in it.
+        Keeps the team timelines and occupancy counts in sync with the schedule.
+        """
+
+        previous_team = int(self.match_grid[match_number - 1, table])
+        if previous_team != EMPTY_SLOT:
+            self._record_match_slot(match_number, table, previous_team, -1)
+
+        self.match_grid[match_number - 1, table] = team
+        self._record_match_slot(match_number, table, team, 1)
 
-        if self.staggered:
-            if match_number % 2 == 1:
-                available_tables = table_columns[: len(table_columns) // 2]
-            else:
-                available_tables = table_columns[len(table_columns) // 2 :]
+    def _record_match_slot(
+        self, match_number: int, table: int, team: int, delta: int
+    ) -> None:
+        """Add (delta=1) or remove (delta=-1) a team's match slot from the indexes."""
+
+        row = match_number - 1
+        stage, round_num = str(self.match_stage[row]), int(self.match_round[row])
+        start_time, end_time = int(self.match_start[row]), int(self.match_end[row])
+
+        if delta > 0:
+            self.timeline.add(team, start_time, end_time)
         else:
-            available_tables = table_columns
+            self.timeline.remove(team, start_time, end_time)
 
-        for table in available_tables:
-            if pd.isna(match_row[table]):
-                self.match_schedule.at[match_number, table] = team
-                break
+        self._get_round_play_counts(stage, round_num)[team] += delta
+        self._get_table_play_counts(stage)[team, table] += delta
+
+    def _get_round_play_counts(self, stage: str, round_num: int) -> np.ndarray:
+        """Get the per-team match count for a round, indexed by team index."""
+
+        key = (stage, round_num)
+        if key not in self.round_play_counts:
+            self.round_play_counts[key] = np.zeros(len(self.team_slugs), dtype=np.int32)
+        return self.round_play_counts[key]
+
+    def _get_table_play_counts(self, stage: str) -> np.ndarray:
+        """Get the team x table match count matrix for a stage."""
+
+        if stage not in self.table_play_counts:
+            self.table_play_counts[stage] = np.zeros(
+                (len(self.team_slugs), len(self.table_ids)), dtype=np.int32
+            )
+        return self.table_play_counts[stage]
 
     def _did_team_play(
-        self, team: str, stage: Literal["practice", "ranking"], round_num: int
+        self, team: int, stage: Literal["practice", "ranking"], round_num: int
     ) -> bool:
         """Check if a team has played in a specific round."""
 
-        round_matches: pd.DataFrame = self.match_schedule[
-            (self.match_schedule["stage"] == stage)
-            & (self.match_schedule["round"] == round_num)
-        ]
-        teams_in_round = round_matches.values[~pd.isna(round_matches.values)]
-
-        return team in teams_in_round
+        return bool(self._get_round_play_counts(stage, round_num)[team] > 0)
 
     def _did_team_reach_limit_on_table(
-        self, team: str, table_id: str, stage: Literal["practice", "ranking"], limit=1
+        self, team: int, table: int, stage: Literal["practice", "ranking"], limit=1
     ) -> bool:
         """Check if a team has played on a specific table in a specific stage.
         By default, this checks for 1 occurance, however a limit can be specified.
         """
 
-        slot: pd.Series = self.match_schedule[table_id]
-        stage_matches = self.match_schedule[
-            (self.match_schedule["stage"] == stage) & (slot.notna())
-        ]
+        return bool(self._get_table_play_counts(stage)[team, table] > limit)
 
-        matches_on_table: pd.Series = stage_matches[table_id]
-        teams_on_table = matches_on_table.values[~pd.isna(matches_on_table.values)]
+    def _get_eligible_teams(
+        self,
+        stage: Literal["practice", "ranking"],
+        round_num: int,
+        table: int,
+        limit: int,
+    ) -> np.ndarray:
+        """Get all teams that have not played in the round and have not passed the
+        play limit on the table, computed as a single mask over every team."""
+
+        table_counts = self._get_table_play_counts(stage)[:, table]
+        eligible_mask = (self._get_round_play_counts(stage, round_num) == 0) & (
+            table_counts <= limit
+        )
 
-        return list(teams_on_table).count(team) > limit
+        return np.flatnonzero(eligible_mask)
 
-    def _get_available_tables(self, match_number: int) -> list[str]:
-        """Get available table IDs based on match number when staggering is enabled."""
+    def _get_available_tables(self, match_number: int) -> np.ndarray:
+        """Get available table indices for a match, respecting staggering."""
 
-        table_columns = [str(table.id) for table in self.tables]
+        tables = np.arange(len(self.table_ids))
 
         if not self.staggered:
-            return table_columns
+            return tables
 
         if match_number % 2 == 1:
-            return table_columns[: len(table_columns) // 2]
-        return table_columns[len(table_columns) // 2 :]
+            return tables[: len(tables) // 2]
+        return tables[len(tables) // 2 :]
 
-    def _get_last_event_time(
-        self, team: str, current_time: pd.Timestamp
-    ) -> pd.Timestamp | None:
+    def _get_last_event_time(self, team: int, current_time: int) -> int | None:
         """Get the last event time (match or judging) for a team before the current time.
         If no events are found, return None."""
 
-        def _get_time(df: pd.DataFrame) -> pd.Timestamp | None:
-            events = df[
-                (df.isin([team]).any(axis=1))
-                & (pd.to_datetime(df["start_time"]) < current_time)
-            ]
-            if not events.empty:
-                return pd.to_datetime(events["start_time"].max())
-            return None
+        return self.timeline.last_start_before(team, current_time)
 
-        last_match_time = _get_time(self.match_schedule)
-        last_session_time = _get_time(self.session_schedule)
-
-        return max(filter(None, [last_match_time, last_session_time]), default=None)
-
-    def _meets_minimum_gap(self, team: str, match_start_time: pd.Timestamp) -> bool:
+    def _meets_minimum_gap(self, team: int, match_start_time: int) -> bool:
         """Check if a team meets the minimum gap constraint for a match."""
         last_event_time = self._get_last_event_time(team, match_start_time)
 
         if last_event_time is None:
             return True
 
-        gap_seconds = (match_start_time - last_event_time).total_seconds()
+        gap_seconds = match_start_time - last_event_time
         min_gap_seconds = MIN_MINUTES_BETWEEN_EVENTS * 60
 
         return gap_seconds >= min_gap_seconds
 
     def _score_team_for_table(
-        self, team: str, table_id: str, stage: str, wait_time: float
+        self, team: int, table: int, stage: str, wait_time: float
     ) -> float:
         """Score a team for a table considering wait time and table diversity."""
         stage_history = self.team_table_history.get(stage, {})
         team_tables = stage_history.get(team, set())
 
-        novelty_bonus = 0 if table_id in team_tables else 1
+        novelty_bonus = 0 if table in team_tables else 1
 
         normalized_wait = wait_time / 3600.0
         diversity_component = TABLE_DIVERSITY_WEIGHT * novelty_bonus
@@ -277,7 +351,7 @@ class SchedulerService:
 
         return diversity_component + wait_component
 
-    def _update_table_history(self, team: str, table_id: str, stage: str):
+    def _update_table_history(self, team: int, table: int, stage: str):
         """Update the table history for a team."""
         if stage not in self.team_table_history:
             self.team_table_history[stage] = {}
@@ -285,7 +359,7 @@ class SchedulerService:
         if team not in self.team_table_history[stage]:
             self.team_table_history[stage][team] = set()
 
-        self.team_table_history[stage][team].add(table_id)
+        self.team_table_history[stage][team].add(table)
 
     def _populate_match_schedule(self):
         """Populate the remaining slots in the match schedule while respecting constraints.
@@ -298,57 +372,56 @@ class SchedulerService:
         """
 
         # Check if there are enough tables for ranking rounds
-        ranking_rounds = self.match_schedule[self.match_schedule["stage"] == "ranking"][
-            "round"
-        ].nunique()
+        ranking_rounds = len(np.unique(self.match_round[self.match_stage == "ranking"]))
         max_times_team_can_play_on_table = math.ceil(len(self.tables) / ranking_rounds)
 
-        available_teams = {team.slug for team in self.teams}
-        sorted_matches = self.match_schedule.sort_values(["start_time", "number"])
+        match_order = np.lexsort((np.arange(len(self.matches)), self.match_start))
+
+        for row in match_order:
+            match_num = int(row) + 1
+            stage = str(self.match_stage[row])
+            round_num = int(self.match_round[row])
+            current_time = int(self.match_start[row])
 
-        for match_num, match in sorted_matches.iterrows():
-            stage = match["stage"]
-            round_num = match["round"]
-            current_time = pd.to_datetime(match["start_time"])
+            if self.match_assignment == "optimal":
+                self._assign_match_optimally(
+                    row, stage, round_num, max_times_team_can_play_on_table
+                )
+                continue
 
-            available_tables = self._get_available_tables(match_num)
-            available_tables = np.copy(available_tables)
+            available_tables = [
+                int(table) for table in self._get_available_tables(match_num)
+            ]
             random.shuffle(available_tables)
             assigned_teams = {}
             unassigned_tables = []
 
             # First pass: Try to assign eligible teams to tables
             for table in available_tables:
-                if pd.notna(match[table]):
-                    assigned_teams[table] = match[table]
+                if self.match_grid[row, table] != EMPTY_SLOT:
+                    assigned_teams[table] = int(self.match_grid[row, table])
                     continue
 
-                eligible_teams = [
-                    team
-                    for team in available_teams
-                    if not self._did_team_play(team, stage, round_num)
-                    and not self._did_team_reach_limit_on_table(
-                        team,
-                        table,
-                        stage,
-                        limit=max_times_team_can_play_on_table,
-                    )
-                ]
+                eligible_teams = self._get_eligible_teams(
+                    stage, round_num, table, limit=max_times_team_can_play_on_table
+                )
 
-                if not eligible_teams:
+                if len(eligible_teams) == 0:
                     unassigned_tables.append(table)
                     continue
 
                 gap_eligible_teams = [
-                    team
+                    int(team)
                     for team in eligible_teams
-                    if self._meets_minimum_gap(team, current_time)
+                    if self._meets_minimum_gap(int(team), current_time)
                 ]
 
                 if not gap_eligible_teams:
+                    eligible_slugs = [self.team_slugs[team] for team in eligible_teams]
                     logger.error(
-                        f"No teams meet minimum gap for match {match_num}, table {table}. "
-                        f"Eligible teams: {eligible_teams}"
+                        f"No teams meet minimum gap for match {match_num}, "
+                        f"table {self.table_ids[table]}. "
+                        f"Eligible teams: {eligible_slugs}"
                     )
                     raise SchedulerError(
                         f"Cannot satisfy minimum gap constraint for match {match_num}. "
@@ -372,9 +445,7 @@ class SchedulerService:
                     if last_event_time is None:
                         waiting_times[team] = float("inf")
                     else:
-                        waiting_times[team] = (
-                            current_time - last_event_time
-                        ).total_seconds()
+                        waiting_times[team] = current_time - last_event_time
 
                 sorted_by_wait = sorted(
                     waiting_times.items(), key=lambda x: x[1], reverse=True
@@ -388,19 +459,19 @@ class SchedulerService:
                 else:
                     selected_team = top_candidates[0]
 
-                self.match_schedule.at[match_num, table] = selected_team
+                self._set_match_slot(match_num, table, selected_team)
                 assigned_teams[table] = selected_team
                 self._update_table_history(selected_team, table, stage)
 
             # Second pass: Handle unassigned tables through swapping
             if unassigned_tables:
                 for unassigned_table in unassigned_tables:
+                    round_counts = self._get_round_play_counts(stage, round_num)
                     unplayed_teams = [
-                        team
-                        for team in available_teams
-                        if not self._did_team_play(team, stage, round_num)
-                        and team not in assigned_teams.values()
-                        and self._meets_minimum_gap(team, current_time)
+                        int(team)
+                        for team in np.flatnonzero(round_counts == 0)
+                        if int(team) not in assigned_teams.values()
+                        and self._meets_minimum_gap(int(team), current_time)
                     ]
 
                     if not unplayed_teams:
@@ -417,9 +488,9 @@ class SchedulerService:
                             )
 
                             if swap_valid:
-                                self.match_schedule.at[match_num, assigned_table] = team
-                                self.match_schedule.at[match_num, unassigned_table] = (
-                                    assigned_team
+                                self._set_match_slot(match_num, assigned_table, team)
+                                self._set_match_slot(
+                                    match_num, unassigned_table, assigned_team
                                 )
                                 assigned_teams[assigned_table] = team
                                 assigned_teams[unassigned_table] = assigned_team
@@ -430,123 +501,215 @@ class SchedulerService:
                         if swap_found:
                             break
 
+    def _assign_match_optimally(
+        self,
+        row: int,
+        stage: Literal["practice", "ranking"],
+        round_num: int,
+        limit: int,
+    ):
+        """Fill the open tables of a match with a min-cost bipartite matching between
+        the teams that can still play in the round and the tables.
+
+        A team scores like `_score_team_for_table` on a table: a bonus for a table it
+        has not played on in the stage, plus its wait since its last event. The
+        matching maximizes the total score over the whole match, so a table is only
+        left empty when no remaining team can be placed on it.
+        """
+        match_num = row + 1
+        current_time = int(self.match_start[row])
+
+        tables = np.array(
+            [
+                table
+                for table in self._get_available_tables(match_num)
+                if self.match_grid[row, table] == EMPTY_SLOT
+            ],
+            dtype=np.int64,
+        )
+        unplayed = np.flatnonzero(self._get_round_play_counts(stage, round_num) == 0)
+        if len(tables) == 0 or len(unplayed) == 0:
+            return
+
+        # Teams without an earlier event have waited since the event started
+        event_start = int(min(self.session_start.min(), self.match_start.min()))
+        last_starts = [
+            self._get_last_event_time(int(team), current_time) for team in unplayed
+        ]
+        has_event = np.array([start is not None for start in last_starts], dtype=bool)
+        waits = current_time - np.array(
+            [event_start if start is None else start for start in last_starts],
+            dtype=np.int64,
+        )
+
+        meets_gap = ~has_event | (waits >= MIN_MINUTES_BETWEEN_EVENTS * 60)
+        teams, waits = unplayed[meets_gap], waits[meets_gap]
+        if len(teams) == 0:
+            eligible_slugs = [self.team_slugs[team] for team in unplayed]
+            logger.error(
+                f"No teams meet minimum gap for match {match_num}. "
+                f"Eligible teams: {eligible_slugs}"
+            )
+            raise SchedulerError(
+                f"Cannot satisfy minimum gap constraint for match {match_num}. "
+                "Validator should have prevented this."
+            )
+
+        table_counts = self._get_table_play_counts(stage)[np.ix_(teams, tables)]
+        allowed = table_counts <= limit
+        scores = TABLE_DIVERSITY_WEIGHT * (table_counts == 0) + (
+            1 - TABLE_DIVERSITY_WEIGHT
+        ) * (waits[:, None] / 3600.0)
+        costs = np.where(allowed, -scores, UNASSIGNABLE_COST)
+
+        from scipy.optimize import linear_sum_assignment
+
+        team_rows, table_columns = linear_sum_assignment(costs)
+        for team_row, table_column in zip(team_rows, table_columns):
+            if not allowed[team_row, table_column]:
+                continue
+            team, table = int(teams[team_row]), int(tables[table_column])
+            self._set_match_slot(match_num, table, team)
+            self._update_table_history(team, table, stage)
+
     def _ensure_constraints(self, stage: Literal["practice", "ranking"]):
         """
         Ensure that all constraints are satisfied in the match schedule.
         1. Teams play exactly one match per round
         """
 
-        stage_schedule = self.match_schedule[self.match_schedule["stage"] == stage]
-        rounds = stage_schedule["round"].unique()
+        stage_mask = self.match_stage == stage
+        all_team_count = len(set(self.team_slugs))
 
-        for round_num in rounds:
-            round_matches = self.match_schedule[
-                (self.match_schedule["stage"] == stage)
-                & (self.match_schedule["round"] == round_num)
-            ]
+        for round_num in np.unique(self.match_round[stage_mask]):
+            round_grid = self.match_grid[stage_mask & (self.match_round == round_num)]
 
             # Get all teams that played in this round
-            teams_in_round = []
-            for table in [str(table.id) for table in self.tables]:
-                _table_matches: pd.Series = round_matches[table]
-                teams = _table_matches.dropna().tolist()
-                teams_in_round.extend(teams)
+            teams_in_round = round_grid[round_grid != EMPTY_SLOT]
 
             # Check if any team played multiple times
-            for team in teams_in_round:
-                if teams_in_round.count(team) > 1:
-                    raise SchedulerError(
-                        f"Team {team} played multiple times in round {round_num}"
-                    )
+            play_counts = np.bincount(teams_in_round, minlength=len(self.team_slugs))
+            repeated_teams = np.flatnonzero(play_counts > 1)
+            if len(repeated_teams) > 0:
+                raise SchedulerError(
+                    f"Team {self.team_slugs[repeated_teams[0]]} played multiple times "
+                    f"in round {round_num}"
+                )
 
             # Check if any team didn't play
-            all_team_slugs = {team.slug for team in self.teams}
-            missing_teams = len(set(all_team_slugs)) - len(teams_in_round)
+            missing_teams = all_team_count - len(teams_in_round)
             if missing_teams > 0:
                 raise SchedulerError(
                     f"Teams {missing_teams} did not play in round {round_num}"
                 )
 
-    def _analyze_schedule(self):
-        """Analyze the schedule and log statistics."""
-        team_intervals = {}
-        team_table_counts = {}
+    def _analyze_schedule(self) -> ScheduleAnalysis:
+        """Analyze the schedule, log and return statistics."""
+
+        self._report_service = ScheduleReportService(
+            len(self.team_slugs),
+            self.session_grid,
+            self.session_start,
+            self.session_end,
+            self.match_grid,
+            self.match_start,
+            self.match_end,
+            self.match_stage,
+        )
+        analysis = self._report_service.analysis(self.minimum_gap_fallbacks)
 
-        for team in self.teams:
-            team_events = []
+        overall_avg = analysis["average_gap_seconds"]
+        overall_min = analysis["minimum_gap_seconds"]
+        logger.info(
+            f"Average time between events: {int(overall_avg//60):02d}:{int(overall_avg%60):02d}"
+        )
+        logger.info(
+            f"Minimum time between events: {int(overall_min//60):02d}:{int(overall_min%60):02d}"
+        )
+        logger.info(
+            f"Average unique tables per team: {analysis['average_unique_tables']:.2f}"
+        )
+        for stage, avg_stage_unique in analysis["stage_unique_tables"].items():
+            logger.info(
+                f"{stage.capitalize()} stage - Avg unique tables: {avg_stage_unique:.2f}"
+            )
 
-            match_events = self.match_schedule[
-                self.match_schedule.isin([team.slug]).any(axis=1)
-            ][["start_time", "end_time"]].values.tolist()
+        return analysis
 
-            session_events = self.session_schedule[
-                self.session_schedule.isin([team.slug]).any(axis=1)
-            ][["start_time", "end_time"]].values.tolist()
+    def report(self) -> ScheduleReport:
+        """The quality report of the created schedule, per team and overall."""
 
-            team_events = sorted(
-                match_events + session_events,
-                key=lambda x: pd.to_datetime(x[0]),
-            )
+        if self._report_service is None:
+            raise SchedulerError("The schedule has not been created yet")
+        return self._report_service.report(
+            [team.id for team in self.teams], [team.number for team in self.teams]
+        )
 
-            if len(team_events) > 1:
-                time_diffs = [
-                    (
-                        pd.to_datetime(team_events[i + 1][0])
-                        - pd.to_datetime(team_events[i][1])
-                    ).total_seconds()
-                    for i in range(len(team_events) - 1)
-                ]
-                team_intervals[team.slug] = time_diffs
+    def _slug_grid(self, grid: np.ndarray) -> np.ndarray:
+        """Convert a grid of team indices to team slugs, with None for empty slots."""
 
-            all_tables = set()
-            for stage in self.team_table_history.values():
-                if team.slug in stage:
-                    all_tables.update(stage[team.slug])
-            team_table_counts[team.slug] = len(all_tables)
+        slugs = np.array(self.team_slugs + [None], dtype=object)
+        return slugs[grid]
 
-        team_averages = [
-            sum(diffs) / len(diffs) for diffs in team_intervals.values() if diffs
-        ]
-        team_minimums = [min(diffs) for diffs in team_intervals.values() if diffs]
+    def _get_session_schedule(self) -> "pd.DataFrame":
+        """Build the session schedule DataFrame from the session grid."""
 
-        overall_avg = sum(team_averages) / len(team_averages) if team_averages else 0
-        overall_min = min(team_minimums) if team_minimums else 0
+        import pandas as pd
 
-        avg_unique_tables = (
-            sum(team_table_counts.values()) / len(team_table_counts)
-            if team_table_counts
-            else 0
+        sessions = pd.DataFrame(
+            self._slug_grid(self.session_grid),
+            columns=self.room_ids,
+            index=pd.RangeIndex(start=1, stop=len(self.sessions) + 1),
         )
+        sessions.insert(0, "start_time", self.sessions.start_times())
+        sessions.insert(1, "end_time", self.sessions.end_times())
+        sessions.index.name = "number"
 
-        logger.info(
-            f"Average time between events: {int(overall_avg//60):02d}:{int(overall_avg%60):02d}"
-        )
-        logger.info(
-            f"Minimum time between events: {int(overall_min//60):02d}:{int(overall_min%60):02d}"
+        return sessions
+
+    def _get_match_schedule(self) -> "pd.DataFrame":
+        """Build the match schedule DataFrame from the match grid."""
+
+        import pandas as pd
+
+        matches = pd.DataFrame(
+            self._slug_grid(self.match_grid),
+            columns=self.table_ids,
+            index=pd.RangeIndex(start=1, stop=len(self.matches) + 1),
         )
-        logger.info(f"Average unique tables per team: {avg_unique_tables:.2f}")
-
-        for stage, stage_history in self.team_table_history.items():
-            stage_unique_tables = [len(tables) for tables in stage_history.values()]
-            if stage_unique_tables:
-                avg_stage_unique = sum(stage_unique_tables) / len(stage_unique_tables)
-                logger.info(
-                    f"{stage.capitalize()} stage - Avg unique tables: {avg_stage_unique:.2f}"
-                )
+        matches.insert(0, "start_time", self.matches.start_times())
+        matches.insert(1, "end_time", self.matches.end_times())
+        matches.insert(2, "stage", self.match_stage.astype(object))
+        matches.insert(3, "round", self.match_round)
+        matches.index.name = "number"
+
+        return matches
 
-    def create_schedule(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+    def create_schedule(self) -> tuple["pd.DataFrame", "pd.DataFrame"]:
         """Create the schedule by populating the match schedule and ensuring constraints.
-        Returns (match_schedule, session_schedule).
+        Returns (match_schedule, session_schedule). The schedule statistics are kept
+        in `analysis`.
         """
 
-        self.session_schedule = self._make_sessions()
-        self.match_schedule = self._make_matches()
+        self._report_phase("sessions")
+        with timed("sessions"):
+            self._make_sessions()
+            self._make_matches()
+
+        self._report_phase("constraints")
+        with timed("constraints"):
+            self._use_constraints()
+
+        self._report_phase("populate")
+        with timed("populate"):
+            self._populate_match_schedule()
 
-        self._use_constraints()
-        self._populate_match_schedule()
+        with timed("ensure-constraints"):
+            self._ensure_constraints("practice")
+            self._ensure_constraints("ranking")
 
-        self._ensure_constraints("practice")
-        self._ensure_constraints("ranking")
-        self._analyze_schedule()
+        with timed("analyze"):
+            self.analysis = self._analyze_schedule()
 
-        return self.match_schedule.copy(), self.session_schedule.copy()
+        with timed("dataframes"):
+            return self._get_match_schedule(), self._get_session_schedule()
@@ -0,0 +1,52 @@
+from bisect import bisect_left
+
+
+class TeamTimeline:
+    """Keeps a sorted list of event start and end times for every team.
+
+    Teams are identified by their index in the scheduler's team list, and times
+    are epoch seconds. The scheduler records each judging session and match as
+    it is written to the schedule, so gap checks become a binary search over the
+    team's own events instead of a scan over the whole schedule.
+    """
+
+    def __init__(self):
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+
+    def add(self, team: int, start_time: int, end_time: int) -> None:
+        """Record an event for a team."""
+        starts = self._starts.setdefault(team, [])
+        ends = self._ends.setdefault(team, [])
+
+        index = bisect_left(starts, start_time)
+        starts.insert(index, start_time)
+        ends.insert(index, end_time)
+
+    def remove(self, team: int, start_time: int, end_time: int) -> None:
+        """Remove a previously recorded event for a team."""
+        starts = self._starts.get(team, [])
+        ends = self._ends.get(team, [])
+
+        index = bisect_left(starts, start_time)
+        while index < len(starts) and starts[index] == start_time:
+            if ends[index] == end_time:
+                del starts[index]
+                del ends[index]
+                return
+            index += 1
+
+    def events(self, team: int) -> list[tuple[int, int]]:
+        """Return the (start, end) pairs of a team's events in chronological order."""
+        return list(zip(self._starts.get(team, []), self._ends.get(team, [])))
+
+    def last_start_before(self, team: int, time: int) -> int | None:
+        """Return the start of the team's latest event that starts before `time`."""
+        starts = self._starts.get(team)
+        if not starts:
+            return None
+
+        index = bisect_left(starts, time)
+        if index == 0:
+            return None
+        return starts[index - 1]
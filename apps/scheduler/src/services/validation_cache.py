@@ -0,0 +1,69 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+
+from config import VALIDATION_CACHE_SIZE, VALIDATION_CACHE_TTL_SECONDS
+from metrics import VALIDATION_CACHE_LOOKUPS
+from models.lems import DivisionSnapshot
+from models.requests import SchedulerRequest
+from models.validator import ValidationResult
+
+# Request fields that only affect generation, not validation
+GENERATION_FIELDS = {"attempts", "match_assignment"}
+
+
+class ValidationCache:
+    """Process-wide LRU cache of successful validations.
+
+    Entries are keyed by a hash of the request and the division snapshot it was
+    validated against, so a changed team list, room or table never reuses a stale
+    result. Entries expire after a TTL and the least recently used entry is evicted
+    once the cache is full.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, ValidationResult]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(snapshot: DivisionSnapshot, request: SchedulerRequest) -> str:
+        payload = {
+            "request": request.model_dump(mode="json", exclude=GENERATION_FIELDS),
+            "snapshot": asdict(snapshot),
+        }
+        encoded = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> ValidationResult | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                VALIDATION_CACHE_LOOKUPS.labels("miss").inc()
+                return None
+
+            self._entries.move_to_end(key)
+            VALIDATION_CACHE_LOOKUPS.labels("hit").inc()
+            return entry[1]
+
+    def store(self, key: str, result: ValidationResult):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+validation_cache = ValidationCache(VALIDATION_CACHE_SIZE, VALIDATION_CACHE_TTL_SECONDS)
@@ -1,150 +1,219 @@
 import math
 import logging
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from functools import cached_property
 from typing import Iterable
 from datetime import timedelta
 
-import pandas as pd
+import numpy as np
 
 from models.validator import (
+    EventRecords,
+    EventTable,
+    OverlappingRound,
     ValidatorData,
     ValidatorMatch,
     ValidatorSession,
+    to_datetime64,
 )
 from models.errors import ValidatorError
 from models.requests import SchedulerRequest, Break
-from repository.lems_repository import LemsRepository
+from models.lems import DivisionSnapshot
 from config import MIN_MINUTES_BETWEEN_EVENTS
 
 logger = logging.getLogger("lems.scheduler")
 
 
+def _get_break_offsets(breaks: Iterable[Break], event_count: int) -> np.ndarray:
+    """Seconds of break after each event, indexed by event number - 1. Only the
+    first break after an event counts."""
+
+    offsets = np.zeros(event_count, dtype=np.int64)
+    seen = set()
+    for break_ in breaks:
+        if 1 <= break_.after <= event_count and break_.after not in seen:
+            seen.add(break_.after)
+            offsets[break_.after - 1] = break_.duration_seconds
+    return offsets
+
+
+def _get_start_offsets(cycle_times: np.ndarray, break_offsets: np.ndarray):
+    """Seconds from the first event to the start of each event. Events run back to
+    back, each one a cycle time after the previous one plus the break after it."""
+
+    gaps = cycle_times + break_offsets
+    return np.concatenate(([0], np.cumsum(gaps[:-1]))).astype("timedelta64[s]")
+
+
 class ValidatorService:
+    """Validates that every judging session can be filled with teams that have a
+    free match in every round that overlaps the session.
+
+    Sessions and matches are kept as event tables, and overlap queries binary search
+    their datetime64 times. The `sessions` and `matches` properties are views on the
+    tables, and the records the validator data is made of are built once, when they
+    are first used.
+    """
 
-    def __init__(self, lems_repository: LemsRepository, request: SchedulerRequest):
-        self.lems_repository = lems_repository
+    def __init__(self, snapshot: DivisionSnapshot, request: SchedulerRequest):
+        self.snapshot = snapshot
         self.config = request
-        self.team_count = len(self.lems_repository.get_teams())
-        self._sessions = self._get_sessions()
-        self._matches = self._get_matches()
+        self.team_count = len(snapshot.teams)
         self.padding = timedelta(minutes=MIN_MINUTES_BETWEEN_EVENTS)
+        self._padding = np.timedelta64(MIN_MINUTES_BETWEEN_EVENTS, "m")
+        self._get_session_times()
+        self._get_match_times()
+        self._index_match_times()
 
     @property
-    def sessions(self) -> list[ValidatorSession]:
-        """Read-only property for sessions"""
-        return self._sessions.copy()
+    def sessions(self) -> Sequence[ValidatorSession]:
+        """Read-only view of the sessions"""
+        return EventRecords(self.session_table)
 
     @property
-    def matches(self) -> list[list[ValidatorMatch]]:
-        """Read-only property for matches"""
-        return [round.copy() for round in self._matches]
-
-    def _get_sessions(self) -> list[ValidatorSession]:
-        judging_start_time = self.config.judging_start
-        event_length = timedelta(seconds=self.config.judging_session_length_seconds)
-        cycle_time = timedelta(seconds=self.config.judging_cycle_time_seconds)
-        rooms = self.lems_repository.get_rooms()
-        judging_rounds = math.ceil(self.team_count / len(rooms))
-
-        sessions: list[ValidatorSession] = []
-        current_time = judging_start_time
-        for round in range(1, judging_rounds + 1):
-            sessions.append(
-                {
-                    "event_type": "judging",
-                    "number": round,
-                    "slots": len(rooms),
-                    "start_time": current_time,
-                    # We don't use cycle time since rubrics are filled out after the session ends
-                    "end_time": current_time + event_length,
-                }
-            )
-            current_time += cycle_time
+    def matches(self) -> list[Sequence[ValidatorMatch]]:
+        """Read-only views of the matches of every round"""
+        return [
+            EventRecords(self.match_table, first, last)
+            for first, last in self._round_bounds()
+        ]
 
-            breaks: Iterable[Break] = (
-                break_
-                for break_ in self.config.breaks
-                if break_.event_type == "judging" and break_.after == round
-            )
-            break_after = next(breaks, None)
-            if break_after:
-                current_time += timedelta(seconds=break_after.duration_seconds)
+    @cached_property
+    def _sessions(self) -> list[ValidatorSession]:
+        return self.session_table.records()
 
-        return sessions
+    @cached_property
+    def _matches(self) -> list[list[ValidatorMatch]]:
+        matches = self.match_table.records()
+        return [matches[first:last] for first, last in self._round_bounds()]
 
-    def _get_matches(self) -> list[list[ValidatorMatch]]:
-        total_rounds = self.config.practice_rounds + self.config.ranking_rounds
-        tables = self.lems_repository.get_tables()
-        slots = math.ceil(
-            len(tables) / 2 if self.config.stagger_matches else len(tables)
+    def _get_session_times(self):
+        """Compute the start and end time of every judging session."""
+
+        rooms = self.snapshot.rooms
+        self._session_count = math.ceil(self.team_count / len(rooms))
+
+        cycle_times = np.full(
+            self._session_count, self.config.judging_cycle_time_seconds, dtype=np.int64
         )
-        matches_per_round = math.ceil(self.team_count / slots)
+        judging_breaks = (b for b in self.config.breaks if b.event_type == "judging")
+        break_offsets = _get_break_offsets(judging_breaks, self._session_count)
 
-        rounds: list[list[ValidatorMatch]] = []
-        current_time = self.config.matches_start
+        starts = to_datetime64(self.config.judging_start) + _get_start_offsets(
+            cycle_times, break_offsets
+        )
+        # We don't use cycle time since rubrics are filled out after the session ends
+        ends = starts + np.timedelta64(self.config.judging_session_length_seconds, "s")
+        self.session_table = EventTable(
+            event_type="judging",
+            origin=self.config.judging_start,
+            number=np.arange(1, self._session_count + 1, dtype=np.int32),
+            slots=np.full(self._session_count, len(rooms), dtype=np.int32),
+            start=starts,
+            end=ends,
+        )
 
-        for round in range(1, total_rounds + 1):
-            start_number = (round - 1) * matches_per_round
-            stage = "practice" if round <= self.config.practice_rounds else "ranking"
-            round_number = (
-                round if stage == "practice" else round - self.config.practice_rounds
-            )
+    def _get_match_times(self):
+        """Compute the start and end time of every match. Matches are numbered across
+        rounds, and round N holds matches (N - 1) * matches_per_round + 1 onwards."""
 
-            cycle_time = (
-                timedelta(seconds=self.config.practice_match_cycle_time_seconds)
-                if round <= self.config.practice_rounds
-                else timedelta(seconds=self.config.ranking_match_cycle_time_seconds)
-            )
+        total_rounds = self.config.practice_rounds + self.config.ranking_rounds
+        tables = self.snapshot.tables
+        self._match_slots = math.ceil(
+            len(tables) / 2 if self.config.stagger_matches else len(tables)
+        )
+        self._matches_per_round = math.ceil(self.team_count / self._match_slots)
+        match_count = total_rounds * self._matches_per_round
+
+        practice_matches = self.config.practice_rounds * self._matches_per_round
+        cycle_times = np.where(
+            np.arange(match_count) < practice_matches,
+            self.config.practice_match_cycle_time_seconds,
+            self.config.ranking_match_cycle_time_seconds,
+        ).astype(np.int64)
+        match_breaks = (b for b in self.config.breaks if b.event_type == "match")
+        break_offsets = _get_break_offsets(match_breaks, match_count)
+
+        starts = to_datetime64(self.config.matches_start) + _get_start_offsets(
+            cycle_times, break_offsets
+        )
+        is_practice = np.arange(match_count) < practice_matches
+        rounds = np.arange(match_count, dtype=np.int32) // self._matches_per_round + 1
+        self.match_table = EventTable(
+            event_type="match",
+            origin=self.config.matches_start,
+            number=np.arange(1, match_count + 1, dtype=np.int32),
+            slots=np.full(match_count, self._match_slots, dtype=np.int32),
+            start=starts,
+            end=starts + cycle_times.astype("timedelta64[s]"),
+            stage=np.where(is_practice, "practice", "ranking"),
+            round=np.where(is_practice, rounds, rounds - self.config.practice_rounds),
+        )
 
-            matches = []
-            for match in range(1, matches_per_round + 1):
-                matches.append(
-                    {
-                        "event_type": "match",
-                        "stage": stage,
-                        "round": round_number,
-                        "number": start_number + match,
-                        "slots": slots,
-                        "start_time": current_time,
-                        "end_time": current_time + cycle_time,
-                    }
-                )
-                current_time += cycle_time
+    def _round_bounds(self) -> list[tuple[int, int]]:
+        """The [first, last) match indices of every round."""
+        total_rounds = self.config.practice_rounds + self.config.ranking_rounds
+        return [
+            (round * self._matches_per_round, (round + 1) * self._matches_per_round)
+            for round in range(total_rounds)
+        ]
 
-                breaks: Iterable[Break] = (
-                    break_
-                    for break_ in self.config.breaks
-                    if break_.event_type == "match"
-                    and break_.after == (start_number + match)
-                )
-                break_after = next(breaks, None)
-                if break_after:
-                    current_time += timedelta(seconds=break_after.duration_seconds)
+    def _index_match_times(self):
+        """Answer the overlap queries of every session in one pass.
 
-            rounds.append(matches)
+        Matches run back to back, so start and end times are sorted both within a
+        round and across rounds. A single vectorized binary search over all sessions
+        gives the rounds each padded session overlaps, and the matches on either
+        side of it.
+        """
 
-        return rounds
+        sessions, matches = self.session_table, self.match_table
+        bounds = self._round_bounds()
+        round_starts = matches.start[[first for first, _ in bounds]]
+        round_ends = matches.end[[last - 1 for _, last in bounds]]
+        padded_starts = sessions.start - self._padding
+        padded_ends = sessions.end + self._padding
+
+        # Rounds ending after the padded session starts and starting before it ends
+        self._first_overlaps = np.searchsorted(
+            round_ends, padded_starts, "right"
+        ).tolist()
+        self._last_overlaps = np.searchsorted(
+            round_starts, padded_ends, "left"
+        ).tolist()
+
+        # Global match indices of the first match ending after the padded session
+        # starts, and of the first match starting after it ends
+        self._ends_before = np.searchsorted(matches.end, padded_starts, "left").tolist()
+        self._starts_after = np.searchsorted(
+            matches.start, padded_ends, "left"
+        ).tolist()
 
     def _get_potential_round_overlaps(self, session: ValidatorSession):
         """Returns the rounds that overlap with the session's time window."""
 
-        rounds_with_matches = self.matches
+        index = session["number"] - 1
+        return list(range(self._first_overlaps[index], self._last_overlaps[index]))
 
-        round_times = [
-            {
-                "start_time": round[0]["start_time"],
-                "end_time": round[-1]["end_time"],
-            }
-            for round in rounds_with_matches
-        ]
+    def _get_available_matches(
+        self, session: ValidatorSession, round_index: int
+    ) -> list[ValidatorMatch]:
+        """Returns the matches of a round that don't overlap with the session's time
+        window: those ending before the padded session starts, and those starting
+        after it ends."""
 
-        overlaps = [
-            index
-            for (index, round) in enumerate(round_times)
-            if round["start_time"] < (session["end_time"] + self.padding)
-            and round["end_time"] > (session["start_time"] - self.padding)
-        ]
+        index = session["number"] - 1
+        first = round_index * self._matches_per_round
+        ends_before = min(
+            max(self._ends_before[index] - first, 0), self._matches_per_round
+        )
+        starts_after = min(
+            max(self._starts_after[index] - first, 0), self._matches_per_round
+        )
 
-        return overlaps
+        round = self._matches[round_index]
+        return round[:ends_before] + round[starts_after:]
 
     def _get_optional_matches(self, session: ValidatorSession):
         """Returns the matches that are available for each team in the session.
@@ -160,12 +229,7 @@ class ValidatorService:
             return None
 
         for round_index in overlaps:
-            round = self.matches[round_index]
-            for match in round:
-                if match["start_time"] >= (session["end_time"] + self.padding) or match[
-                    "end_time"
-                ] < (session["start_time"] - self.padding):
-                    available_matches.append(match)
+            available_matches.extend(self._get_available_matches(session, round_index))
 
         avaliable_match_numbers = [match["number"] for match in available_matches]
 
@@ -180,14 +244,15 @@ class ValidatorService:
         This is a list of sessions, each with a list of overlapping rounds."""
 
         data = []
-        for session in self.sessions:
-            optional_matches = self._get_optional_matches(session)
-            if optional_matches is None:
+        for session in self._sessions:
+            overlaps = self._get_potential_round_overlaps(session)
+            logger.debug(f"Session {session['number']} overlaps with rounds {overlaps}")
+            if len(overlaps) == 0:
                 continue
 
             overlapping_rounds = []
-            for round_index in self._get_potential_round_overlaps(session):
-                round = self.matches[round_index]
+            for round_index in overlaps:
+                round = self._matches[round_index]
                 round_number = round_index + 1
                 overlapping_rounds.append(
                     {
@@ -203,11 +268,9 @@ class ValidatorService:
                         ),
                         "start_time": round[0]["start_time"],
                         "end_time": round[-1]["end_time"],
-                        "available_matches": [
-                            match
-                            for match in round
-                            if match["number"] in optional_matches
-                        ],
+                        "available_matches": self._get_available_matches(
+                            session, round_index
+                        ),
                     }
                 )
 
@@ -220,41 +283,55 @@ class ValidatorService:
 
         return data
 
-    def _cross_reference_match_slots(self, data: list[ValidatorData]):
+    @staticmethod
+    def _cross_reference_match_slots(data: list[ValidatorData]):
         """Handles cases where multiple sessions have the same available match.
         Known unhandles cases: Splitting the slots of a shared session between 2 matches.
+
+        Each duplicate match is kept only in the first session whose overlapping round
+        has the fewest available slots, and removed from every other session. Match
+        locations and per-round slot totals are indexed in a single pass and updated
+        as matches are removed, so the work is linear in the size of the data.
         """
 
+        rounds: list[tuple[ValidatorData, OverlappingRound]] = []
         match_numbers = []
+        match_locations: dict[int, list[tuple[int, int]]] = defaultdict(list)
         for entry in data:
             for overlapping_round in entry["overlapping_rounds"]:
+                round_index = len(rounds)
+                rounds.append((entry, overlapping_round))
                 for match in overlapping_round["available_matches"]:
                     match_numbers.append(match["number"])
+                    match_locations[match["number"]].append(
+                        (round_index, match["slots"])
+                    )
+
+        round_slots = [
+            sum(match["slots"] for match in overlapping_round["available_matches"])
+            for _, overlapping_round in rounds
+        ]
 
+        # Built the same way as a set comprehension over match_numbers, so duplicates
+        # are resolved in the same order regardless of how they are counted.
+        match_counts = Counter(match_numbers)
         duplicate_matches = {
             match_number
             for match_number in match_numbers
-            if match_numbers.count(match_number) > 1
+            if match_counts[match_number] > 1
         }
 
         duplicate_match_details = {}
+        removed_matches: dict[int, set[int]] = defaultdict(set)
         for match_number in duplicate_matches:
-            sessions = []
-            for entry in data:
-                for overlapping_round in entry["overlapping_rounds"]:
-                    for match in overlapping_round["available_matches"]:
-                        if match["number"] == match_number:
-                            sessions.append(
-                                {
-                                    "session": entry["session"]["number"],
-                                    "slots": sum(
-                                        match["slots"]
-                                        for match in overlapping_round[
-                                            "available_matches"
-                                        ]
-                                    ),
-                                }
-                            )
+            locations = match_locations[match_number]
+            sessions = [
+                {
+                    "session": rounds[round_index][0]["session"]["number"],
+                    "slots": round_slots[round_index],
+                }
+                for round_index, _ in locations
+            ]
 
             duplicate_match_details[match_number] = sessions
 
@@ -263,14 +340,18 @@ class ValidatorService:
                 s["session"] for s in sessions if s["slots"] == min_slots
             )
 
-            for entry in data:
-                for overlapping_round in entry["overlapping_rounds"]:
-                    overlapping_round["available_matches"] = [
-                        match
-                        for match in overlapping_round["available_matches"]
-                        if match["number"] != match_number
-                        or entry["session"]["number"] == first_min_session
-                    ]
+            for round_index, slots in locations:
+                if rounds[round_index][0]["session"]["number"] != first_min_session:
+                    removed_matches[round_index].add(match_number)
+                    round_slots[round_index] -= slots
+
+        for round_index, match_numbers_to_remove in removed_matches.items():
+            overlapping_round = rounds[round_index][1]
+            overlapping_round["available_matches"] = [
+                match
+                for match in overlapping_round["available_matches"]
+                if match["number"] not in match_numbers_to_remove
+            ]
 
         if len(duplicate_matches) > 0:
             logger.debug(f"Duplicate matches: {duplicate_match_details}")
@@ -291,8 +372,8 @@ class ValidatorService:
         overlapping_indices = self._get_potential_round_overlaps(session)
 
         for round_index in overlapping_indices:
-            round_matches = self.matches[round_index]
-            round_obj = self.matches[round_index][0] if round_matches else None
+            round_matches = self._matches[round_index]
+            round_obj = round_matches[0] if round_matches else None
             
             if not round_obj:
                 continue
@@ -357,6 +438,26 @@ class ValidatorService:
             "conflicting_events": conflicting_events,
         }
 
+    def get_slack(self) -> tuple[int, int] | None:
+        """Spare match slots in the tightest session and round once shared matches
+        are split between sessions, with the number of that session. Negative when
+        the session cannot be filled, None when no session overlaps a round."""
+
+        data = self._cross_reference_match_slots(self._create_validator_data())
+
+        tightest = None
+        for entry in data:
+            session = entry["session"]
+            for overlapping_round in entry["overlapping_rounds"]:
+                slots = sum(
+                    match["slots"] for match in overlapping_round["available_matches"]
+                )
+                slack = slots - session["slots"]
+                if tightest is None or slack < tightest[0]:
+                    tightest = (slack, session["number"])
+
+        return tightest
+
     def validate(self):
         data = self._create_validator_data()
         self._cross_reference_match_slots(data)  # Modifies in place
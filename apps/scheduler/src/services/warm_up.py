@@ -0,0 +1,59 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+from models.lems import DivisionSnapshot, Location, Team
+from models.requests import SchedulerRequest
+from services.scheduler_service import SchedulerService
+
+logger = logging.getLogger("lems.scheduler")
+
+WARM_UP_START = datetime(2000, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def make_warm_up_division() -> tuple[DivisionSnapshot, SchedulerRequest]:
+    """A tiny division of 8 teams, 2 rooms and 4 staggered tables that validates."""
+
+    snapshot = DivisionSnapshot(
+        teams=[Team(f"warm-up-{i}", i + 1, "XX", f"XX-{i + 1}") for i in range(8)],
+        rooms=[Location(f"room-{i}", f"Room {i + 1}") for i in range(2)],
+        tables=[Location(f"table-{i}", f"Table {i + 1}") for i in range(4)],
+    )
+    request = SchedulerRequest(
+        division_id="warm-up",
+        matches_start=WARM_UP_START,
+        practice_rounds=1,
+        ranking_rounds=1,
+        match_length_seconds=150,
+        practice_match_cycle_time_seconds=30 * 60,
+        ranking_match_cycle_time_seconds=30 * 60,
+        judging_start=WARM_UP_START,
+        judging_session_length_seconds=30 * 60,
+        judging_cycle_time_seconds=60 * 60,
+        breaks=[],
+    )
+    return snapshot, request
+
+
+def warm_up():
+    """Generate the tiny division once with every match assignment, so the heavy
+    imports and first-call costs are paid before the first real request.
+
+    Runs in the worker pool initializer, where an exception would break the whole
+    pool, so failures are only logged. No seed is passed, seeding would leave every
+    worker with the same random state.
+    """
+
+    start = time.perf_counter()
+    snapshot, request = make_warm_up_division()
+    try:
+        for match_assignment in ("greedy", "optimal"):
+            warm_up_request = request.model_copy(
+                update={"match_assignment": match_assignment}
+            )
+            SchedulerService(snapshot, warm_up_request).create_schedule()
+    except Exception:
+        logger.exception("Worker warm-up failed")
+        return
+
+    logger.debug(f"Worker warmed up in {time.perf_counter() - start:.2f}s")
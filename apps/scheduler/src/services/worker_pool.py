@@ -0,0 +1,276 @@
+import os
+import math
+import importlib
+import time
+import random
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from config import WORKER_POOL_SIZE, SCHEDULE_ATTEMPTS, RANDOM_SEED, WARM_UP_WORKERS
+from logging_config import configure_logging
+from metrics import MINIMUM_GAP_FALLBACKS, observe_phases
+from models.errors import SchedulerError
+from models.lems import DivisionSnapshot
+from models.scheduler import GeneratedSchedule, ScheduleAnalysis, SchedulePhase
+from models.requests import SchedulerRequest
+from models.validator import ValidationResult
+from services.scheduler_service import SchedulerService
+from services.validation_cache import validation_cache
+from services.validator_service import ValidatorService
+from services.warm_up import warm_up
+from timing import Span, is_profiling, record_spans, run_timed, timed
+
+logger = logging.getLogger("lems.scheduler")
+
+T = TypeVar("T")
+
+_executor: ProcessPoolExecutor | None = None
+_is_warm = False
+
+
+def get_pool_size() -> int:
+    """Number of worker processes, by default one per CPU."""
+    return WORKER_POOL_SIZE or os.cpu_count() or 1
+
+
+def _initialize_worker():
+    configure_logging()
+    if WARM_UP_WORKERS:
+        warm_up()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Get the process pool that runs CPU-bound scheduler work off the event loop."""
+    global _executor
+
+    if _executor is None:
+        max_workers = get_pool_size()
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_initialize_worker
+        )
+        logger.info(f"Started worker pool with {max_workers} processes")
+
+    return _executor
+
+
+def is_warm() -> bool:
+    """Whether the worker pool is ready to take requests without a cold start."""
+    return _is_warm or not WARM_UP_WORKERS
+
+
+async def warm_up_executor():
+    """Start every worker process ahead of the first request. Workers run a tiny
+    schedule in their initializer, so once each of them has answered, the heavy
+    imports and first-call costs are paid. This process needs pandas too, to unpickle
+    and persist the generated schedules, so it is imported in the meantime."""
+    global _is_warm
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    # A process is started for each task submitted while no worker is idle, and all
+    # of them are submitted before the first initializer finishes
+    await asyncio.gather(
+        *(loop.run_in_executor(executor, os.getpid) for _ in range(get_pool_size())),
+        loop.run_in_executor(None, importlib.import_module, "pandas"),
+    )
+
+    _is_warm = True
+    logger.info(f"Warmed up the worker pool in {time.perf_counter() - start:.2f}s")
+
+
+def shutdown_executor():
+    global _executor, _is_warm
+
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+        _is_warm = False
+        logger.info("Worker pool shut down")
+
+
+async def _run_timed_in_worker(
+    func: Callable[..., T], *args, **kwargs
+) -> tuple[T, list[Span]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), partial(run_timed, func, is_profiling(), *args, **kwargs)
+    )
+
+
+async def run_in_worker(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a function in the worker pool without blocking the event loop.
+    The function and its arguments must be picklable. Spans timed in the worker are
+    added to the caller's timings."""
+
+    result, spans = await _run_timed_in_worker(func, *args, **kwargs)
+    record_spans(spans)
+    observe_phases(spans)
+    return result
+
+
+def validate_schedule(
+    snapshot: DivisionSnapshot, request: SchedulerRequest
+) -> ValidationResult:
+    with timed("validate"):
+        validator = ValidatorService(snapshot, request)
+        data = validator.validate()
+        return ValidationResult(data, validator.session_table, validator.match_table)
+
+
+async def validate_schedule_cached(
+    snapshot: DivisionSnapshot, request: SchedulerRequest
+) -> ValidationResult:
+    """Validate in the worker pool, reusing a cached result of the same request on
+    the same snapshot. Successful results are cached for the generation that usually
+    follows."""
+
+    key = validation_cache.key(snapshot, request)
+    result = validation_cache.get(key)
+    if result is not None:
+        logger.debug("Using cached validation result")
+        return result
+
+    result = await run_in_worker(validate_schedule, snapshot, request)
+    validation_cache.store(key, result)
+    return result
+
+
+def get_slacks(
+    snapshot: DivisionSnapshot, requests: list[SchedulerRequest]
+) -> list[tuple[int, int] | None]:
+    with timed("sweep"):
+        return [ValidatorService(snapshot, request).get_slack() for request in requests]
+
+
+async def sweep_validation(
+    snapshot: DivisionSnapshot, requests: list[SchedulerRequest]
+) -> list[tuple[int, int] | None]:
+    """Get the tightest slack of many requests on one snapshot, split in one chunk
+    per worker process."""
+
+    workers = get_pool_size()
+    chunk_size = max(1, math.ceil(len(requests) / workers))
+    chunks = await asyncio.gather(
+        *(
+            _run_timed_in_worker(
+                get_slacks, snapshot, requests[offset : offset + chunk_size]
+            )
+            for offset in range(0, len(requests), chunk_size)
+        )
+    )
+
+    # The chunks ran in parallel, so only the slowest one is reported
+    slowest = max(
+        (spans for _, spans in chunks),
+        key=lambda spans: sum(span.duration_ms for span in spans),
+        default=[],
+    )
+    record_spans(slowest)
+    observe_phases(slowest)
+    return [slack for slacks, _ in chunks for slack in slacks]
+
+
+def create_schedule(
+    snapshot: DivisionSnapshot,
+    request: SchedulerRequest,
+    seed: int | None = None,
+    on_phase: Optional[Callable[[SchedulePhase], None]] = None,
+    validation: Optional[ValidationResult] = None,
+    with_report: bool = False,
+) -> GeneratedSchedule:
+    scheduler = SchedulerService(snapshot, request, seed, on_phase, validation)
+    match_schedule, session_schedule = scheduler.create_schedule()
+    report = scheduler.report() if with_report else None
+    return GeneratedSchedule(
+        match_schedule, session_schedule, scheduler.analysis, seed, report
+    )
+
+
+def score_schedule(analysis: ScheduleAnalysis) -> tuple[float, float, float]:
+    """Rank schedules by the smallest gap any team gets between events, then by table
+    diversity, then by the average gap."""
+
+    return (
+        analysis["minimum_gap_seconds"],
+        analysis["average_unique_tables"],
+        analysis["average_gap_seconds"],
+    )
+
+
+async def generate_schedule(
+    snapshot: DivisionSnapshot,
+    request: SchedulerRequest,
+    attempts: int | None = None,
+    on_phase: Optional[Callable[[SchedulePhase], None]] = None,
+    with_report: bool = False,
+) -> GeneratedSchedule:
+    """Generate a schedule in the worker pool.
+
+    With more than one attempt, each attempt runs with its own seed in parallel, and
+    the best scoring schedule is returned. The request only fails if every attempt
+    fails, in which case the first error is raised. `on_phase` is called from the
+    worker processes, so it must be picklable. A cached validation of the request
+    is reused instead of validating again. The quality report is only built
+    `with_report`, as only previews return it.
+    """
+
+    validation = validation_cache.get(validation_cache.key(snapshot, request))
+
+    attempts = attempts or request.attempts or SCHEDULE_ATTEMPTS
+    if attempts <= 1:
+        schedule = await run_in_worker(
+            create_schedule,
+            snapshot,
+            request,
+            on_phase=on_phase,
+            validation=validation,
+            with_report=with_report,
+        )
+        MINIMUM_GAP_FALLBACKS.inc(schedule.analysis["minimum_gap_fallbacks"])
+        return schedule
+
+    base_seed = RANDOM_SEED if RANDOM_SEED is not None else random.randrange(2**31)
+    seeds = [base_seed + attempt for attempt in range(attempts)]
+
+    results = await asyncio.gather(
+        *(
+            _run_timed_in_worker(
+                create_schedule,
+                snapshot,
+                request,
+                seed,
+                on_phase,
+                validation,
+                with_report,
+            )
+            for seed in seeds
+        ),
+        return_exceptions=True,
+    )
+
+    schedules: list[tuple[GeneratedSchedule, list[Span]]] = []
+    for seed, result in zip(seeds, results):
+        if isinstance(result, SchedulerError):
+            logger.info(f"Schedule attempt with seed {seed} failed: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            schedules.append(result)
+
+    if not schedules:
+        raise next(result for result in results if isinstance(result, SchedulerError))
+
+    # Only the phases of the kept attempt are reported, the attempts ran in parallel
+    best, spans = max(schedules, key=lambda result: score_schedule(result[0].analysis))
+    record_spans(spans)
+    observe_phases(spans)
+    MINIMUM_GAP_FALLBACKS.inc(best.analysis["minimum_gap_fallbacks"])
+    logger.info(
+        f"{len(schedules)}/{attempts} schedule attempts succeeded, "
+        f"using seed {best.seed}"
+    )
+    return best
@@ -0,0 +1,136 @@
+import os
+import time
+import uuid
+import logging
+import cProfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator, TypeVar
+
+from config import PROFILE_DIR
+
+logger = logging.getLogger("lems.scheduler")
+
+T = TypeVar("T")
+
+
+@dataclass
+class Span:
+    name: str
+    duration_ms: float
+    description: str | None = None
+
+
+class Timings:
+    """The spans recorded while handling a single request, in the order they ended."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def add(self, span: Span):
+        self.spans.append(span)
+
+    def extend(self, spans: list[Span]):
+        self.spans.extend(spans)
+
+    def totals(self) -> dict[str, float]:
+        """Milliseconds spent per span name, repeated spans are summed."""
+        totals: dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return {name: round(duration, 3) for name, duration in totals.items()}
+
+    def server_timing(self) -> str:
+        """Format the spans as a Server-Timing header value."""
+        entries = []
+        for span in self.spans:
+            entry = f"{span.name};dur={span.duration_ms:.1f}"
+            if span.description:
+                entry += f';desc="{span.description}"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Timings | None] = ContextVar(
+    "current_timings", default=None
+)
+_profiling: ContextVar[bool] = ContextVar("profiling", default=False)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Collect the spans recorded in this context, including those of worker calls."""
+    timings = Timings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_spans(spans: list[Span]):
+    """Add spans recorded elsewhere, e.g. in a worker process, to the current context."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.extend(spans)
+
+
+@contextmanager
+def timed(name: str, description: str | None = None) -> Iterator[None]:
+    """Time a block as a span. The span is logged with its duration as structured
+    fields, and collected if the block runs within `collect_timings`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        logger.debug(
+            f"{description or name} took {duration_ms:.1f}ms",
+            extra={
+                "span": name,
+                "span_description": description,
+                "duration_ms": round(duration_ms, 3),
+            },
+        )
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(Span(name, duration_ms, description))
+
+
+@contextmanager
+def profiling(enabled: bool) -> Iterator[None]:
+    """Profile the worker calls made in this context."""
+    token = _profiling.set(enabled)
+    try:
+        yield
+    finally:
+        _profiling.reset(token)
+
+
+def is_profiling() -> bool:
+    return _profiling.get()
+
+
+def run_timed(
+    func: Callable[..., T], profile: bool, *args, **kwargs
+) -> tuple[T, list[Span]]:
+    """Run a function with its own span collector and return the result with the
+    recorded spans, so they can be sent back from a worker process. With `profile`,
+    a cProfile dump of the call is written to PROFILE_DIR."""
+    with collect_timings() as timings:
+        if not profile:
+            return func(*args, **kwargs), timings.spans
+
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(func, *args, **kwargs)
+        finally:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(
+                PROFILE_DIR, f"{func.__name__}-{uuid.uuid4().hex[:8]}.prof"
+            )
+            profiler.dump_stats(path)
+            logger.info(f"Wrote profile of {func.__name__} to {path}")
+
+        return result, timings.spans
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from functools import cache
+
+import pytest
+
+from fake_lems import DivisionConfig, make_request, make_snapshot
+from models.lems import (
+    DivisionSchedule,
+    DivisionSnapshot,
+    ScheduledMatch,
+    ScheduledSession,
+)
+from models.requests import SchedulerRequest
+from services.scheduler_service import SchedulerService
+
+
+@dataclass(frozen=True)
+class GeneratedDivision:
+    snapshot: DivisionSnapshot
+    request: SchedulerRequest
+    scheduler: SchedulerService
+    schedule: DivisionSchedule
+
+
+def to_division_schedule(
+    snapshot: DivisionSnapshot, scheduler: SchedulerService, request: SchedulerRequest
+) -> DivisionSchedule:
+    """The schedule a generated division would have once persisted, with a session
+    slot for every room."""
+
+    team_ids = {team.slug: team.id for team in snapshot.teams}
+    matches, sessions = (
+        scheduler._get_match_schedule(),
+        scheduler._get_session_schedule(),
+    )
+
+    return DivisionSchedule(
+        sessions=[
+            ScheduledSession(
+                int(number),
+                room_id,
+                team_ids.get(row[room_id]),
+                row["start_time"].to_pydatetime(),
+            )
+            for number, row in sessions.iterrows()
+            for room_id in sessions.columns[2:]
+        ],
+        matches=[
+            ScheduledMatch(
+                int(number),
+                row["stage"],
+                int(row["round"]),
+                row["start_time"].to_pydatetime(),
+                {
+                    table_id: team_ids.get(row[table_id])
+                    for table_id in matches.columns[4:]
+                },
+            )
+            for number, row in matches.iterrows()
+        ],
+        session_length_seconds=request.judging_session_length_seconds,
+        match_length_seconds=request.match_length_seconds,
+    )
+
+
+@cache
+def _generate(config: DivisionConfig) -> GeneratedDivision:
+    snapshot, request = make_snapshot(config), make_request(config)
+    scheduler = SchedulerService(snapshot, request, seed=config.seed)
+    scheduler.create_schedule()
+    return GeneratedDivision(
+        snapshot, request, scheduler, to_division_schedule(snapshot, scheduler, request)
+    )
+
+
+@pytest.fixture
+def generate_division():
+    """Generate the schedule of a synthetic division, once per configuration. The
+    result is shared between tests and must not be modified."""
+    return _generate
@@ -0,0 +1,241 @@
+import random
+from dataclasses import replace
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from config import MIN_MINUTES_BETWEEN_EVENTS
+from fake_lems import DivisionConfig
+from models.errors import SchedulerError
+from models.lems import DivisionSchedule, ScheduledMatch, ScheduledSession
+from models.requests import SessionMoved, TableDisabled, TeamAdded, TeamRemoved
+from models.scheduler import EMPTY_SLOT, ScheduleRepair
+from services.repair_service import ScheduleRepairService
+
+DIVISION = DivisionConfig(teams=40, tables=8, rooms=6, ranking_rounds=3)
+# Every table of every match is used, so no table can be disabled
+PACKED_DIVISION = DivisionConfig(teams=20, tables=4, rooms=4, ranking_rounds=1)
+
+
+def _state(service: ScheduleRepairService):
+    """Everything a slot write changes."""
+    return (
+        service.session_grid.copy(),
+        service.match_grid.copy(),
+        {key: counts.copy() for key, counts in service.round_play_counts.items()},
+        {key: counts.copy() for key, counts in service.table_play_counts.items()},
+        [service.timeline.events(team) for team in range(len(service.team_ids))],
+    )
+
+
+def _assert_same_state(actual, expected):
+    session_grid, match_grid, round_counts, table_counts, events = actual
+    np.testing.assert_array_equal(session_grid, expected[0])
+    np.testing.assert_array_equal(match_grid, expected[1])
+    for counts, expected_counts in (
+        (round_counts, expected[2]),
+        (table_counts, expected[3]),
+    ):
+        assert counts.keys() >= expected_counts.keys()
+        for key, values in counts.items():
+            expected_values = expected_counts.get(key, np.zeros_like(values))
+            np.testing.assert_array_equal(values, expected_values)
+    assert events == expected[4]
+
+
+def _write_random_slots(service: ScheduleRepairService, rng: random.Random, count: int):
+    teams = [EMPTY_SLOT, *range(len(service.team_ids))]
+    for _ in range(count):
+        team = rng.choice(teams)
+        if rng.random() < 0.5:
+            row = rng.randrange(service.match_grid.shape[0])
+            table = rng.randrange(service.match_grid.shape[1])
+            service._set_match_slot(row, table, team)
+        else:
+            row = rng.randrange(service.session_grid.shape[0])
+            room = rng.randrange(service.session_grid.shape[1])
+            service._set_session_slot(row, room, team)
+
+
+def _apply_repair(
+    schedule: DivisionSchedule, repair: ScheduleRepair
+) -> DivisionSchedule:
+    """The schedule the backend stores after a repair: slots are set to their new
+    team, and a moved session moves with all of its rooms."""
+
+    session_teams = {
+        (change["number"], change["room_id"]): change["team_id"]
+        for change in repair.sessions
+    }
+    session_times = {
+        change["number"]: change["scheduled_time"]
+        for change in repair.sessions
+        if change["scheduled_time"] is not None
+    }
+    match_teams = {
+        (change["number"], change["table_id"]): change["team_id"]
+        for change in repair.matches
+    }
+
+    sessions = [
+        ScheduledSession(
+            session.number,
+            session.room_id,
+            session_teams.get((session.number, session.room_id), session.team_id),
+            session_times.get(session.number, session.scheduled_time),
+        )
+        for session in schedule.sessions
+    ]
+    matches = [
+        ScheduledMatch(
+            match.number,
+            match.stage,
+            match.round,
+            match.scheduled_time,
+            {
+                table_id: match_teams.get((match.number, table_id), team_id)
+                for table_id, team_id in match.tables.items()
+            },
+        )
+        for match in schedule.matches
+    ]
+    return replace(schedule, sessions=sessions, matches=matches)
+
+
+def _assert_reloads(
+    division, service: ScheduleRepairService, repair: ScheduleRepair, schedule=None
+):
+    """The repair holds every slot that changed: applied to the persisted schedule,
+    it loads into the grids the repair ended with."""
+
+    repaired = _apply_repair(schedule or division.schedule, repair)
+    reloaded = ScheduleRepairService(division.snapshot, repaired)
+
+    assert reloaded.team_ids == service.team_ids
+    np.testing.assert_array_equal(reloaded.session_grid, service.session_grid)
+    np.testing.assert_array_equal(reloaded.session_start, service.session_start)
+    np.testing.assert_array_equal(reloaded.match_grid, service.match_grid)
+
+
+def _assert_constraints(service: ScheduleRepairService, repair: ScheduleRepair):
+    for (stage, round_num), counts in service.round_play_counts.items():
+        assert (
+            counts.max(initial=0) <= 1
+        ), f"A team plays twice in {stage} round {round_num}"
+
+    # Slots assigned as a fallback are allowed to miss the minimum gap
+    if repair.minimum_gap_fallbacks:
+        return
+    min_gap_seconds = MIN_MINUTES_BETWEEN_EVENTS * 60
+    for team_id in repair.affected_teams:
+        events = service.timeline.events(service.team_indexes[team_id])
+        for (start, end), (next_start, _) in zip(events, events[1:]):
+            assert next_start >= end
+            assert next_start - start >= min_gap_seconds
+
+
+def test_rollback_restores_state(generate_division):
+    division = generate_division(DIVISION)
+    service = ScheduleRepairService(division.snapshot, division.schedule)
+    rng = random.Random(0)
+    initial = _state(service)
+
+    _write_random_slots(service, rng, 40)
+    checkpoint = len(service._journal)
+    intermediate = _state(service)
+
+    _write_random_slots(service, rng, 40)
+    service._rollback(checkpoint)
+    _assert_same_state(_state(service), intermediate)
+
+    service._rollback(0)
+    _assert_same_state(_state(service), initial)
+    assert service._journal == []
+
+
+def test_team_removed(generate_division):
+    division = generate_division(DIVISION)
+    team_id = division.snapshot.teams[3].id
+    service = ScheduleRepairService(division.snapshot, division.schedule)
+
+    repair = service.repair(TeamRemoved(type="team_removed", team_id=team_id))
+
+    assert team_id in repair.affected_teams
+    assert not (service.session_grid == service.team_indexes[team_id]).any()
+    assert not (service.match_grid == service.team_indexes[team_id]).any()
+    _assert_constraints(service, repair)
+    _assert_reloads(division, service, repair)
+
+
+def test_team_added(generate_division):
+    division = generate_division(DIVISION)
+    team_id = division.snapshot.teams[3].id
+    service = ScheduleRepairService(division.snapshot, division.schedule)
+    without_team = _apply_repair(
+        division.schedule,
+        service.repair(TeamRemoved(type="team_removed", team_id=team_id)),
+    )
+
+    service = ScheduleRepairService(division.snapshot, without_team)
+    repair = service.repair(TeamAdded(type="team_added", team_id=team_id))
+
+    team = service.team_indexes[team_id]
+    assert (service.session_grid == team).sum() == 1
+    for counts in service.round_play_counts.values():
+        assert counts[team] == 1
+    _assert_constraints(service, repair)
+    _assert_reloads(division, service, repair, without_team)
+
+
+def test_session_moved_changes_every_stored_room(generate_division):
+    division = generate_division(DIVISION)
+    service = ScheduleRepairService(division.snapshot, division.schedule)
+    # The last session has empty rooms, which move with it
+    number = int(service.session_numbers[-1])
+    assert (service.session_grid[-1] == EMPTY_SLOT).any()
+    session = next(
+        session for session in division.schedule.sessions if session.number == number
+    )
+    start_time = session.scheduled_time + timedelta(minutes=10)
+
+    repair = service.repair(
+        SessionMoved(type="session_moved", number=number, start_time=start_time)
+    )
+
+    moved = [change for change in repair.sessions if change["number"] == number]
+    stored_rooms = {
+        session.room_id
+        for session in division.schedule.sessions
+        if session.number == number
+    }
+    assert {change["room_id"] for change in moved} == stored_rooms
+    assert all(change["scheduled_time"] == start_time for change in moved)
+    _assert_constraints(service, repair)
+    _assert_reloads(division, service, repair)
+
+
+def test_table_disabled(generate_division):
+    division = generate_division(
+        DivisionConfig(teams=100, tables=12, rooms=8, ranking_rounds=4)
+    )
+    table_id = division.snapshot.tables[0].id
+    from_time = sorted(match.scheduled_time for match in division.schedule.matches)[-4]
+    service = ScheduleRepairService(division.snapshot, division.schedule, from_time)
+
+    repair = service.repair(TableDisabled(type="table_disabled", table_id=table_id))
+
+    table = service.table_ids.index(table_id)
+    is_open = service.match_start >= service.from_time
+    assert (service.match_grid[is_open, table] == EMPTY_SLOT).all()
+    _assert_constraints(service, repair)
+    _assert_reloads(division, service, repair)
+
+
+def test_table_disabled_without_capacity(generate_division):
+    division = generate_division(PACKED_DIVISION)
+    service = ScheduleRepairService(division.snapshot, division.schedule)
+    table_id = division.snapshot.tables[0].id
+
+    with pytest.raises(SchedulerError, match="free slots"):
+        service.repair(TableDisabled(type="table_disabled", table_id=table_id))
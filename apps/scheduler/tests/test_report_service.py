@@ -0,0 +1,171 @@
+"""ScheduleReportService against a direct computation of the gaps of every team,
+one team and one event at a time."""
+
+from dataclasses import replace
+from statistics import mean
+
+import pytest
+
+from config import BACK_TO_BACK_GAP_SECONDS, GAP_HISTOGRAM_BIN_SECONDS
+from fake_lems import DivisionConfig
+from models.lems import DivisionSchedule, DivisionSnapshot
+from services.report_service import report_division_schedule
+
+DIVISIONS = [
+    DivisionConfig(teams=20, tables=4, rooms=4, ranking_rounds=1),
+    DivisionConfig(teams=40, tables=8, rooms=6, ranking_rounds=3),
+    DivisionConfig(
+        teams=100, tables=8, rooms=10, ranking_rounds=3, stagger_matches=False
+    ),
+]
+
+
+def _rounded(value):
+    """Reports with their floats rounded, so sums in another order compare equal."""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rounded(item) for item in value]
+    return value
+
+
+def reference_report(snapshot: DivisionSnapshot, schedule: DivisionSchedule) -> dict:
+    team_ids = [team.id for team in snapshot.teams]
+    for team_id in [session.team_id for session in schedule.sessions] + [
+        team_id for match in schedule.matches for team_id in match.tables.values()
+    ]:
+        if team_id is not None and team_id not in team_ids:
+            team_ids.append(team_id)
+    numbers = {team.id: team.number for team in snapshot.teams}
+
+    events = {team_id: [] for team_id in team_ids}
+    tables = {team_id: {} for team_id in team_ids}
+    for session in schedule.sessions:
+        if session.team_id is not None:
+            start = int(session.scheduled_time.timestamp())
+            events[session.team_id].append(
+                (start, start + schedule.session_length_seconds)
+            )
+    for match in schedule.matches:
+        start = int(match.scheduled_time.timestamp())
+        for table_id, team_id in match.tables.items():
+            if team_id is not None:
+                events[team_id].append((start, start + schedule.match_length_seconds))
+                tables[team_id].setdefault(match.stage, set()).add(table_id)
+
+    teams, all_gaps = [], []
+    for team_id in team_ids:
+        team_events = sorted(events[team_id])
+        gaps = [
+            next_start - end
+            for (_, end), (next_start, _) in zip(team_events, team_events[1:])
+        ]
+        all_gaps += gaps
+        teams.append(
+            {
+                "team_id": team_id,
+                "team_number": numbers.get(team_id),
+                "event_count": len(team_events),
+                "minimum_gap_seconds": min(gaps) if gaps else None,
+                "average_gap_seconds": mean(gaps) if gaps else None,
+                "maximum_gap_seconds": max(gaps) if gaps else None,
+                "back_to_back_count": sum(
+                    gap < BACK_TO_BACK_GAP_SECONDS for gap in gaps
+                ),
+                "unique_tables": {
+                    stage: len(stage_tables)
+                    for stage, stage_tables in tables[team_id].items()
+                },
+            }
+        )
+
+    width = GAP_HISTOGRAM_BIN_SECONDS
+    histogram = []
+    if all_gaps:
+        for bin_index in range(min(all_gaps) // width, max(all_gaps) // width + 1):
+            histogram.append(
+                {
+                    "start_seconds": bin_index * width,
+                    "end_seconds": (bin_index + 1) * width,
+                    "count": sum(gap // width == bin_index for gap in all_gaps),
+                }
+            )
+
+    stages = {stage for team_tables in tables.values() for stage in team_tables}
+    team_gaps = [team for team in teams if team["minimum_gap_seconds"] is not None]
+    return {
+        "team_count": len(team_ids),
+        "minimum_gap_seconds": min(
+            (team["minimum_gap_seconds"] for team in team_gaps), default=0.0
+        ),
+        "average_gap_seconds": (
+            mean(team["average_gap_seconds"] for team in team_gaps)
+            if team_gaps
+            else 0.0
+        ),
+        "maximum_gap_seconds": max(all_gaps, default=0.0),
+        "back_to_back_count": sum(team["back_to_back_count"] for team in teams),
+        "gap_histogram": histogram,
+        "average_unique_tables": mean(
+            len(set().union(*tables[team_id].values())) for team_id in team_ids
+        ),
+        "stage_unique_tables": {
+            stage: mean(
+                len(tables[team_id][stage])
+                for team_id in team_ids
+                if stage in tables[team_id]
+            )
+            for stage in stages
+        },
+        "teams": teams,
+    }
+
+
+@pytest.mark.parametrize("config", DIVISIONS, ids=lambda config: config.name)
+def test_report_matches_reference(generate_division, config: DivisionConfig):
+    division = generate_division(config)
+
+    report = report_division_schedule(division.snapshot, division.schedule)
+
+    assert _rounded(report) == _rounded(
+        reference_report(division.snapshot, division.schedule)
+    )
+
+
+@pytest.mark.parametrize("config", DIVISIONS, ids=lambda config: config.name)
+def test_generated_report_matches_persisted_report(
+    generate_division, config: DivisionConfig
+):
+    division = generate_division(config)
+
+    report = division.scheduler.report()
+    analysis = division.scheduler.analysis
+
+    # Generation times a match by its cycle, like the validator, so the persisted
+    # schedule is reported with matches that long
+    cycle_seconds = division.request.ranking_match_cycle_time_seconds
+    assert division.request.practice_match_cycle_time_seconds == cycle_seconds
+    schedule = replace(division.schedule, match_length_seconds=cycle_seconds)
+    expected = report_division_schedule(division.snapshot, schedule)
+    assert _rounded(report) == _rounded(expected)
+    for key in (
+        "minimum_gap_seconds",
+        "average_gap_seconds",
+        "average_unique_tables",
+        "stage_unique_tables",
+    ):
+        assert _rounded(analysis[key]) == _rounded(expected[key])
+
+
+def test_report_includes_teams_that_left(generate_division):
+    division = generate_division(DIVISIONS[1])
+    # The first team left the division but is still scheduled
+    snapshot = replace(division.snapshot, teams=division.snapshot.teams[1:])
+
+    report = report_division_schedule(snapshot, division.schedule)
+
+    assert report["teams"][-1]["team_id"] == division.snapshot.teams[0].id
+    assert report["teams"][-1]["team_number"] is None
+    assert _rounded(report) == _rounded(reference_report(snapshot, division.schedule))
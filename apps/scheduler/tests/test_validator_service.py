@@ -0,0 +1,112 @@
+"""ValidatorService against the output of the implementation before the NumPy
+rewrite.
+
+fixtures/validator_reference.json holds, for a grid of divisions and timings, whether
+the original validator accepted the request, its error, and a SHA-256 digest of the
+validator data it returned or attached to the error.
+"""
+
+import copy
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from cross_reference_benchmark import make_data, reference_cross_reference_match_slots
+from models.errors import ValidatorError
+from models.lems import DivisionSnapshot, Location, Team
+from models.requests import Break, SchedulerRequest
+from services.validator_service import ValidatorService
+
+REFERENCE = json.loads(
+    (Path(__file__).parent / "fixtures" / "validator_reference.json").read_text()
+)
+EVENT_DAY = datetime(2026, 3, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _case_id(case: dict) -> str:
+    return (
+        f"{case['teams']}t-{case['rooms']}r-{case['tables']}tb-"
+        f"j{case['judging_cycle_time_seconds']}-m{case['match_cycle_time_seconds']}"
+        f"{'-stagger' if case['stagger_matches'] else ''}"
+        f"{'-breaks' if case['breaks'] else ''}"
+    )
+
+
+def _make_snapshot(teams: int, rooms: int, tables: int) -> DivisionSnapshot:
+    return DivisionSnapshot(
+        teams=[Team(f"team-{i}", i, "IL", f"IL-{i}") for i in range(1, teams + 1)],
+        rooms=[Location(f"room-{i}", f"Room {i}") for i in range(rooms)],
+        tables=[Location(f"table-{i}", f"Table {i}") for i in range(tables)],
+    )
+
+
+def _make_request(case: dict, **overrides) -> SchedulerRequest:
+    breaks = (
+        [
+            Break(event_type="match", after=12, duration_seconds=1800),
+            Break(event_type="judging", after=2, duration_seconds=900),
+        ]
+        if case["breaks"]
+        else []
+    )
+    fields = {
+        "division_id": "division",
+        "matches_start": EVENT_DAY,
+        "practice_rounds": 1,
+        "ranking_rounds": 3,
+        "match_length_seconds": 150,
+        "practice_match_cycle_time_seconds": case["match_cycle_time_seconds"],
+        "ranking_match_cycle_time_seconds": case["match_cycle_time_seconds"],
+        "stagger_matches": case["stagger_matches"],
+        "judging_start": EVENT_DAY,
+        "judging_session_length_seconds": case["judging_session_length_seconds"],
+        "judging_cycle_time_seconds": case["judging_cycle_time_seconds"],
+        "breaks": breaks,
+    }
+    return SchedulerRequest(**(fields | overrides))
+
+
+def _digest(data) -> str:
+    encoded = json.dumps(data, default=str, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@pytest.mark.parametrize("case", REFERENCE, ids=_case_id)
+def test_validate_matches_reference(case: dict):
+    snapshot = _make_snapshot(case["teams"], case["rooms"], case["tables"])
+    service = ValidatorService(snapshot, _make_request(case))
+
+    try:
+        data = service.validate()
+        result = {"is_valid": True}
+    except ValidatorError as error:
+        data = error.data
+        result = {"is_valid": False, "error": str(error)}
+    result["digest"] = _digest(data)
+
+    assert result == {
+        key: case[key] for key in ("is_valid", "error", "digest") if key in case
+    }
+
+
+def test_validate_without_overlapping_rounds():
+    # Without match rounds no session overlaps a round: valid, with no slack
+    case = REFERENCE[0]
+    snapshot = _make_snapshot(case["teams"], case["rooms"], case["tables"])
+    request = _make_request(case, practice_rounds=0, ranking_rounds=0)
+
+    assert ValidatorService(snapshot, request).validate() == []
+    assert ValidatorService(snapshot, request).get_slack() is None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_cross_reference_matches_reference(seed: int):
+    data = make_data(300, seed)
+
+    expected = reference_cross_reference_match_slots(copy.deepcopy(data))
+    actual = ValidatorService._cross_reference_match_slots(copy.deepcopy(data))
+
+    assert actual == expected
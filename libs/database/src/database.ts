@@ -49,6 +49,18 @@ export interface DatabaseRawAccess {
   storage: ObjectStorage;
 }
 
+/**
+ * Repositories bound to a single PostgreSQL transaction, see `Database.transaction`.
+ * Only PostgreSQL repositories are included, MongoDB writes can't join the transaction.
+ */
+export interface DatabaseTransaction {
+  divisions: DivisionsRepository;
+  judgingSessions: JudgingSessionsRepository;
+  judgingDeliberations: JudgingDeliberationsRepository;
+  finalDeliberations: FinalDeliberationsRepository;
+  robotGameMatches: RobotGameMatchesRepository;
+}
+
 export class Database {
   private kysely: Kysely<KyselyDatabaseSchema>;
   private mongoClient: MongoClient;
@@ -143,6 +155,22 @@ export class Database {
     this.awards = new AwardsRepository(this.kysely);
   }
 
+  /**
+   * Runs a callback in a PostgreSQL transaction. The transaction is committed when the
+   * callback resolves, and rolled back when it throws.
+   */
+  async transaction<T>(callback: (trx: DatabaseTransaction) => Promise<T>): Promise<T> {
+    return this.kysely.transaction().execute(trx =>
+      callback({
+        divisions: new DivisionsRepository(trx, this.space),
+        judgingSessions: new JudgingSessionsRepository(trx),
+        judgingDeliberations: new JudgingDeliberationsRepository(trx),
+        finalDeliberations: new FinalDeliberationsRepository(trx),
+        robotGameMatches: new RobotGameMatchesRepository(trx)
+      })
+    );
+  }
+
   async connect(): Promise<void> {
     try {
       // Test PostgreSQL connection
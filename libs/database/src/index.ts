@@ -1,4 +1,4 @@
-export { Database, type DatabaseRawAccess } from './database';
+export { Database, type DatabaseRawAccess, type DatabaseTransaction } from './database';
 export { ObjectStorage } from './object-storage';
 
 export * from './schema/index';
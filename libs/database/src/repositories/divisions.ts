@@ -7,7 +7,8 @@ import {
   Division,
   UpdateableDivision,
   DivisionSummary,
-  DivisionState
+  DivisionState,
+  DivisionScheduleSettings
 } from '../schema/tables/divisions';
 import {
   AgendaEvent,
@@ -115,6 +116,23 @@ class DivisionSelector {
     return result.length > 0;
   }
 
+  /**
+   * Marks the division as scheduled, unless it already has a schedule.
+   * Within a transaction the division stays locked until it ends, so a concurrent
+   * caller waits for it and then finds the division already scheduled.
+   * @returns false if the division already had a schedule
+   */
+  async claimSchedule(scheduleSettings: DivisionScheduleSettings | null): Promise<boolean> {
+    const result = await this.db
+      .updateTable('divisions')
+      .set({ has_schedule: true, schedule_settings: scheduleSettings })
+      .where(this.selector.type, '=', this.selector.value)
+      .where('has_schedule', '=', false)
+      .returning('id')
+      .executeTakeFirst();
+    return result !== undefined;
+  }
+
   async delete(): Promise<boolean | null> {
     const result = await this.db
       .deleteFrom('divisions')
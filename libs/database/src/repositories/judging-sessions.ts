@@ -57,6 +57,35 @@ class JudgingSessionsSelector {
     return teamSession || null;
   }
 
+  /**
+   * Sets the team of a session slot, only if it still holds `previousTeamId`.
+   * Resolves to undefined when the slot is missing or holds another team.
+   */
+  updateSlot(number: number, roomId: string, previousTeamId: string | null, teamId: string | null) {
+    return this.db
+      .updateTable('judging_sessions')
+      .set({ team_id: teamId })
+      .where('division_id', '=', this.divisionId)
+      .where('number', '=', number)
+      .where('room_id', '=', roomId)
+      .where('team_id', 'is not distinct from', previousTeamId)
+      .returningAll()
+      .executeTakeFirst();
+  }
+
+  /**
+   * Moves every room of a session to a new time. Resolves to the number of rooms.
+   */
+  async reschedule(number: number, scheduledTime: Date): Promise<number> {
+    const result = await this.db
+      .updateTable('judging_sessions')
+      .set({ scheduled_time: scheduledTime })
+      .where('division_id', '=', this.divisionId)
+      .where('number', '=', number)
+      .executeTakeFirst();
+    return Number(result.numUpdatedRows);
+  }
+
   async deleteAll(): Promise<number> {
     const sessions = await this.db
       .selectFrom('judging_sessions')
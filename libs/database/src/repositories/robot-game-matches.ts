@@ -138,6 +138,32 @@ class RobotGameMatchesSelector {
 
     return matchIds.length;
   }
+
+  /**
+   * Sets the team on a table of a match, only if it still holds `previousTeamId`.
+   * Resolves to undefined when the table is missing or holds another team.
+   */
+  async updateParticipant(
+    number: number,
+    tableId: string,
+    previousTeamId: string | null,
+    teamId: string | null
+  ): Promise<RobotGameMatchParticipant | undefined> {
+    return await this.db
+      .updateTable('robot_game_match_participants')
+      .set({ team_id: teamId })
+      .where('table_id', '=', tableId)
+      .where('team_id', 'is not distinct from', previousTeamId)
+      .where('match_id', 'in', eb =>
+        eb
+          .selectFrom('robot_game_matches')
+          .select('id')
+          .where('division_id', '=', this.divisionId)
+          .where('number', '=', number)
+      )
+      .returningAll()
+      .executeTakeFirst();
+  }
 }
 
 export class RobotGameMatchesRepository {
@@ -15,6 +15,9 @@ export interface SchedulerRequest {
 
   breaks: SchedulerRequestBreaks[];
   timezone?: string;
+
+  attempts?: number;
+  match_assignment?: 'greedy' | 'optimal';
 }
 
 export interface SchedulerRequestBreaks {
@@ -22,3 +25,31 @@ export interface SchedulerRequestBreaks {
   after: number;
   duration_seconds: number;
 }
+
+export type ScheduleChange =
+  | { type: 'team_removed'; team_id: string }
+  | { type: 'team_added'; team_id: string }
+  | { type: 'table_disabled'; table_id: string }
+  | { type: 'session_moved'; number: number; start_time: Date };
+
+export interface RepairScheduleRequest {
+  division_id: string;
+  change: ScheduleChange;
+  from_time?: Date;
+}
+
+export type SweepParameter =
+  | 'practice_rounds'
+  | 'ranking_rounds'
+  | 'practice_match_cycle_time_seconds'
+  | 'ranking_match_cycle_time_seconds'
+  | 'judging_session_length_seconds'
+  | 'judging_cycle_time_seconds';
+
+export interface ValidationSweepRequest {
+  base: SchedulerRequest;
+  parameters: Partial<
+    Record<SweepParameter, number[] | { start: number; stop: number; step?: number }>
+  >;
+  breaks?: SchedulerRequestBreaks[][];
+}